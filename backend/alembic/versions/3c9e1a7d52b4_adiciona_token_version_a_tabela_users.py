@@ -0,0 +1,28 @@
+"""Adiciona token_version a tabela users
+
+Revision ID: 3c9e1a7d52b4
+Revises: baefe5006a24
+Create Date: 2026-10-19 09:12:40.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1a7d52b4'
+down_revision: Union[str, Sequence[str], None] = 'baefe5006a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,30 @@
+"""Adiciona indices de paginacao de clientes
+
+Revision ID: 5d2f8a61c4e7
+Revises: 7b4e2c9f1a30
+Create Date: 2026-10-19 14:12:45.218306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a61c4e7'
+down_revision: Union[str, Sequence[str], None] = '7b4e2c9f1a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_clientes_nome_id', 'clientes', ['nome_razao_social', 'id'], unique=False)
+    op.create_index('ix_clientes_data_criacao_id', 'clientes', ['data_criacao', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientes_data_criacao_id', table_name='clientes')
+    op.drop_index('ix_clientes_nome_id', table_name='clientes')
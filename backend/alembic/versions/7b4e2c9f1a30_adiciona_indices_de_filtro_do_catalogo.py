@@ -0,0 +1,32 @@
+"""Adiciona indices de filtro do catalogo
+
+Revision ID: 7b4e2c9f1a30
+Revises: 3c9e1a7d52b4
+Create Date: 2026-10-19 10:41:07.532916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e2c9f1a30'
+down_revision: Union[str, Sequence[str], None] = '3c9e1a7d52b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_catalogo_itens_distribuidor_id'), 'catalogo_itens', ['distribuidor_id'], unique=False)
+    op.create_index(op.f('ix_catalogo_itens_equipamento_id'), 'catalogo_itens', ['equipamento_id'], unique=False)
+    op.create_index(op.f('ix_equipamentos_categoria_id'), 'equipamentos', ['categoria_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_equipamentos_categoria_id'), table_name='equipamentos')
+    op.drop_index(op.f('ix_catalogo_itens_equipamento_id'), table_name='catalogo_itens')
+    op.drop_index(op.f('ix_catalogo_itens_distribuidor_id'), table_name='catalogo_itens')
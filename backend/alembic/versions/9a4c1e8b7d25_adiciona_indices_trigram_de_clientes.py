@@ -0,0 +1,43 @@
+"""Adiciona indices trigram de clientes
+
+Revision ID: 9a4c1e8b7d25
+Revises: 5d2f8a61c4e7
+Create Date: 2026-10-19 14:48:02.671534
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c1e8b7d25'
+down_revision: Union[str, Sequence[str], None] = '5d2f8a61c4e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_clientes_nome_trgm', 'clientes', ['nome_razao_social'], unique=False,
+        postgresql_using='gin', postgresql_ops={'nome_razao_social': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_clientes_documento_trgm', 'clientes', ['documento'], unique=False,
+        postgresql_using='gin', postgresql_ops={'documento': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_clientes_email_trgm', 'clientes', ['email'], unique=False,
+        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientes_email_trgm', table_name='clientes')
+    op.drop_index('ix_clientes_documento_trgm', table_name='clientes')
+    op.drop_index('ix_clientes_nome_trgm', table_name='clientes')
+    # A extensão pg_trgm é mantida (outros objetos podem depender dela)
@@ -0,0 +1,34 @@
+"""Adiciona indices de faixa do catalogo
+
+Revision ID: a6e3f9c17d52
+Revises: f2d8c6a41e97
+Create Date: 2026-10-19 18:12:54.207731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e3f9c17d52'
+down_revision: Union[str, Sequence[str], None] = 'f2d8c6a41e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_catalogo_itens_distribuidor_id_id', 'catalogo_itens', ['distribuidor_id', 'id'], unique=False)
+    op.create_index('ix_catalogo_itens_preco_custo_id', 'catalogo_itens', ['preco_custo', 'id'], unique=False)
+    op.create_index('ix_equipamentos_potencia_w', 'equipamentos', ['potencia_w'], unique=False)
+    op.create_index('ix_equipamentos_categoria_id_potencia_w', 'equipamentos', ['categoria_id', 'potencia_w'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_equipamentos_categoria_id_potencia_w', table_name='equipamentos')
+    op.drop_index('ix_equipamentos_potencia_w', table_name='equipamentos')
+    op.drop_index('ix_catalogo_itens_preco_custo_id', table_name='catalogo_itens')
+    op.drop_index('ix_catalogo_itens_distribuidor_id_id', table_name='catalogo_itens')
@@ -0,0 +1,41 @@
+"""Adiciona indices cobrindo o resumo do cliente
+
+Revision ID: b8e5d3f27a91
+Revises: e3b7a9d40c12
+Create Date: 2026-10-19 16:34:11.085427
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e5d3f27a91'
+down_revision: Union[str, Sequence[str], None] = 'e3b7a9d40c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_propostas_cliente_status', 'propostas', ['cliente_id', 'status'], unique=False,
+        postgresql_include=['valor_total', 'vendedor_id']
+    )
+    op.create_index(
+        'ix_projetos_cliente_status', 'projetos', ['cliente_id', 'status'], unique=False,
+        postgresql_include=['valor_total']
+    )
+    op.create_index(
+        'ix_transacoes_projeto_status', 'transacoes', ['projeto_id', 'status'], unique=False,
+        postgresql_include=['valor']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transacoes_projeto_status', table_name='transacoes')
+    op.drop_index('ix_projetos_cliente_status', table_name='projetos')
+    op.drop_index('ix_propostas_cliente_status', table_name='propostas')
@@ -0,0 +1,47 @@
+"""Cria tabela clientes_duplicados
+
+Revision ID: c4f1a8e62b3d
+Revises: b8e5d3f27a91
+Create Date: 2026-10-19 17:02:48.513296
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a8e62b3d'
+down_revision: Union[str, Sequence[str], None] = 'b8e5d3f27a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('clientes_duplicados',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('cliente_a_id', sa.Integer(), nullable=False),
+    sa.Column('cliente_b_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('motivos', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Enum('PENDENTE', 'DESCARTADO', name='duplicatastatus'), nullable=False),
+    sa.Column('data_deteccao', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('data_revisao', sa.DateTime(timezone=True), nullable=True),
+    sa.CheckConstraint('cliente_a_id < cliente_b_id', name='ck_clientes_duplicados_ordem'),
+    sa.ForeignKeyConstraint(['cliente_a_id'], ['clientes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['cliente_b_id'], ['clientes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cliente_a_id', 'cliente_b_id', name='uq_clientes_duplicados_par')
+    )
+    op.create_index('ix_clientes_duplicados_status_score', 'clientes_duplicados', ['status', 'score'], unique=False)
+    op.create_index(op.f('ix_clientes_duplicados_cliente_b_id'), 'clientes_duplicados', ['cliente_b_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_clientes_duplicados_cliente_b_id'), table_name='clientes_duplicados')
+    op.drop_index('ix_clientes_duplicados_status_score', table_name='clientes_duplicados')
+    op.drop_table('clientes_duplicados')
+    sa.Enum(name='duplicatastatus').drop(op.get_bind(), checkfirst=True)
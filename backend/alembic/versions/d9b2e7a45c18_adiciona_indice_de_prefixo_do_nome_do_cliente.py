@@ -0,0 +1,32 @@
+"""Adiciona indice de prefixo do nome do cliente
+
+Revision ID: d9b2e7a45c18
+Revises: a6e3f9c17d52
+Create Date: 2026-10-19 18:37:09.641853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b2e7a45c18'
+down_revision: Union[str, Sequence[str], None] = 'a6e3f9c17d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Autocomplete: faixa por prefixo em lower(nome), na ordem de bytes
+    op.create_index(
+        'ix_clientes_nome_prefixo', 'clientes',
+        [sa.text('lower(nome_razao_social) COLLATE "C"')], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clientes_nome_prefixo', table_name='clientes')
@@ -0,0 +1,60 @@
+"""Adiciona documento_normalizado a tabela clientes
+
+Revision ID: e3b7a9d40c12
+Revises: 9a4c1e8b7d25
+Create Date: 2026-10-19 15:20:37.904118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b7a9d40c12'
+down_revision: Union[str, Sequence[str], None] = '9a4c1e8b7d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+
+    # 0. Documentos que não são CPF (11 dígitos) nem CNPJ (14): não cabem na
+    #    coluna (String(14)) ou viram '' e colidem no índice único. A API só
+    #    aceita 11 ou 14 dígitos: aborta com a lista para que sejam corrigidos antes
+    invalidos = conn.execute(sa.text(
+        "SELECT id, documento FROM clientes "
+        "WHERE length(regexp_replace(documento, '\\D', '', 'g')) NOT IN (11, 14) "
+        "ORDER BY id"
+    )).all()
+    if invalidos:
+        detalhes = "; ".join(f"id {cliente_id} ({documento!r})" for cliente_id, documento in invalidos)
+        raise RuntimeError(f"Documentos que não são CPF (11 dígitos) nem CNPJ (14): {detalhes}")
+
+    # 1. Coluna nula, para permitir o backfill
+    op.add_column('clientes', sa.Column('documento_normalizado', sa.String(length=14), nullable=True))
+
+    # 2. Backfill: apenas os dígitos do documento atual
+    op.execute("UPDATE clientes SET documento_normalizado = regexp_replace(documento, '\\D', '', 'g')")
+
+    # 3. O mesmo CPF/CNPJ cadastrado em formatos diferentes impede o índice único:
+    #    aborta com a lista para que os clientes sejam unificados antes
+    duplicados = conn.execute(sa.text(
+        "SELECT documento_normalizado, string_agg(id::text, ', ' ORDER BY id) "
+        "FROM clientes GROUP BY documento_normalizado HAVING count(*) > 1"
+    )).all()
+    if duplicados:
+        detalhes = "; ".join(f"{doc} (ids {ids})" for doc, ids in duplicados)
+        raise RuntimeError(f"Documentos duplicados em formatos diferentes: {detalhes}")
+
+    op.alter_column('clientes', 'documento_normalizado', nullable=False)
+    op.create_index(op.f('ix_clientes_documento_normalizado'), 'clientes', ['documento_normalizado'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_clientes_documento_normalizado'), table_name='clientes')
+    op.drop_column('clientes', 'documento_normalizado')
@@ -0,0 +1,32 @@
+"""Adiciona indices da listagem de propostas
+
+Revision ID: f2d8c6a41e97
+Revises: c4f1a8e62b3d
+Create Date: 2026-10-19 17:41:26.370584
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d8c6a41e97'
+down_revision: Union[str, Sequence[str], None] = 'c4f1a8e62b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_propostas_vendedor_id_id', 'propostas', ['vendedor_id', 'id'], unique=False)
+    op.create_index('ix_propostas_status_id', 'propostas', ['status', 'id'], unique=False)
+    op.create_index('ix_propostas_cliente_id_id', 'propostas', ['cliente_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_propostas_cliente_id_id', table_name='propostas')
+    op.drop_index('ix_propostas_status_id', table_name='propostas')
+    op.drop_index('ix_propostas_vendedor_id_id', table_name='propostas')
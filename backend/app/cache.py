@@ -1,18 +1,244 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
 import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError, TimeoutError as RedisTimeoutError
 from app import config
 
-async def get_redis_client():
+logger = logging.getLogger(__name__)
+
+
+# --- Circuit breaker do Redis ---
+
+class CircuitOpenError(RedisError):
+    """Levantada sem tocar na rede enquanto o circuito do Redis está aberto."""
+
+
+class CircuitBreaker:
     """
-    Dependência do FastAPI para injetar um cliente Redis assíncrono.
-    Decodifica respostas de bytes para strings automaticamente.
+    Abre o circuito após 'failure_threshold' falhas seguidas de conexão/timeout.
+    Com o circuito aberto, os comandos falham na hora (CircuitOpenError) e os
+    chamadores seguem para o DB. Após 'reset_timeout' segundos, UM comando de
+    teste é liberado (half-open): sucesso fecha o circuito, falha o reabre.
     """
-    
-    try:
-        client = await aioredis.from_url(
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Half-open: libera esta chamada e segura as demais por mais um ciclo
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Redis voltou a responder: circuito fechado.")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    "Redis indisponível (%d falhas seguidas): circuito aberto por %ss.",
+                    self.failures, self.reset_timeout
+                )
+            self.opened_at = time.monotonic()
+
+
+redis_breaker = CircuitBreaker(
+    failure_threshold=config.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=config.REDIS_BREAKER_RESET_SECONDS
+)
+
+
+class _BreakerRedis(aioredis.Redis):
+    """
+    Cliente Redis que passa cada comando pelo circuit breaker.
+    Obs: pipelines não passam por 'execute_command' e não alimentam o breaker.
+    """
+
+    async def execute_command(self, *args, **options):
+        if not redis_breaker.allow():
+            raise CircuitOpenError("Circuito do Redis aberto: comando ignorado.")
+        try:
+            result = await super().execute_command(*args, **options)
+        except (RedisConnectionError, RedisTimeoutError):
+            redis_breaker.record_failure()
+            raise
+        redis_breaker.record_success()
+        return result
+
+
+# --- Pool de conexões compartilhado (um por worker) ---
+
+_redis_pool: Optional[aioredis.ConnectionPool] = None
+_redis_client: Optional[_BreakerRedis] = None
+
+def get_redis() -> aioredis.Redis:
+    """
+    Retorna o cliente Redis compartilhado do processo.
+    Criado no lifespan da API; scripts/CLIs o criam sob demanda aqui.
+    """
+    global _redis_pool, _redis_client
+    if _redis_client is None:
+        _redis_pool = aioredis.ConnectionPool.from_url(
             f"redis://{config.REDIS_HOST}:{config.REDIS_PORT}/{config.REDIS_DB}",
             encoding="utf-8",
-            decode_responses=True # Importante: decodifica respostas para string
+            decode_responses=True, # Importante: decodifica respostas para string
+            max_connections=config.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
         )
-        yield client
-    finally:
-        await client.close()
\ No newline at end of file
+        _redis_client = _BreakerRedis(connection_pool=_redis_pool)
+    return _redis_client
+
+async def init_redis() -> None:
+    """Cria o pool no startup (lifespan) e testa a conexão, sem impedir a subida."""
+    client = get_redis()
+    try:
+        await client.ping()
+        logger.info("Pool do Redis pronto (max_connections=%d).", config.REDIS_MAX_CONNECTIONS)
+    except RedisError as e:
+        logger.warning("Redis indisponível no startup (a API segue sem cache): %s", e)
+
+async def close_redis() -> None:
+    """Fecha o pool no shutdown (lifespan)."""
+    global _redis_pool, _redis_client
+    if _redis_pool is not None:
+        await _redis_pool.disconnect()
+    _redis_pool = None
+    _redis_client = None
+
+def _glob_escape(prefix: str) -> str:
+    return re.sub(r"([*?\[\]\\])", r"\\\1", prefix)
+
+async def delete_by_prefix(
+    prefix: str, 
+    redis_client: Optional[aioredis.Redis] = None, 
+    batch_size: int = 500
+) -> int:
+    """
+    Apaga todas as chaves que começam com 'prefix' (SCAN + UNLINK em lotes).
+    É a única forma de limpeza em massa do backend: nunca FLUSHDB/KEYS,
+    para não derrubar o cache de outros módulos (nem travar o Redis).
+    """
+    redis_client = redis_client or get_redis()
+    deleted = 0
+    batch = []
+    async for key in redis_client.scan_iter(match=f"{_glob_escape(prefix)}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += await redis_client.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += await redis_client.unlink(*batch)
+    return deleted
+
+async def get_redis_client() -> aioredis.Redis:
+    """
+    Dependência do FastAPI para injetar o cliente Redis assíncrono.
+    Empresta conexões do pool compartilhado (nada é aberto/fechado por requisição).
+    Decodifica respostas de bytes para strings automaticamente.
+    """
+    return get_redis()
+
+
+class TTLCache:
+    """
+    Cache LRU em memória (L1, por processo) com expiração por entrada.
+
+    Não é thread-safe: foi pensado para ser usado apenas dentro do
+    event loop do worker (sem await entre leitura e escrita).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# --- Janela de checagem das versões de cache ---
+# Com o listener de invalidação ativo (app/cache_events.py), cada escrita é
+# avisada a todos os workers, que podem confiar no L1 por mais tempo antes
+# de reconsultar as versões no Redis.
+
+_invalidation_listening = False
+
+def set_invalidation_listening(value: bool) -> None:
+    global _invalidation_listening
+    _invalidation_listening = value
+
+def is_invalidation_listening() -> bool:
+    return _invalidation_listening
+
+def version_check_window(base: float) -> float:
+    if _invalidation_listening:
+        return max(base, config.CACHE_NOTIFY_VERSION_CHECK_SECONDS)
+    return base
+
+
+# --- Valores com carimbo de tempo (stale-while-revalidate) ---
+# No Redis, o valor é gravado como "<built_at>:<valor>", em que built_at é o
+# time.time() da reconstrução. O TTL da chave é o teto (hard); a idade
+# comparada ao TTL "soft" decide se o valor ainda é fresco.
+
+def pack_stamped(value: str, built_at: float) -> str:
+    return f"{built_at:.3f}:{value}"
+
+def unpack_stamped(raw: str) -> Tuple[float, str]:
+    """Retorna (built_at, valor). Valores sem carimbo contam como muito antigos."""
+    head, sep, value = raw.partition(":")
+    if sep:
+        try:
+            return float(head), value
+        except ValueError:
+            pass
+    return 0.0, raw
+
+def is_stale(built_at: float, soft_ttl: float) -> bool:
+    return time.time() - built_at >= soft_ttl
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import config
+from app import service_cache
+from app.cache import is_invalidation_listening, set_invalidation_listening
+
+logger = logging.getLogger(__name__)
+
+# --- Invalidação entre workers (Postgres LISTEN/NOTIFY) ---
+#
+# Os caches L1 são por processo: com vários workers do uvicorn, uma escrita
+# em um deles deixaria os outros servindo dados antigos até o TTL.
+#
+# 1. Escrita: o serviço chama 'notify_change(db, tabela, id)' após o commit,
+#    que envia um NOTIFY no canal CACHE_NOTIFY_CHANNEL com {"table", "id"}.
+# 2. Cada worker mantém uma conexão asyncpg dedicada escutando o canal
+#    ('start_listener', no lifespan) e, a cada aviso, descarta as entradas
+#    locais da tabela: o L1 das funções @cached com a tag correspondente e
+#    os handlers registrados com '@on_change(tabela)' (catálogo, usuários...).
+#
+# O Redis continua sendo a fonte da verdade do L2 (versões/INCR); o NOTIFY
+# apenas encurta o tempo em que um L1 de outro worker fica desatualizado.
+
+CHANNEL = config.CACHE_NOTIFY_CHANNEL
+
+_handlers: Dict[str, List[Callable[[Optional[int]], None]]] = defaultdict(list)
+_listener_task: Optional[asyncio.Task] = None
+
+
+def on_change(*tables: str):
+    """
+    Registra um handler síncrono chamado (com o id da linha, ou None) quando
+    qualquer worker avisar uma escrita em uma das tabelas.
+    """
+    def decorator(handler: Callable[[Optional[int]], None]):
+        for table in tables:
+            _handlers[table].append(handler)
+        return handler
+    return decorator
+
+
+def is_listening() -> bool:
+    """True enquanto este worker está recebendo os avisos de invalidação."""
+    return is_invalidation_listening()
+
+
+def dispatch(table: str, row_id: Optional[int] = None) -> None:
+    """Descarta os caches locais (deste worker) que dependem da tabela."""
+    service_cache.evict_local([table])
+    for handler in _handlers.get(table, ()):
+        try:
+            handler(row_id)
+        except Exception as e:
+            logger.error("Erro no handler de invalidação de '%s': %s", table, e)
+
+
+def dispatch_all() -> None:
+    """Descarta TODOS os caches locais (ex: após perder avisos numa reconexão)."""
+    service_cache.evict_all_local()
+    for table in list(_handlers):
+        dispatch(table)
+
+
+async def notify_change(db: AsyncSession, table: str, row_id: Optional[int] = None) -> None:
+    """
+    Avisa todos os workers de uma escrita em 'table'.
+    Chame APÓS o commit da escrita: o pg_notify roda (e é commitado) em uma
+    transação própria, então os outros workers nunca recebem o aviso antes
+    de o dado estar visível. Os caches deste worker são descartados na hora.
+    """
+    dispatch(table, row_id)
+    payload = json.dumps({"table": table, "id": row_id})
+    try:
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+        await db.commit()
+    except Exception as e:
+        # Logar o erro, mas não travar a operação principal (os TTLs seguem valendo)
+        logger.error("Erro ao enviar NOTIFY de invalidação (%s): %s", table, e)
+        await db.rollback()
+
+
+# --- Listener (um por worker) ---
+
+def _on_notification(connection, pid, channel, payload) -> None:
+    try:
+        data = json.loads(payload)
+        table = data["table"]
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Aviso de invalidação inválido ignorado: %r", payload)
+        return
+    dispatch(table, data.get("id"))
+
+
+def _listener_dsn() -> str:
+    # asyncpg usa a URL "pura" do Postgres (sem o "+asyncpg" do SQLAlchemy)
+    return (
+        f"postgresql://{config.DATABASE_USERNAME}:{config.DATABASE_PASSWORD}"
+        f"@{config.DATABASE_HOST}/{config.DATABASE_NAME}"
+    )
+
+
+async def _listen_forever() -> None:
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(_listener_dsn())
+            await connection.add_listener(CHANNEL, _on_notification)
+            # Avisos enviados enquanto estávamos desconectados se perderam
+            dispatch_all()
+            set_invalidation_listening(True)
+            logger.info("Escutando invalidações de cache no canal '%s'.", CHANNEL)
+
+            # Mantém a conexão e detecta quedas (o asyncpg não avisa sozinho)
+            while True:
+                await asyncio.sleep(config.CACHE_NOTIFY_HEALTH_CHECK_SECONDS)
+                await connection.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(
+                "Listener de invalidação desconectado (nova tentativa em %ss): %s",
+                config.CACHE_NOTIFY_RECONNECT_SECONDS, e
+            )
+        finally:
+            set_invalidation_listening(False)
+            if connection is not None and not connection.is_closed():
+                try:
+                    await connection.close(timeout=1)
+                except Exception:
+                    connection.terminate()
+        await asyncio.sleep(config.CACHE_NOTIFY_RECONNECT_SECONDS)
+
+
+def start_listener() -> None:
+    """Inicia o listener em segundo plano (chamado no startup/lifespan)."""
+    global _listener_task
+    if not config.CACHE_NOTIFY_ENABLED or _listener_task is not None:
+        return
+    _listener_task = asyncio.get_running_loop().create_task(_listen_forever())
+
+
+async def stop_listener() -> None:
+    """Encerra o listener (chamado no shutdown/lifespan)."""
+    global _listener_task
+    if _listener_task is None:
+        return
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
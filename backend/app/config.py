@@ -18,8 +18,123 @@ ALGORITHM = os.getenv('ALGORITHM', 'HS256')
 # Lê o tempo de expiração do ambiente, ou usa 30 minutos como padrão
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', 30))
 
+# Tempo de expiração do refresh token em dias (renova o access token sem senha)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', 7))
+
 # --- Configurações do Redis (Adicionadas) ---
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_DB = int(os.getenv('REDIS_DB', 0))
 
+# Pool de conexões compartilhado (um por worker, criado no lifespan)
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+# Timeouts (em segundos) de conexão e de cada comando: o cache não pode
+# deixar uma requisição mais lenta do que ir direto ao DB.
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.5))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30))
+# Circuit breaker: após N falhas seguidas, pula o Redis por X segundos
+REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv('REDIS_BREAKER_FAILURE_THRESHOLD', 5))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv('REDIS_BREAKER_RESET_SECONDS', 10))
+
+
+# --- Cache do usuário autenticado (get_current_user) ---
+# L2 (Redis): tempo de vida do principal do usuário
+USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', 300))
+# L1 (memória do processo): TTL curto, pois outros workers não são avisados
+USER_CACHE_L1_TTL_SECONDS = int(os.getenv('USER_CACHE_L1_TTL_SECONDS', 30))
+USER_CACHE_L1_MAXSIZE = int(os.getenv('USER_CACHE_L1_MAXSIZE', 1024))
+
+# --- Hash de senhas (argon2) ---
+# Workers do pool de hash e limite de verificações simultâneas (padrão: nº de CPUs)
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+# Parâmetros do argon2 (0 = usa o padrão da biblioteca).
+# Ao alterá-los, os hashes antigos são refeitos no próximo login.
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 0))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 0))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 0))
+
+# --- Cache de JWTs já verificados (por worker) ---
+JWT_CACHE_MAXSIZE = int(os.getenv('JWT_CACHE_MAXSIZE', 4096))
+
+# --- Cache do catálogo (equipamentos) ---
+# L2 (Redis) e L1 (memória do processo) guardam o JSON já serializado.
+# Stale-while-revalidate: até o TTL "soft" o valor é fresco; entre o soft e
+# o teto (hard) ele é servido na hora e renovado em segundo plano; depois
+# do teto, a requisição espera a reconstrução.
+CATALOGO_CACHE_TTL_SECONDS = int(os.getenv('CATALOGO_CACHE_TTL_SECONDS', 3600))
+CATALOGO_CACHE_HARD_TTL_SECONDS = int(os.getenv('CATALOGO_CACHE_HARD_TTL_SECONDS', 86400))
+# Uma entrada por combinação de filtros/página
+CATALOGO_L1_MAXSIZE = int(os.getenv('CATALOGO_L1_MAXSIZE', 256))
+# Janela (em segundos) em que o L1 é servido sem consultar a versão no Redis
+# (0 = sempre consulta). É o atraso máximo para ver uma invalidação de outro worker.
+CATALOGO_VERSION_CHECK_SECONDS = float(os.getenv('CATALOGO_VERSION_CHECK_SECONDS', 2))
+
+# --- Singleflight (uma reconstrução por chave em cache MISS) ---
+# Lease do lock no Redis: deve cobrir a reconstrução mais lenta esperada
+SINGLEFLIGHT_LOCK_LEASE_SECONDS = float(os.getenv('SINGLEFLIGHT_LOCK_LEASE_SECONDS', 10))
+# Quanto um worker sem o lock espera o valor aparecer antes de reconstruir sozinho
+SINGLEFLIGHT_WAIT_SECONDS = float(os.getenv('SINGLEFLIGHT_WAIT_SECONDS', 5))
+SINGLEFLIGHT_POLL_SECONDS = float(os.getenv('SINGLEFLIGHT_POLL_SECONDS', 0.05))
+
+# --- Cache dos dashboards (stale-while-revalidate, como o catálogo) ---
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv('DASHBOARD_CACHE_TTL_SECONDS', 60))
+DASHBOARD_CACHE_HARD_TTL_SECONDS = int(os.getenv('DASHBOARD_CACHE_HARD_TTL_SECONDS', 900))
+DASHBOARD_L1_MAXSIZE = int(os.getenv('DASHBOARD_L1_MAXSIZE', 256))
+
+# --- Invalidação de cache entre workers (Postgres LISTEN/NOTIFY, app/cache_events.py) ---
+CACHE_NOTIFY_ENABLED = os.getenv('CACHE_NOTIFY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CACHE_NOTIFY_CHANNEL = os.getenv('CACHE_NOTIFY_CHANNEL', 'cache_invalidation')
+CACHE_NOTIFY_RECONNECT_SECONDS = float(os.getenv('CACHE_NOTIFY_RECONNECT_SECONDS', 5))
+CACHE_NOTIFY_HEALTH_CHECK_SECONDS = float(os.getenv('CACHE_NOTIFY_HEALTH_CHECK_SECONDS', 30))
+# Com o listener conectado, as versões do catálogo/tags são reconsultadas no
+# Redis no máximo a cada N segundos (os avisos descartam o L1 na hora)
+CACHE_NOTIFY_VERSION_CHECK_SECONDS = float(os.getenv('CACHE_NOTIFY_VERSION_CHECK_SECONDS', 30))
+
+# --- Warm-up no startup (app/warmup.py; também disponível como CLI) ---
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Tempo máximo que o startup espera pelo warm-up (o restante segue em segundo plano)
+WARMUP_DEADLINE_SECONDS = float(os.getenv('WARMUP_DEADLINE_SECONDS', 10))
+# Conexões abertas de antemão (acima do pool_size do SQLAlchemy, 5 por padrão, não ficam no pool)
+WARMUP_DB_CONNECTIONS = int(os.getenv('WARMUP_DB_CONNECTIONS', 5))
+WARMUP_REDIS_CONNECTIONS = int(os.getenv('WARMUP_REDIS_CONNECTIONS', 10))
+
+# --- Paginação de clientes (keyset) ---
+CLIENTES_PAGE_SIZE = int(os.getenv('CLIENTES_PAGE_SIZE', 50))
+CLIENTES_MAX_PAGE_SIZE = int(os.getenv('CLIENTES_MAX_PAGE_SIZE', 200))
+# Busca ranqueada (pg_trgm): máximo de resultados da busca e do autocomplete
+CLIENTES_SEARCH_LIMIT = int(os.getenv('CLIENTES_SEARCH_LIMIT', 50))
+CLIENTES_AUTOCOMPLETE_LIMIT = int(os.getenv('CLIENTES_AUTOCOMPLETE_LIMIT', 10))
+# Importação em massa (CSV/XLSX): linhas por bloco (uma transação cada) e
+# máximo de erros detalhados no relatório
+CLIENTES_IMPORT_CHUNK_SIZE = int(os.getenv('CLIENTES_IMPORT_CHUNK_SIZE', 1000))
+CLIENTES_IMPORT_MAX_ERRORS = int(os.getenv('CLIENTES_IMPORT_MAX_ERRORS', 1000))
+# Exclusão em massa: ids por DELETE (uma transação cada)
+CLIENTES_DELETE_BATCH_SIZE = int(os.getenv('CLIENTES_DELETE_BATCH_SIZE', 500))
+# Detecção de duplicados (app/core/clientes/duplicados.py)
+# Semelhança mínima (pg_trgm) para dois nomes caírem no mesmo bloco
+DUPLICADOS_NOME_SIMILARIDADE = float(os.getenv('DUPLICADOS_NOME_SIMILARIDADE', 0.6))
+# Score mínimo (0 a 1) para o par ir para a revisão
+DUPLICADOS_SCORE_MIN = float(os.getenv('DUPLICADOS_SCORE_MIN', 0.5))
+# Telefones/emails compartilhados por mais clientes que isso (ex: "00000000",
+# email genérico) não formam bloco nem contam no score: seriam pares O(n²)
+DUPLICADOS_BLOCO_MAX = int(os.getenv('DUPLICADOS_BLOCO_MAX', 20))
+
+# --- Listagem resumida de propostas (keyset por id) ---
+PROPOSTAS_PAGE_SIZE = int(os.getenv('PROPOSTAS_PAGE_SIZE', 50))
+PROPOSTAS_MAX_PAGE_SIZE = int(os.getenv('PROPOSTAS_MAX_PAGE_SIZE', 200))
+
+# --- Exportações em streaming (app/exports.py) ---
+# Linhas buscadas por vez no cursor do servidor e tamanho de cada bloco enviado
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+EXPORT_FLUSH_BYTES = int(os.getenv('EXPORT_FLUSH_BYTES', 64 * 1024))
+
+# --- Cache de funções de serviço (decorator @cached, app/service_cache.py) ---
+SERVICE_CACHE_TTL_SECONDS = int(os.getenv('SERVICE_CACHE_TTL_SECONDS', 600))
+# Variação relativa do TTL (0.1 = ±10%) para as entradas não expirarem juntas
+SERVICE_CACHE_JITTER = float(os.getenv('SERVICE_CACHE_JITTER', 0.1))
+# L1 por worker: TTL curto, limita o atraso para ver invalidações de outros workers
+SERVICE_CACHE_L1_TTL_SECONDS = int(os.getenv('SERVICE_CACHE_L1_TTL_SECONDS', 30))
+SERVICE_CACHE_L1_MAXSIZE = int(os.getenv('SERVICE_CACHE_L1_MAXSIZE', 512))
+# Janela em que as versões das tags são reaproveitadas sem consultar o Redis
+SERVICE_CACHE_TAG_CHECK_SECONDS = float(os.getenv('SERVICE_CACHE_TAG_CHECK_SECONDS', 2))
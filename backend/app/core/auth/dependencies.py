@@ -1,42 +1,75 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as aioredis
 from app.db import get_db
-from app.core.users import services as user_services, models
+from app.cache import get_redis_client
+from app.core.users import services as user_services, models, schema as user_schema
+from app.core.users import cache as user_cache
 from . import services as auth_services # O arquivo que acabamos de criar
+from .schema import TokenPrincipal
 
 # 1. Define o esquema de autenticação (espera um "Bearer Token")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login") # Aponta para o seu endpoint de login
 
-# 2. DEPENDÊNCIA BASE: Pega o usuário logado (Autenticação)
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), 
-    db: AsyncSession = Depends(get_db)
-) -> models.User:
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Não foi possível validar as credenciais",
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Não foi possível validar as credenciais",
+)
+
+# 2. DEPENDÊNCIA BASE: Valida o token e monta o principal (Autenticação)
+#    Usa apenas as claims (id, role, versão) do token. A assinatura de um token
+#    já visto sai do cache; a versão (revogação) é conferida no Redis a cada
+#    requisição, e o DB só é consultado se a versão não estiver no Redis.
+#    Use nas rotas que só precisam do 'id' ou do 'role'.
+async def get_token_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+) -> TokenPrincipal:
     
     payload = auth_services.decode_access_token(token)
     if payload is None:
         raise credentials_exception
-        
-    email: str = payload.get("sub")
-    if email is None:
+
+    principal = auth_services.principal_from_payload(payload)
+    if principal is None:
+        raise credentials_exception
+
+    # Logout ou mudança de role/senha incrementam a versão: tokens antigos caem aqui
+    if not await auth_services.is_token_version_current(principal, db, redis_client):
         raise credentials_exception
+
+    return principal
+
+# 3. DEPENDÊNCIA DE PERFIL: Pega os dados do usuário logado (nome, email...)
+#    O principal vem do cache (L1 em memória -> L2 Redis); o SELECT em 'users'
+#    só acontece em caso de MISS. A sessão do DB é preguiçosa: sem query, sem conexão.
+#    Use apenas nas rotas que realmente precisam dos dados de perfil.
+async def get_current_user(
+    token_principal: TokenPrincipal = Depends(get_token_principal),
+    db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+) -> user_schema.UserPrincipal:
     
+    email = token_principal.sub
+    
+    principal = await user_cache.get_cached_user(email, redis_client)
+    if principal is not None:
+        return principal
+
     user = await user_services.get_user_by_email(email, db)
     if user is None:
         raise credentials_exception
-        
-    return user # Retorna o objeto User completo
 
-# 3. DEPENDÊNCIA DE REGRA: Exige ser GESTOR (Autorização)
+    principal = user_schema.UserPrincipal.model_validate(user)
+    await user_cache.set_cached_user(principal, redis_client)
+    return principal # Retorna o principal (id, name, email, role)
+
+# 4. DEPENDÊNCIA DE REGRA: Exige ser GESTOR (Autorização, sem DB)
 def get_current_gestor(
-    current_user: models.User = Depends(get_current_user)
-) -> models.User:
+    current_user: TokenPrincipal = Depends(get_token_principal)
+) -> TokenPrincipal:
     
     if current_user.role != models.UserRole.GESTOR:
         raise HTTPException(
@@ -45,10 +78,10 @@ def get_current_gestor(
         )
     return current_user
 
-# 4. DEPENDÊNCIA DE REGRA: Exige ser VENDEDOR (Autorização)
+# 5. DEPENDÊNCIA DE REGRA: Exige ser VENDEDOR (Autorização, sem DB)
 def get_current_vendedor(
-    current_user: models.User = Depends(get_current_user)
-) -> models.User:
+    current_user: TokenPrincipal = Depends(get_token_principal)
+) -> TokenPrincipal:
     
     if current_user.role != models.UserRole.VENDEDOR:
         raise HTTPException(
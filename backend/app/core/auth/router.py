@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as aioredis
 from app.db import get_db
+from app.cache import get_redis_client
 from app.core.users import services as user_services
 from . import services as auth_services # <-- (Veja o arquivo 2)
+from .dependencies import get_token_principal
+from .schema import TokenPrincipal, Token, RefreshTokenRequest
 
 router = APIRouter(tags=['Authentication'], prefix='/auth')
 
-@router.post('/login')
+@router.post('/login', response_model=Token)
 async def login_for_access_token(
     db: AsyncSession = Depends(get_db),
     # 'OAuth2PasswordRequestForm' força o body a ser 'username' e 'password'
@@ -17,16 +21,86 @@ async def login_for_access_token(
     user = await user_services.get_user_by_email(form_data.username, db)
 
     # 2. Verifica se o usuário existe E se a senha está correta
-    if not user or not user.check_password(form_data.password):
+    #    (argon2 roda no pool limitado, sem bloquear o event loop)
+    if not user or not await user_services.check_password_and_rehash(user, form_data.password, db):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # 3. Cria o token JWT (passando o 'email' e o 'role' para o token)
-    access_token = auth_services.create_access_token(
-        data={"sub": user.email, "role": str(user.role.value)} 
+    # 3. Cria os tokens JWT (email, id, role e versão do token vão nas claims)
+    #    O refresh token permite renovar o access token sem repetir o argon2.
+    return auth_services.create_token_pair(auth_services.build_token_claims(user))
+
+
+@router.post('/refresh', response_model=Token)
+async def refresh_access_token(
+    request: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+):
+    '''
+    Troca um refresh token válido por um novo par de tokens (rotação).
+    Custo: verificação da assinatura + um SET NX no Redis (+ um GET da versão).
+    Nenhum hash de senha é calculado.
+    '''
+    invalid_token_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido ou expirado",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+
+    payload = auth_services.decode_refresh_token(request.refresh_token)
+    principal = auth_services.principal_from_payload(payload) if payload else None
+    if principal is None:
+        raise invalid_token_exception
+
+    # Sessões revogadas (logout, mudança de role/senha) incrementam a versão
+    if not await auth_services.is_token_version_current(principal, db, redis_client):
+        raise invalid_token_exception
+
+    # Revoga o refresh token usado; se ele já estava revogado, é reuso
+    try:
+        consumed = await auth_services.consume_refresh_token(payload, redis_client)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Não foi possível renovar a sessão no momento. Tente novamente."
+        )
+    if not consumed:
+        raise invalid_token_exception
+
+    return auth_services.create_token_pair(auth_services.identity_claims(payload))
+
+
+@router.post('/revoke', status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_refresh_token(
+    request: RefreshTokenRequest,
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+):
+    '''Revoga um único refresh token (ex: logout apenas deste dispositivo)'''
+    payload = auth_services.decode_refresh_token(request.refresh_token)
+    if payload is not None:
+        try:
+            await auth_services.consume_refresh_token(payload, redis_client)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Não foi possível revogar o token no momento. Tente novamente."
+            )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client),
+    current_user: TokenPrincipal = Depends(get_token_principal)
+):
+    '''
+    Encerra TODAS as sessões do usuário (access e refresh tokens) com uma
+    única escrita: incrementa a versão dos tokens.
+    '''
+    await auth_services.bump_token_version(current_user.id, db, redis_client)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
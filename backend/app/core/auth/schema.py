@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict
+from app.core.users.models import UserRole
+
+# Principal leve, montado SOMENTE a partir das claims validadas do token.
+# Suficiente para checagens de role e para filtrar por 'id' (sem ir ao DB).
+class TokenPrincipal(BaseModel):
+    id: int
+    sub: str # O email do usuário (claim "sub")
+    role: UserRole
+    token_version: int = 0
+
+    model_config = ConfigDict(frozen=True)
+
+
+# --- Schemas dos endpoints de token ---
+
+class Token(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
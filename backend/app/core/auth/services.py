@@ -1,15 +1,45 @@
+import hashlib
+import logging
+import time
+import uuid
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-# Remova a importação de User se não for usada diretamente aqui
-# from app.core.users.models import User
-
+from typing import Optional
+from pydantic import ValidationError
+import redis.asyncio as aioredis
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 # --- Importe a configuração ---
 from app import config as app_config
+from app.cache import TTLCache
+from app.core.users.models import User
+from .schema import TokenPrincipal
+
+logger = logging.getLogger(__name__)
 
 # --- Use as variáveis importadas ---
 SECRET_KEY = app_config.SECRET_KEY
 ALGORITHM = app_config.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = app_config.ACCESS_TOKEN_EXPIRE_MINUTES
+REFRESH_TOKEN_EXPIRE_DAYS = app_config.REFRESH_TOKEN_EXPIRE_DAYS
+
+# Claim "type" separa os dois tipos de token assinados com a mesma chave
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# --- Cache de tokens já verificados ---
+# Chave: digest SHA-256 do token; valor: payload decodificado.
+# Cada entrada expira junto com o "exp" do próprio token. O cache é por
+# worker e guarda apenas o resultado da verificação da assinatura: a
+# revogação é sempre conferida no Redis (ver 'is_token_version_current').
+_verified_tokens = TTLCache(maxsize=app_config.JWT_CACHE_MAXSIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# --- Versão dos tokens por usuário (revogação) ---
+TOKEN_VERSION_KEY_PREFIX = "auth:token_version:"
+
+# --- Refresh tokens revogados (uma chave por jti, expira junto com o token) ---
+REFRESH_REVOKED_KEY_PREFIX = "auth:refresh_revoked:"
 
 def create_access_token(data: dict):
     '''Cria um novo token JWT'''
@@ -18,18 +48,190 @@ def create_access_token(data: dict):
     # Define o tempo de expiração
     # Use ACCESS_TOKEN_EXPIRE_MINUTES importado
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": ACCESS_TOKEN_TYPE})
 
     # Cria o token
     # Use SECRET_KEY e ALGORITHM importados
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
 def decode_access_token(token: str) -> dict | None:
-    '''Decodifica um token, retornando o payload (os dados) se for válido'''
+    '''
+    Decodifica um token, retornando o payload (os dados) se for válido.
+    O payload de um token já verificado é reaproveitado até o seu "exp".
+    '''
+    digest = _token_digest(token)
+    payload = _verified_tokens.get(digest)
+    if payload is not None:
+        return payload
+
     try:
         # Use SECRET_KEY e ALGORITHM importados
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+    # Um refresh token não pode ser usado como access token
+    if payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+        return None
+
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        _verified_tokens.set(digest, payload, ttl=ttl)
+    return payload
+
+def create_refresh_token(data: dict) -> str:
+    '''Cria um refresh token (longa duração, com "jti" para revogação)'''
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({
+        "exp": expire,
+        "type": REFRESH_TOKEN_TYPE,
+        "jti": uuid.uuid4().hex,
+    })
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_refresh_token(token: str) -> dict | None:
+    '''Decodifica um refresh token (assinatura, "exp" e "type"), sem cache'''
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+    if payload.get("type") != REFRESH_TOKEN_TYPE or not payload.get("jti"):
+        return None
+    return payload
+
+def create_token_pair(claims: dict) -> dict:
+    '''Emite um novo par access + refresh com as mesmas claims de identidade'''
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(claims),
+        "token_type": "bearer",
+    }
+
+def build_token_claims(user: User) -> dict:
+    '''Monta as claims do token a partir do usuário (sub, uid, role, ver)'''
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": str(user.role.value),
+        "ver": user.token_version or 0,
+    }
+
+def principal_from_payload(payload: dict) -> Optional[TokenPrincipal]:
+    '''Monta o TokenPrincipal a partir de um payload já validado (sem DB)'''
+    try:
+        return TokenPrincipal(
+            id=payload["uid"],
+            sub=payload["sub"],
+            role=payload["role"],
+            token_version=payload.get("ver", 0),
+        )
+    except (KeyError, ValidationError):
+        # Tokens antigos (sem "uid") ou com claims inválidas
+        return None
+
+
+# --- Versão dos tokens (revogação de sessões) ---
+
+def _token_version_key(user_id: int) -> str:
+    return f"{TOKEN_VERSION_KEY_PREFIX}{user_id}"
+
+async def get_token_version(
+    user_id: int, 
+    db: AsyncSession, 
+    redis_client: aioredis.Redis
+) -> Optional[int]:
+    '''
+    Retorna a versão atual dos tokens do usuário.
+    Lê do Redis; em caso de MISS (ou falha) busca no DB e repopula o Redis.
+    Retorna None se o usuário não existir mais.
+    '''
+    try:
+        cached_version = await redis_client.get(_token_version_key(user_id))
+        if cached_version is not None:
+            return int(cached_version)
+    except Exception as e:
+        logger.warning("Erro ao ler versão do token no Redis (seguindo para o DB): %s", e)
+
+    query = select(User.token_version).where(User.id == user_id)
+    version = (await db.execute(query)).scalar_one_or_none()
+    if version is None:
+        return None
+
+    # nx=True: não sobrescreve uma versão mais nova gravada por um 'bump' concorrente
+    await publish_token_version(user_id, version, redis_client, only_if_missing=True)
+    return version
+
+async def is_token_version_current(
+    principal: TokenPrincipal, 
+    db: AsyncSession, 
+    redis_client: aioredis.Redis
+) -> bool:
+    '''Um token só é aceito se a sua claim "ver" for a versão atual do usuário'''
+    current_version = await get_token_version(principal.id, db, redis_client)
+    return current_version is not None and current_version == principal.token_version
+
+async def publish_token_version(
+    user_id: int, 
+    version: int, 
+    redis_client: aioredis.Redis,
+    only_if_missing: bool = False
+) -> None:
+    '''Grava a versão dos tokens do usuário no Redis (fonte consultada a cada requisição)'''
+    try:
+        await redis_client.set(_token_version_key(user_id), version, nx=only_if_missing)
+    except Exception as e:
+        logger.error("Erro ao gravar versão do token no Redis (revogação pode atrasar): %s", e)
+
+async def forget_token_version(user_id: int, redis_client: aioredis.Redis) -> None:
+    '''Remove a versão do Redis (ex: usuário deletado)'''
+    try:
+        await redis_client.delete(_token_version_key(user_id))
+    except Exception as e:
+        logger.warning("Erro ao remover versão do token no Redis: %s", e)
+
+async def bump_token_version(
+    user_id: int, 
+    db: AsyncSession, 
+    redis_client: aioredis.Redis
+) -> Optional[int]:
+    '''
+    Incrementa a versão dos tokens do usuário, invalidando TODAS as
+    sessões emitidas antes (uma única escrita no DB + uma no Redis).
+    '''
+    query = (
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+        .returning(User.token_version)
+    )
+    new_version = (await db.execute(query)).scalar_one_or_none()
+    await db.commit()
+
+    if new_version is not None:
+        await publish_token_version(user_id, new_version, redis_client)
+    return new_version
+
+
+
+# --- Refresh tokens (rotação e revogação) ---
+
+def identity_claims(payload: dict) -> dict:
+    '''Extrai de um payload as claims de identidade (sub, uid, role, ver)'''
+    return {key: payload[key] for key in ("sub", "uid", "role", "ver") if key in payload}
+
+async def consume_refresh_token(payload: dict, redis_client: aioredis.Redis) -> bool:
+    '''
+    Revoga o refresh token (pelo "jti") e informa se ele ainda era válido.
+    É um único SET NX com TTL até o "exp": O(1), atômico e sem limpeza manual.
+    Retorna False se o token já tinha sido usado ou revogado (reuso).
+    Erros do Redis são propagados: sem o Redis não há como garantir a revogação.
+    '''
+    ttl = max(int(payload["exp"] - time.time()), 1)
+    key = f"{REFRESH_REVOKED_KEY_PREFIX}{payload['jti']}"
+    return bool(await redis_client.set(key, 1, ex=ttl, nx=True))
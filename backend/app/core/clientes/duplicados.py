@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+
+from app import config
+from app.db import async_session, engine
+from app.core.sales.propostas.models import Proposta
+from app.core.sales.projetos.models import Projeto
+from . import models
+from .services import invalidar_caches_clientes
+
+logger = logging.getLogger(__name__)
+
+# --- Detecção de clientes duplicados (job em segundo plano) ---
+#
+# Comparar todos os clientes com todos é O(n²). Em vez disso, só viram
+# candidatos os pares que caem no mesmo "bloco":
+#   - mesmo telefone normalizado (apenas dígitos, 8+);
+#   - mesmo email (sem maiúsculas/espaços);
+#   - nomes semelhantes (operador '%' do pg_trgm, pelo índice GIN
+#     ix_clientes_nome_trgm: cada cliente sonda o índice, sem varrer a tabela).
+# As chaves de telefone/email são calculadas uma vez por cliente (uma
+# leitura da tabela) e os blocos saem de um hash join nelas, sem índice de
+# expressão. Blocos maiores que DUPLICADOS_BLOCO_MAX (telefone de
+# preenchimento, email genérico) são ignorados: gerariam pares O(n²) e não
+# indicam o mesmo cliente.
+# Cada par candidato recebe um score (semelhança do nome + telefone + email)
+# e, acima de DUPLICADOS_SCORE_MIN, vai para 'clientes_duplicados' para
+# revisão. Pares descartados não voltam a ser sugeridos; ao mesclar, o
+# cliente absorvido é excluído e as sugestões com ele somem em cascata.
+#
+# Roda pelo endpoint POST /clientes/duplicados/detectar ou como CLI:
+#     python -m app.core.clientes.duplicados
+
+# Pesos do score (limitado a 1)
+PESO_NOME = 0.6
+PESO_TELEFONE = 0.4
+PESO_EMAIL = 0.4
+
+_DETECTAR_SQL = """
+WITH normalizados AS (
+    SELECT
+        id,
+        nullif(regexp_replace(coalesce(telefone, ''), '\\D', '', 'g'), '') AS telefone,
+        nullif(lower(trim(email)), '') AS email
+    FROM clientes
+),
+chaves AS (
+    SELECT
+        id,
+        CASE WHEN length(telefone) >= 8 THEN telefone END AS telefone,
+        email,
+        count(*) OVER (PARTITION BY CASE WHEN length(telefone) >= 8 THEN telefone END) AS tam_telefone,
+        count(*) OVER (PARTITION BY email) AS tam_email
+    FROM normalizados
+),
+pares AS (
+    SELECT a.id AS a_id, b.id AS b_id
+    FROM chaves a
+    JOIN chaves b ON a.telefone = b.telefone AND a.id < b.id
+    WHERE a.tam_telefone <= CAST(:bloco_max AS integer)
+    UNION
+    SELECT a.id, b.id
+    FROM chaves a
+    JOIN chaves b ON a.email = b.email AND a.id < b.id
+    WHERE a.tam_email <= CAST(:bloco_max AS integer)
+    UNION
+    SELECT a.id, b.id
+    FROM clientes a
+    JOIN clientes b ON a.nome_razao_social % b.nome_razao_social AND a.id < b.id
+),
+pontuados AS (
+    SELECT
+        p.a_id,
+        p.b_id,
+        similarity(a.nome_razao_social, b.nome_razao_social) AS sim_nome,
+        coalesce(ka.telefone = kb.telefone AND ka.tam_telefone <= CAST(:bloco_max AS integer), false) AS mesmo_telefone,
+        coalesce(ka.email = kb.email AND ka.tam_email <= CAST(:bloco_max AS integer), false) AS mesmo_email
+    FROM pares p
+    JOIN clientes a ON a.id = p.a_id
+    JOIN clientes b ON b.id = p.b_id
+    JOIN chaves ka ON ka.id = p.a_id
+    JOIN chaves kb ON kb.id = p.b_id
+),
+candidatos AS (
+    SELECT
+        a_id,
+        b_id,
+        least(1.0,
+              CAST(:peso_nome AS float) * sim_nome
+              + CASE WHEN mesmo_telefone THEN CAST(:peso_telefone AS float) ELSE 0 END
+              + CASE WHEN mesmo_email THEN CAST(:peso_email AS float) ELSE 0 END) AS score,
+        array_remove(ARRAY[
+            CASE WHEN sim_nome >= CAST(:similaridade AS float) THEN 'nome' END,
+            CASE WHEN mesmo_telefone THEN 'telefone' END,
+            CASE WHEN mesmo_email THEN 'email' END
+        ], NULL) AS motivos
+    FROM pontuados
+)
+INSERT INTO clientes_duplicados (cliente_a_id, cliente_b_id, score, motivos, status)
+SELECT a_id, b_id, score, to_json(motivos), 'PENDENTE'
+FROM candidatos
+WHERE score >= CAST(:score_min AS float)
+ON CONFLICT (cliente_a_id, cliente_b_id) DO UPDATE
+    SET score = EXCLUDED.score, motivos = EXCLUDED.motivos
+    WHERE clientes_duplicados.status = 'PENDENTE'
+"""
+
+_job_task: Optional[asyncio.Task] = None
+
+
+async def detectar_duplicados(db: AsyncSession) -> Optional[int]:
+    """
+    Recalcula as sugestões de duplicados (uma transação).
+    Retorna quantos pares foram inseridos/atualizados, ou None se outra
+    detecção já estiver rodando (em qualquer worker).
+    """
+    started = time.perf_counter()
+    # Lock transacional: só uma detecção por vez, liberado no commit
+    got_lock = (await db.execute(
+        text("SELECT pg_try_advisory_xact_lock(hashtext('clientes_duplicados'))")
+    )).scalar()
+    if not got_lock:
+        await db.rollback()
+        return None
+
+    # Limiar do operador '%' (apenas nesta transação)
+    await db.execute(
+        text("SELECT set_config('pg_trgm.similarity_threshold', :v, true)"),
+        {"v": str(config.DUPLICADOS_NOME_SIMILARIDADE)}
+    )
+    result = await db.execute(text(_DETECTAR_SQL), {
+        "peso_nome": PESO_NOME,
+        "peso_telefone": PESO_TELEFONE,
+        "peso_email": PESO_EMAIL,
+        "similaridade": config.DUPLICADOS_NOME_SIMILARIDADE,
+        "score_min": config.DUPLICADOS_SCORE_MIN,
+        "bloco_max": config.DUPLICADOS_BLOCO_MAX,
+    })
+    await db.commit()
+    logger.info(
+        "Detecção de duplicados: %s pares em %.1f ms.",
+        result.rowcount, (time.perf_counter() - started) * 1000
+    )
+    return result.rowcount
+
+
+async def _run_job() -> None:
+    try:
+        async with async_session() as db:
+            if await detectar_duplicados(db) is None:
+                logger.info("Detecção de duplicados já em andamento em outro worker.")
+    except Exception as e:
+        logger.error("Erro na detecção de duplicados: %s", e)
+
+
+def iniciar_deteccao() -> bool:
+    """Agenda a detecção em segundo plano. False se já houver uma neste worker."""
+    global _job_task
+    if _job_task is not None and not _job_task.done():
+        return False
+    _job_task = asyncio.get_running_loop().create_task(_run_job())
+    return True
+
+
+# --- Revisão ---
+
+async def listar_duplicados(
+    db: AsyncSession,
+    status: models.DuplicataStatus = models.DuplicataStatus.PENDENTE,
+    limit: int = 50
+) -> List[models.ClienteDuplicado]:
+    """Pares para revisão, os mais prováveis primeiro, com os dois clientes."""
+    query = (
+        select(models.ClienteDuplicado)
+        .where(models.ClienteDuplicado.status == status)
+        .options(
+            joinedload(models.ClienteDuplicado.cliente_a),
+            joinedload(models.ClienteDuplicado.cliente_b)
+        )
+        .order_by(models.ClienteDuplicado.score.desc(), models.ClienteDuplicado.id)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def get_duplicado(db: AsyncSession, duplicado_id: int) -> Optional[models.ClienteDuplicado]:
+    query = (
+        select(models.ClienteDuplicado)
+        .where(models.ClienteDuplicado.id == duplicado_id)
+        .options(
+            joinedload(models.ClienteDuplicado.cliente_a),
+            joinedload(models.ClienteDuplicado.cliente_b)
+        )
+    )
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def descartar_duplicado(db: AsyncSession, duplicado: models.ClienteDuplicado) -> models.ClienteDuplicado:
+    """Marca o par como 'não é duplicado' (a detecção não o sugere de novo)."""
+    duplicado.status = models.DuplicataStatus.DESCARTADO
+    duplicado.data_revisao = datetime.now(timezone.utc)
+    await db.commit()
+    return duplicado
+
+
+async def mesclar_duplicado(
+    db: AsyncSession,
+    duplicado: models.ClienteDuplicado,
+    manter_id: int
+) -> models.Cliente:
+    """
+    Une os dois cadastros em 'manter_id': propostas e projetos do outro
+    cliente passam para ele, campos vazios são completados com os do outro
+    e o outro cliente é excluído (as sugestões com ele somem em cascata).
+    ValueError se 'manter_id' não for um dos dois clientes do par.
+    """
+    if manter_id not in (duplicado.cliente_a_id, duplicado.cliente_b_id):
+        raise ValueError("O cliente mantido deve ser um dos dois clientes do par.")
+    remover_id = duplicado.cliente_b_id if manter_id == duplicado.cliente_a_id else duplicado.cliente_a_id
+
+    # Trava os dois cadastros até o fim da mescla
+    query = (
+        select(models.Cliente)
+        .where(models.Cliente.id.in_([manter_id, remover_id]))
+        .with_for_update()
+    )
+    clientes = {c.id: c for c in (await db.execute(query)).scalars().all()}
+    mantido, removido = clientes.get(manter_id), clientes.get(remover_id)
+    if mantido is None or removido is None:
+        raise ValueError("Um dos clientes do par não existe mais.")
+
+    await db.execute(
+        update(Proposta).where(Proposta.cliente_id == remover_id).values(cliente_id=manter_id)
+    )
+    await db.execute(
+        update(Projeto).where(Projeto.cliente_id == remover_id).values(cliente_id=manter_id)
+    )
+    for campo in ("email", "telefone", "endereco"):
+        if not getattr(mantido, campo) and getattr(removido, campo):
+            setattr(mantido, campo, getattr(removido, campo))
+
+    # ON DELETE CASCADE: o par (e outras sugestões com o removido) sai junto
+    await db.execute(delete(models.Cliente).where(models.Cliente.id == remover_id))
+    await db.commit()
+    await db.refresh(mantido)
+    await invalidar_caches_clientes(db, "clientes", "propostas", "projetos")
+    logger.info("Clientes mesclados: %s absorveu %s.", manter_id, remover_id)
+    return mantido
+
+
+# --- CLI ---
+
+async def _main() -> int:
+    try:
+        async with async_session() as db:
+            pares = await detectar_duplicados(db)
+    finally:
+        await engine.dispose()
+    if pares is None:
+        print("Outra detecção de duplicados já está em andamento.")
+        return 1
+    print(f"Detecção de duplicados concluída: {pares} pares para revisão.")
+    return 0
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Detecta possíveis clientes duplicados do SunOps.").parse_args()
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(asyncio.run(_main()))
@@ -0,0 +1,302 @@
+import asyncio
+import codecs
+import csv
+import itertools
+import logging
+from typing import Dict, Iterator, List, Optional, Set
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+try:
+    import openpyxl  # Opcional: sem ele, apenas CSV é aceito
+except ImportError:
+    openpyxl = None
+
+from app import config
+from . import models, schema
+
+logger = logging.getLogger(__name__)
+
+# --- Importação de clientes em massa (CSV / XLSX) ---
+#
+# O arquivo é lido em blocos de CLIENTES_IMPORT_CHUNK_SIZE linhas (nunca
+# inteiro na memória). Para cada bloco:
+#   1. cada linha é validada com o schema ClienteCreate (erros por linha);
+#   2. os documentos repetidos no próprio arquivo são descartados e os já
+#      cadastrados são encontrados com UMA consulta (documento_normalizado IN ...);
+#   3. as linhas válidas entram via COPY (asyncpg) numa tabela temporária e
+#      passam para 'clientes' com INSERT ... SELECT ... ON CONFLICT DO NOTHING
+#      (o que uma escrita concorrente cadastrar no meio do caminho é ignorado).
+# Cada bloco é uma transação: um erro num bloco não desfaz os anteriores.
+
+# Cabeçalhos aceitos (minúsculos, sem espaços nas pontas) -> campo do schema
+COLUNAS = {
+    "nome_razao_social": "nome_razao_social",
+    "nome": "nome_razao_social",
+    "razao_social": "nome_razao_social",
+    "tipo": "tipo",
+    "documento": "documento",
+    "cpf_cnpj": "documento",
+    "cpf": "documento",
+    "cnpj": "documento",
+    "email": "email",
+    "e-mail": "email",
+    "telefone": "telefone",
+    "endereco": "endereco",
+    "endereço": "endereco",
+}
+
+TIPOS = {
+    "pessoa_fisica": models.TipoCliente.PESSOA_FISICA,
+    "pf": models.TipoCliente.PESSOA_FISICA,
+    "pessoa_juridica": models.TipoCliente.PESSOA_JURIDICA,
+    "pj": models.TipoCliente.PESSOA_JURIDICA,
+}
+
+STAGING_TABLE = "clientes_importacao"
+
+STAGING_COLUMNS = [
+    "linha", "nome_razao_social", "tipo", "documento",
+    "documento_normalizado", "email", "telefone", "endereco",
+]
+
+
+class FormatoInvalido(ValueError):
+    """Arquivo ilegível, sem as colunas obrigatórias ou de formato não suportado."""
+
+
+# --- Leitura (linha a linha) ---
+
+def _mapear_cabecalho(cabecalho: List[Optional[str]]) -> List[Optional[str]]:
+    campos = [COLUNAS.get(str(c or "").strip().lower()) for c in cabecalho]
+    faltando = {"nome_razao_social", "documento"} - set(campos)
+    if faltando:
+        raise FormatoInvalido(f"Colunas obrigatórias ausentes: {', '.join(sorted(faltando))}.")
+    return campos
+
+
+def _linhas(campos: List[Optional[str]], valores: Iterator[tuple]) -> Iterator[tuple]:
+    """Gera (número da linha no arquivo, {campo: valor}); linha 1 = cabeçalho."""
+    for numero, linha in enumerate(valores, start=2):
+        if not any(v not in (None, "") for v in linha):
+            continue # Linha em branco
+        yield numero, {
+            campo: (str(valor).strip() if valor is not None else None)
+            for campo, valor in zip(campos, linha)
+            if campo is not None
+        }
+
+
+def _decodificar_linhas(arquivo) -> Iterator[str]:
+    """
+    Linhas de texto (UTF-8, com ou sem BOM) de um arquivo binário, com o fim
+    de linha preservado para o csv. Sem io.TextIOWrapper: o
+    SpooledTemporaryFile do UploadFile não tem readable() no Python 3.10.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    for linha in arquivo:
+        yield decoder.decode(linha)
+    resto = decoder.decode(b"", final=True)
+    if resto:
+        yield resto
+
+
+def _ler_csv(arquivo) -> Iterator[tuple]:
+    try:
+        # Decodificação incremental: um caractere cortado no fim da amostra não é erro
+        amostra = codecs.getincrementaldecoder("utf-8-sig")().decode(arquivo.read(8192))
+    except UnicodeDecodeError:
+        raise FormatoInvalido("O CSV deve estar em UTF-8.")
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel # Exportações de CRM costumam usar ',' ou ';'
+    reader = csv.reader(_decodificar_linhas(arquivo), dialeto)
+    cabecalho = next(reader, None)
+    if cabecalho is None:
+        raise FormatoInvalido("Arquivo vazio.")
+    return _linhas(_mapear_cabecalho(cabecalho), reader)
+
+
+def _ler_xlsx(arquivo) -> Iterator[tuple]:
+    if openpyxl is None:
+        raise FormatoInvalido("Importação de XLSX indisponível (openpyxl não instalado). Envie um CSV.")
+    # read_only: lê a planilha em streaming, sem carregar todas as células
+    workbook = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    cabecalho = next(rows, None)
+    if cabecalho is None:
+        raise FormatoInvalido("Planilha vazia.")
+    return _linhas(_mapear_cabecalho(list(cabecalho)), rows)
+
+
+def abrir_arquivo(nome_arquivo: str, arquivo) -> Iterator[tuple]:
+    """Escolhe o leitor pela extensão do arquivo enviado."""
+    nome = (nome_arquivo or "").lower()
+    if nome.endswith(".csv"):
+        return _ler_csv(arquivo)
+    if nome.endswith(".xlsx"):
+        return _ler_xlsx(arquivo)
+    raise FormatoInvalido("Formato não suportado. Envie um arquivo .csv ou .xlsx.")
+
+
+# --- Validação ---
+
+_MAX_TELEFONE = models.Cliente.telefone.type.length
+_MAX_ENDERECO = models.Cliente.endereco.type.length
+
+
+def _validar(dados: Dict[str, Optional[str]]) -> tuple:
+    """Retorna (ClienteCreate, documento normalizado) ou levanta ValueError."""
+    dados = {k: v for k, v in dados.items() if v not in (None, "")}
+    # O tamanho (11 ou 14 dígitos) é validado pelo schema (schema.Documento)
+    digitos = schema.normalizar_documento(dados.get("documento", ""))
+
+    tipo = dados.get("tipo")
+    if tipo is None:
+        # Sem a coluna 'tipo', deduz pelo tamanho do documento
+        dados["tipo"] = models.TipoCliente.PESSOA_FISICA if len(digitos) == 11 else models.TipoCliente.PESSOA_JURIDICA
+    elif tipo.lower() in TIPOS:
+        dados["tipo"] = TIPOS[tipo.lower()]
+
+    try:
+        cliente = schema.ClienteCreate(**dados)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+        ))
+    if cliente.telefone and len(cliente.telefone) > _MAX_TELEFONE:
+        raise ValueError(f"telefone: máximo de {_MAX_TELEFONE} caracteres")
+    if cliente.endereco and len(cliente.endereco) > _MAX_ENDERECO:
+        raise ValueError(f"endereco: máximo de {_MAX_ENDERECO} caracteres")
+    return cliente, digitos
+
+
+# --- Carga (COPY + INSERT ... ON CONFLICT) ---
+
+async def _documentos_existentes(db: AsyncSession, documentos: List[str]) -> Set[str]:
+    query = select(models.Cliente.documento_normalizado).where(
+        models.Cliente.documento_normalizado.in_(documentos)
+    )
+    result = await db.execute(query)
+    return set(result.scalars().all())
+
+
+async def _carregar(db: AsyncSession, registros: List[tuple]) -> Set[str]:
+    """
+    COPY dos registros para a tabela temporária e INSERT em 'clientes'.
+    Retorna os documentos normalizados efetivamente inseridos.
+    """
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    asyncpg_conn = raw.driver_connection
+
+    await db.execute(text(
+        f"CREATE TEMP TABLE {STAGING_TABLE} ("
+        "linha integer, nome_razao_social text, tipo text, documento text, "
+        "documento_normalizado text, email text, telefone text, endereco text"
+        ") ON COMMIT DROP"
+    ))
+    await asyncpg_conn.copy_records_to_table(STAGING_TABLE, records=registros, columns=STAGING_COLUMNS)
+    result = await db.execute(text(
+        "INSERT INTO clientes "
+        "(nome_razao_social, tipo, documento, documento_normalizado, email, telefone, endereco) "
+        "SELECT nome_razao_social, tipo::tipocliente, documento, documento_normalizado, email, telefone, endereco "
+        f"FROM {STAGING_TABLE} ORDER BY linha "
+        "ON CONFLICT DO NOTHING "
+        "RETURNING documento_normalizado"
+    ))
+    inseridos = set(result.scalars().all())
+    await db.commit()
+    return inseridos
+
+
+async def _importar_bloco(
+    db: AsyncSession,
+    bloco: List[tuple],
+    vistos: Set[str],
+    relatorio: schema.ImportacaoRelatorio
+) -> None:
+    validos = []
+    for numero, dados in bloco:
+        try:
+            cliente, digitos = _validar(dados)
+        except ValueError as e:
+            relatorio.registrar_erro(numero, dados.get("documento"), str(e))
+            continue
+        if digitos in vistos:
+            relatorio.registrar_erro(numero, cliente.documento, "documento repetido no arquivo")
+            continue
+        vistos.add(digitos)
+        validos.append((numero, cliente, digitos))
+
+    if not validos:
+        return
+
+    existentes = await _documentos_existentes(db, [digitos for _, _, digitos in validos])
+    registros = []
+    for numero, cliente, digitos in validos:
+        if digitos in existentes:
+            relatorio.registrar_erro(numero, cliente.documento, "documento já cadastrado")
+            continue
+        registros.append((
+            numero, cliente.nome_razao_social, cliente.tipo.name, cliente.documento,
+            digitos, cliente.email, cliente.telefone, cliente.endereco,
+        ))
+
+    if not registros:
+        return
+
+    try:
+        inseridos = await _carregar(db, registros)
+    except Exception as e:
+        await db.rollback()
+        logger.error("Erro ao carregar bloco da importação de clientes: %s", e)
+        for registro in registros:
+            relatorio.registrar_erro(registro[0], registro[3], "erro ao gravar o bloco; tente novamente")
+        return
+
+    relatorio.importados += len(inseridos)
+    for registro in registros:
+        if registro[4] not in inseridos:
+            # Cadastrado por outra escrita entre a checagem e o INSERT
+            relatorio.registrar_erro(registro[0], registro[3], "documento já cadastrado")
+
+
+async def importar_clientes(
+    db: AsyncSession,
+    nome_arquivo: str,
+    arquivo,
+    chunk_size: int = config.CLIENTES_IMPORT_CHUNK_SIZE
+) -> schema.ImportacaoRelatorio:
+    """
+    Importa os clientes do arquivo (CSV ou XLSX, com cabeçalho) e retorna o
+    relatório por linha. FormatoInvalido se o arquivo não puder ser lido.
+    A leitura (síncrona) roda em uma thread, bloco a bloco.
+    """
+    linhas = await asyncio.to_thread(abrir_arquivo, nome_arquivo, arquivo)
+    relatorio = schema.ImportacaoRelatorio()
+    vistos: Set[str] = set()
+    ultima_linha = 1
+    while True:
+        try:
+            bloco = await asyncio.to_thread(lambda: list(itertools.islice(linhas, chunk_size)))
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Os blocos anteriores já foram gravados: relata onde a leitura parou
+            relatorio.registrar_erro(ultima_linha + 1, None, f"leitura interrompida: {e}")
+            break
+        if not bloco:
+            break
+        ultima_linha = bloco[-1][0]
+        relatorio.total_linhas += len(bloco)
+        await _importar_bloco(db, bloco, vistos, relatorio)
+
+    logger.info(
+        "Importação de clientes '%s': %s linhas, %s importados, %s com erro.",
+        nome_arquivo, relatorio.total_linhas, relatorio.importados, relatorio.com_erro
+    )
+    return relatorio
@@ -1,6 +1,6 @@
 import enum
 # --- IMPORTS ATUALIZADOS ---
-from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime
+from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, Index, Float, ForeignKey, JSON, UniqueConstraint, CheckConstraint, text
 from sqlalchemy.sql import func # Para func.now()
 # ---------------------------
 from sqlalchemy.orm import relationship
@@ -14,6 +14,23 @@ class TipoCliente(str, enum.Enum):
 # 2. Define a tabela "clientes"
 class Cliente(Base):
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Paginação keyset (ver services.get_clientes_pagina): uma ordem por índice,
+        # sempre com o id como desempate (o índice também serve à ordem inversa)
+        Index("ix_clientes_nome_id", "nome_razao_social", "id"),
+        Index("ix_clientes_data_criacao_id", "data_criacao", "id"),
+        # Busca por trecho/semelhança (ILIKE '%q%', similarity): GIN + pg_trgm
+        Index("ix_clientes_nome_trgm", "nome_razao_social", postgresql_using="gin",
+              postgresql_ops={"nome_razao_social": "gin_trgm_ops"}),
+        Index("ix_clientes_documento_trgm", "documento", postgresql_using="gin",
+              postgresql_ops={"documento": "gin_trgm_ops"}),
+        Index("ix_clientes_email_trgm", "email", postgresql_using="gin",
+              postgresql_ops={"email": "gin_trgm_ops"}),
+        # Autocomplete por prefixo (services.autocomplete_clientes): faixa no
+        # B-tree já na ordem do resultado. COLLATE "C" = ordem de bytes, o que
+        # permite a faixa [prefixo, prefixo seguinte) em qualquer locale
+        Index("ix_clientes_nome_prefixo", text('lower(nome_razao_social) COLLATE "C"')),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -24,6 +41,10 @@ class Cliente(Base):
     
     # "Doc: 123.456.789-00"
     documento = Column(String(20), nullable=False, unique=True)
+
+    # Apenas os dígitos do documento ("12345678900"), preenchido pelos serviços.
+    # O índice único impede o mesmo CPF/CNPJ em formatos diferentes.
+    documento_normalizado = Column(String(14), nullable=False, unique=True, index=True)
     
     email = Column(String(255), nullable=True)
     telefone = Column(String(20), nullable=True)
@@ -44,4 +65,37 @@ class Cliente(Base):
     projetos = relationship("Projeto", back_populates="cliente")
 
     def __repr__(self) -> str:
-        return f"<Cliente(id={self.id!r}, nome={self.nome_razao_social!r})>"
\ No newline at end of file
+        return f"<Cliente(id={self.id!r}, nome={self.nome_razao_social!r})>"
+
+
+# 4. Possíveis clientes duplicados (gerados por duplicados.detectar_duplicados)
+class DuplicataStatus(str, enum.Enum):
+    PENDENTE = "pendente"     # Aguardando revisão de um gestor
+    DESCARTADO = "descartado" # Não são o mesmo cliente (não volta a ser sugerido)
+
+class ClienteDuplicado(Base):
+    __tablename__ = "clientes_duplicados"
+    __table_args__ = (
+        # Cada par aparece uma única vez, sempre com o menor id em 'cliente_a_id'
+        UniqueConstraint("cliente_a_id", "cliente_b_id", name="uq_clientes_duplicados_par"),
+        CheckConstraint("cliente_a_id < cliente_b_id", name="ck_clientes_duplicados_ordem"),
+        Index("ix_clientes_duplicados_status_score", "status", "score"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Ao excluir um cliente (inclusive ao mesclá-lo em outro), as sugestões com ele somem junto
+    cliente_a_id = Column(Integer, ForeignKey("clientes.id", ondelete="CASCADE"), nullable=False)
+    cliente_b_id = Column(Integer, ForeignKey("clientes.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    score = Column(Float, nullable=False) # 0 a 1
+    motivos = Column(JSON, nullable=False) # Ex: ["telefone", "nome"]
+    status = Column(SAEnum(DuplicataStatus), nullable=False, default=DuplicataStatus.PENDENTE)
+
+    data_deteccao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    data_revisao = Column(DateTime(timezone=True), nullable=True)
+
+    cliente_a = relationship("Cliente", foreign_keys=[cliente_a_id])
+    cliente_b = relationship("Cliente", foreign_keys=[cliente_b_id])
+
+    def __repr__(self) -> str:
+        return f"<ClienteDuplicado(a={self.cliente_a_id!r}, b={self.cliente_b_id!r}, score={self.score!r})>"
\ No newline at end of file
@@ -1,12 +1,16 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import config
 from app.db import get_db
-from app.core.users.models import User
+from app.exports import FormatoExportacao, streaming_export
+from app.core.auth.schema import TokenPrincipal
 # Importa as dependências de permissão
-from app.core.auth.dependencies import get_current_user, get_current_gestor
-from . import services, schema, models
+from app.core.auth.dependencies import get_token_principal, get_current_gestor
+from app.core.users.models import UserRole
+from . import services, schema, models, importacao, duplicados
 
 router = APIRouter(tags=['Clientes'], prefix='/clientes')
 
@@ -19,13 +23,12 @@ async def create_cliente(
     cliente: schema.ClienteCreate,
     db: AsyncSession = Depends(get_db),
     # Permissão: Qualquer usuário logado pode criar um cliente
-    current_user: User = Depends(get_current_user) 
+    current_user: TokenPrincipal = Depends(get_token_principal) 
 ):
     '''Cria um "Novo Cliente" no sistema'''
     
-    # Verifica se o CPF/CNPJ já existe
-    db_cliente = await services.get_cliente_by_documento(db, cliente.documento)
-    if db_cliente:
+    # Verifica se o CPF/CNPJ já existe (em qualquer formato)
+    if await services.documento_em_uso(db, cliente.documento):
         raise HTTPException(
             status_code=400, 
             detail="Um cliente com este documento (CPF/CNPJ) já existe."
@@ -33,29 +36,136 @@ async def create_cliente(
     return await services.create_new_cliente(db, cliente)
 
 
-@router.get('/', response_model=List[schema.ShowCliente])
+@router.post('/importar', response_model=schema.ImportacaoRelatorio)
+async def importar_clientes(
+    arquivo: UploadFile = File(..., description="CSV (UTF-8, ',' ou ';') ou XLSX, com cabeçalho"),
+    db: AsyncSession = Depends(get_db),
+    # Permissão: Apenas Gestores podem importar em massa
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''
+    Importa clientes em massa (ex: exportação de um CRM).
+    Colunas: nome_razao_social (ou nome), documento (ou cpf_cnpj), e opcionalmente
+    tipo (pf/pj; deduzido do documento se ausente), email, telefone e endereco.
+    Documentos já cadastrados ou repetidos são ignorados e aparecem no relatório.
+    '''
+    try:
+        return await importacao.importar_clientes(db, arquivo.filename, arquivo.file)
+    except importacao.FormatoInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get('/', response_model=schema.ClientesPagina)
 async def get_clientes_lista(
     q: Optional[str] = None, # Parâmetro de query para a busca
+    ordem: schema.OrdemClientes = Query(schema.OrdemClientes.NOME, description="Ordenação ('-' = decrescente)"),
+    limit: int = Query(config.CLIENTES_PAGE_SIZE, ge=1, le=config.CLIENTES_MAX_PAGE_SIZE, description="Clientes por página"),
+    cursor: Optional[str] = Query(None, description="'next_cursor' recebido na página anterior"),
+    com_total: bool = Query(False, description="Inclui o total estimado (estatísticas do PostgreSQL)"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''
-    Lista todos os clientes. 
-    Se o parâmetro "q" for fornecido, filtra pelo nome.
+    Lista os clientes paginados por cursor (keyset).
+    Para a próxima página, envie o "next_cursor" da resposta como "cursor"
+    (com a mesma "ordem"); "next_cursor" nulo indica a última página.
+    Se o parâmetro "q" for fornecido, busca por nome, documento ou email
+    (os mais semelhantes primeiro, até "limit" resultados, em uma única página).
     '''
     if q:
         # Se tem busca, usa o serviço de busca
-        return await services.search_clientes(db, q)
-    else:
-        # Senão, lista todos
-        return await services.get_all_clientes(db)
+        clientes = await services.search_clientes(db, q, limit=limit)
+        return schema.ClientesPagina(itens=[schema.ShowCliente.model_validate(c) for c in clientes])
+    try:
+        return await services.get_clientes_pagina(
+            db, ordem=ordem, limit=limit, cursor=cursor, com_total=com_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get('/autocomplete', response_model=List[schema.ClienteAutocomplete])
+async def get_clientes_autocomplete(
+    q: str = Query(..., min_length=2, description="Início do nome digitado"),
+    limit: int = Query(config.CLIENTES_AUTOCOMPLETE_LIMIT, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_token_principal)
+):
+    '''Sugestões de clientes cujo nome começa com "q" (apenas id e nome)'''
+    return await services.autocomplete_clientes(db, q, limit=limit)
+
+
+@router.get('/exportar', response_class=StreamingResponse)
+async def exportar_clientes(
+    formato: FormatoExportacao = Query(FormatoExportacao.CSV),
+    # Permissão: Apenas Gestores podem exportar a base inteira
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''Exporta todos os clientes (CSV ou NDJSON), em streaming'''
+    return streaming_export("clientes", formato, services.EXPORT_COLUNAS, services.stream_clientes_export)
+
+
+# --- Clientes duplicados (detecção em segundo plano + revisão) ---
+
+@router.post('/duplicados/detectar', status_code=status.HTTP_202_ACCEPTED)
+async def detectar_duplicados(
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''Inicia a detecção de possíveis duplicados em segundo plano (Apenas Gestores)'''
+    if not duplicados.iniciar_deteccao():
+        return {"detail": "A detecção de duplicados já está em andamento."}
+    return {"detail": "Detecção de duplicados iniciada."}
+
+
+@router.get('/duplicados', response_model=List[schema.ShowClienteDuplicado])
+async def listar_duplicados(
+    status_revisao: models.DuplicataStatus = Query(models.DuplicataStatus.PENDENTE, alias="status"),
+    limit: int = Query(50, ge=1, le=config.CLIENTES_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''Lista os pares de possíveis duplicados, os mais prováveis primeiro (Apenas Gestores)'''
+    return await duplicados.listar_duplicados(db, status=status_revisao, limit=limit)
+
+
+@router.post('/duplicados/{duplicado_id}/descartar', response_model=schema.ShowClienteDuplicado)
+async def descartar_duplicado(
+    duplicado_id: int,
+    db: AsyncSession = Depends(get_db),
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''Marca o par como "não é o mesmo cliente" (Apenas Gestores)'''
+    duplicado = await duplicados.get_duplicado(db, duplicado_id)
+    if not duplicado:
+        raise HTTPException(status_code=404, detail="Sugestão de duplicado não encontrada")
+    return await duplicados.descartar_duplicado(db, duplicado)
+
+
+@router.post('/duplicados/{duplicado_id}/mesclar', response_model=schema.ShowCliente)
+async def mesclar_duplicado(
+    duplicado_id: int,
+    payload: schema.MesclarDuplicado,
+    db: AsyncSession = Depends(get_db),
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''
+    Une os dois clientes do par em "manter_id" (Apenas Gestores): propostas e
+    projetos do outro passam para ele e o outro cadastro é excluído.
+    '''
+    duplicado = await duplicados.get_duplicado(db, duplicado_id)
+    if not duplicado or duplicado.status != models.DuplicataStatus.PENDENTE:
+        raise HTTPException(status_code=404, detail="Sugestão de duplicado não encontrada")
+    try:
+        return await duplicados.mesclar_duplicado(db, duplicado, payload.manter_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get('/{cliente_id}', response_model=schema.ShowCliente)
 async def get_cliente_detalhe(
     cliente_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''Busca um cliente específico pelo ID (para a tela "Ver detalhes")'''
     cliente = await services.get_cliente_by_id(db, cliente_id)
@@ -64,6 +174,25 @@ async def get_cliente_detalhe(
     return cliente
 
 
+@router.get('/{cliente_id}/resumo', response_model=schema.ClienteResumo)
+async def get_cliente_resumo(
+    cliente_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_token_principal)
+):
+    '''
+    Resumo do cliente para a tela "Ver detalhes": propostas e projetos por
+    status (quantidade e valor) e transações pendentes.
+    - Gestor: todas as propostas e as transações pendentes.
+    - Vendedor: apenas as suas propostas (sem transações).
+    '''
+    vendedor_id = None if current_user.role == UserRole.GESTOR else current_user.id
+    resumo = await services.get_cliente_resumo(db, cliente_id, vendedor_id=vendedor_id)
+    if resumo is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    return resumo
+
+
 # --- NOVO ENDPOINT DE ATUALIZAÇÃO (UPDATE) ---
 @router.put(
     '/{cliente_id}', 
@@ -74,7 +203,7 @@ async def update_cliente_endpoint(
     cliente_update: schema.ClienteUpdate,
     db: AsyncSession = Depends(get_db),
     # Permissão: Apenas Gestores podem alterar
-    gestor: User = Depends(get_current_gestor)
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
     '''Atualiza um cliente específico pelo ID (Apenas Gestores)'''
     cliente = await services.get_cliente_by_id(db, cliente_id)
@@ -83,8 +212,7 @@ async def update_cliente_endpoint(
     
     # Verifica se o novo documento (se fornecido) já existe em OUTRO cliente
     if cliente_update.documento and cliente_update.documento != cliente.documento:
-        db_cliente_doc = await services.get_cliente_by_documento(db, cliente_update.documento)
-        if db_cliente_doc:
+        if await services.documento_em_uso(db, cliente_update.documento, excluir_cliente_id=cliente_id):
             raise HTTPException(
                 status_code=400, 
                 detail="Um cliente com este documento (CPF/CNPJ) já existe."
@@ -101,24 +229,25 @@ async def delete_cliente(
     cliente_id: int,
     db: AsyncSession = Depends(get_db),
     # Permissão: Apenas Gestores podem deletar clientes
-    gestor: User = Depends(get_current_gestor)
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
-    '''Deleta um cliente (Apenas Gestores)'''
-    cliente = await services.get_cliente_by_id(db, cliente_id)
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    
-    # Adicionar lógica de verificação (ex: não deletar se tiver projetos ativos)
-    # if cliente.projetos:
-    #     raise HTTPException(status_code=400, detail="Não é possível deletar cliente com projetos ativos.")
-
-    await services.delete_cliente(db, cliente)
+    '''Deleta um cliente (Apenas Gestores). Clientes com propostas ou projetos não são deletados.'''
+    relatorio = await services.excluir_clientes(db, [cliente_id])
+    if relatorio.ignorados:
+        motivo = relatorio.ignorados[0].motivo
+        if motivo == services.MOTIVO_NAO_ENCONTRADO:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Não é possível deletar o cliente: {motivo}."
+        )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-# --- NOVO ENDPOINT DE DELEÇÃO EM MASSA (BULK DELETE) ---
+# --- ENDPOINT DE DELEÇÃO EM MASSA (BULK DELETE) ---
 @router.post(
     '/delete-bulk', 
+    response_model=schema.ExclusaoRelatorio,
     status_code=status.HTTP_200_OK
 )
 async def delete_clientes_bulk_endpoint(
@@ -126,9 +255,13 @@ async def delete_clientes_bulk_endpoint(
     payload: dict[str, List[int]],
     db: AsyncSession = Depends(get_db),
     # Permissão: Apenas Gestores podem deletar
-    gestor: User = Depends(get_current_gestor)
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
-    '''Deleta múltiplos clientes (Apenas Gestores)'''
+    '''
+    Deleta múltiplos clientes (Apenas Gestores).
+    Clientes com propostas ou projetos (ou inexistentes) são ignorados e
+    listados em "ignorados", com o motivo.
+    '''
     
     cliente_ids = payload.get("cliente_ids", [])
     
@@ -138,14 +271,12 @@ async def delete_clientes_bulk_endpoint(
             detail="Nenhum ID de cliente fornecido."
         )
 
-    # (Você pode adicionar lógicas aqui, ex: não deletar clientes com projetos)
-
-    deleted_count = await services.delete_clientes_bulk(db, cliente_ids)
+    relatorio = await services.excluir_clientes(db, cliente_ids)
     
-    if deleted_count == 0:
+    if not relatorio.excluidos and all(i.motivo == services.MOTIVO_NAO_ENCONTRADO for i in relatorio.ignorados):
          raise HTTPException(
             status_code=404, 
             detail="Nenhum cliente encontrado com os IDs fornecidos."
         )
         
-    return {"detail": f"{deleted_count} cliente(s) deletado(s) com sucesso."}
\ No newline at end of file
+    return relatorio
@@ -1,13 +1,31 @@
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import Optional, Annotated
+import enum
+import re
+from pydantic import AfterValidator, BaseModel, Field, EmailStr, ConfigDict
+from typing import List, Optional, Annotated
 from datetime import datetime # Importar datetime
-from .models import TipoCliente
+from decimal import Decimal
+from app import config
+from .models import TipoCliente, DuplicataStatus
+
+def normalizar_documento(documento: str) -> str:
+    '''Mantém apenas os dígitos do CPF/CNPJ ("123.456.789-00" -> "12345678900")'''
+    return re.sub(r"\D", "", documento)
+
+def validar_documento(documento: str) -> str:
+    '''Aceita o CPF/CNPJ com ou sem pontuação, desde que tenha 11 ou 14 dígitos'''
+    if len(normalizar_documento(documento)) not in (11, 14):
+        raise ValueError("CPF/CNPJ deve ter 11 ou 14 dígitos")
+    return documento
+
+# CPF/CNPJ de entrada (criação, atualização e importação); a coluna
+# documento_normalizado guarda os dígitos (String(14), índice único)
+Documento = Annotated[str, Field(min_length=11, max_length=18), AfterValidator(validar_documento)]
 
 # Schema base com todos os campos que podem ser criados ou atualizados
 class ClienteBase(BaseModel):
     nome_razao_social: Annotated[str, Field(min_length=3, max_length=255)]
     tipo: TipoCliente
-    documento: Annotated[str, Field(min_length=11, max_length=18)] # Para CPF/CNPJ
+    documento: Documento # Para CPF/CNPJ
     email: Optional[EmailStr] = None
     telefone: Optional[str] = None
     endereco: Optional[str] = None
@@ -19,10 +37,94 @@ class ClienteCreate(ClienteBase):
 # Schema para exibir um cliente (o que a API retorna)
 class ShowCliente(ClienteBase):
     id: int
+    documento: str # Sem revalidar o que já está gravado
     data_criacao: datetime # <-- Adicionado para exibição
 
     model_config = ConfigDict(from_attributes=True)
 
+# Resultado do autocomplete (só o necessário para a lista de sugestões)
+class ClienteAutocomplete(BaseModel):
+    id: int
+    nome_razao_social: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Relatório da importação em massa (POST /clientes/importar)
+class ImportacaoErro(BaseModel):
+    linha: int # Linha no arquivo (1 = cabeçalho)
+    documento: Optional[str] = None
+    erro: str
+
+class ImportacaoRelatorio(BaseModel):
+    total_linhas: int = 0
+    importados: int = 0
+    com_erro: int = 0
+    # Limitado a CLIENTES_IMPORT_MAX_ERRORS (com_erro tem o total)
+    erros: List[ImportacaoErro] = []
+
+    def registrar_erro(self, linha: int, documento: Optional[str], erro: str) -> None:
+        self.com_erro += 1
+        if len(self.erros) < config.CLIENTES_IMPORT_MAX_ERRORS:
+            self.erros.append(ImportacaoErro(linha=linha, documento=documento, erro=erro))
+
+# Resultado da exclusão (em massa ou individual)
+class ClienteIgnorado(BaseModel):
+    id: int
+    motivo: str
+
+class ExclusaoRelatorio(BaseModel):
+    detail: str = "" # Mensagem resumida (exibida pelo frontend)
+    excluidos: List[int] = []
+    ignorados: List[ClienteIgnorado] = []
+
+# Resumo do cliente (tela "Ver detalhes"): contagens e totais por status
+class ResumoStatus(BaseModel):
+    status: str
+    quantidade: int
+    valor_total: Decimal
+
+class ClienteResumo(BaseModel):
+    cliente_id: int
+    propostas: List[ResumoStatus] = []
+    propostas_quantidade: int = 0
+    propostas_valor_total: Decimal = Decimal("0")
+    projetos: List[ResumoStatus] = []
+    projetos_quantidade: int = 0
+    projetos_valor_total: Decimal = Decimal("0")
+    # Pendentes e atrasadas, dos projetos do cliente (None para vendedores)
+    transacoes_pendentes: Optional[List[ResumoStatus]] = None
+    transacoes_pendentes_valor_total: Optional[Decimal] = None
+
+# Revisão de duplicados (GET /clientes/duplicados)
+class ShowClienteDuplicado(BaseModel):
+    id: int
+    score: float
+    motivos: List[str]
+    status: DuplicataStatus
+    data_deteccao: datetime
+    data_revisao: Optional[datetime] = None
+    cliente_a: ShowCliente
+    cliente_b: ShowCliente
+
+    model_config = ConfigDict(from_attributes=True)
+
+class MesclarDuplicado(BaseModel):
+    manter_id: int # Qual dos dois clientes permanece
+
+# Ordens disponíveis na listagem paginada ("-" = decrescente)
+class OrdemClientes(str, enum.Enum):
+    NOME = "nome"
+    NOME_DESC = "-nome"
+    DATA_CRIACAO = "data_criacao"
+    DATA_CRIACAO_DESC = "-data_criacao"
+
+# Uma página da listagem de clientes (keyset)
+class ClientesPagina(BaseModel):
+    itens: List[ShowCliente]
+    next_cursor: Optional[str] = None # None = última página
+    # Estimativa das estatísticas do planner (pg_class.reltuples), não um COUNT(*)
+    total_estimado: Optional[int] = None
+
 # Schema para exibir o cliente com detalhes (para a tela "Ver detalhes")
 # Apenas um exemplo de como você pode expandir
 class ShowClienteDetalhado(ShowCliente):
@@ -36,7 +138,7 @@ class ShowClienteDetalhado(ShowCliente):
 class ClienteUpdate(BaseModel):
     nome_razao_social: Optional[Annotated[str, Field(min_length=3, max_length=255)]] = None
     tipo: Optional[TipoCliente] = None
-    documento: Optional[Annotated[str, Field(min_length=11, max_length=18)]] = None
+    documento: Optional[Documento] = None
     email: Optional[EmailStr] = None
     telefone: Optional[str] = None
     endereco: Optional[str] = None
\ No newline at end of file
@@ -1,18 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete # <-- Importar delete
+from sqlalchemy import String, and_, cast, delete, exists, func, literal, literal_column, null, or_, text, tuple_, union_all # <-- Importar delete
 from sqlalchemy.orm import joinedload
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+from app import config
+from app.cache import get_redis
+from app.cache_events import notify_change
+from app.exports import stream_rows
+from app.service_cache import invalidate_tags
+from app.core.dashboards.cache import invalidate_dashboards
+from app.core.sales.propostas.models import Proposta, PropostaStatus
+from app.core.sales.projetos.models import Projeto, ProjetoStatus
+from app.core.financeiro.models import Transacao, StatusTransacao
 from . import models, schema
 
+async def invalidar_caches_clientes(db: AsyncSession, *tabelas: str) -> None:
+    '''
+    Chame APÓS o commit de escritas que excluem/unem clientes ou movem
+    propostas e projetos entre eles: invalida as tags do @cached dessas
+    tabelas e os dashboards (L1 de todos os workers via NOTIFY + L2).
+    O resumo do cliente (get_cliente_resumo) não é cacheado.
+    '''
+    redis_client = get_redis()
+    await invalidate_tags(*tabelas, redis_client=redis_client)
+    await invalidate_dashboards(redis_client)
+    for tabela in (*tabelas, "dashboards"):
+        await notify_change(db, tabela)
+
 async def create_new_cliente(
     db: AsyncSession, 
     cliente: schema.ClienteCreate
 ) -> models.Cliente:
     '''Cria um novo cliente no banco'''
     
-    db_cliente = models.Cliente(**cliente.model_dump())
+    db_cliente = models.Cliente(
+        **cliente.model_dump(),
+        documento_normalizado=schema.normalizar_documento(cliente.documento)
+    )
     db.add(db_cliente)
     await db.commit()
     await db.refresh(db_cliente)
@@ -25,31 +54,291 @@ async def get_cliente_by_id(db: AsyncSession, cliente_id: int) -> Optional[model
     return result.scalars().first()
 
 async def get_cliente_by_documento(db: AsyncSession, documento: str) -> Optional[models.Cliente]:
-    '''Verifica se um cliente já existe pelo documento (CPF/CNPJ)'''
-    query = select(models.Cliente).where(models.Cliente.documento == documento)
+    '''Busca um cliente pelo documento (CPF/CNPJ), em qualquer formato'''
+    query = select(models.Cliente).where(
+        models.Cliente.documento_normalizado == schema.normalizar_documento(documento)
+    )
     result = await db.execute(query)
     return result.scalars().first()
 
-async def get_all_clientes(db: AsyncSession) -> List[models.Cliente]:
-    '''Lista todos os clientes'''
-    query = select(models.Cliente).order_by(models.Cliente.nome_razao_social)
-    result = await db.execute(query)
-    return result.scalars().all()
+async def documento_em_uso(
+    db: AsyncSession, 
+    documento: str, 
+    excluir_cliente_id: Optional[int] = None
+) -> bool:
+    '''
+    Verifica se o CPF/CNPJ (em qualquer formato) já pertence a outro cliente.
+    SELECT 1 ... LIMIT 1 no índice único de 'documento_normalizado', sem
+    carregar a linha.
+    '''
+    query = select(literal(1)).where(
+        models.Cliente.documento_normalizado == schema.normalizar_documento(documento)
+    )
+    if excluir_cliente_id is not None:
+        query = query.where(models.Cliente.id != excluir_cliente_id)
+    result = await db.execute(query.limit(1))
+    return result.scalar() is not None
+
+# --- Paginação keyset ---
+# Em vez de OFFSET (que lê e descarta todas as linhas anteriores), cada
+# página continua a partir da última linha da anterior: WHERE (coluna, id) >
+# (valor, id) ORDER BY coluna, id LIMIT n, servido pelos índices compostos
+# ix_clientes_nome_id / ix_clientes_data_criacao_id. O cursor é opaco para
+# quem consome a API (base64 de [valor, id]).
+
+_ORDENS = {
+    schema.OrdemClientes.NOME: (models.Cliente.nome_razao_social, False),
+    schema.OrdemClientes.NOME_DESC: (models.Cliente.nome_razao_social, True),
+    schema.OrdemClientes.DATA_CRIACAO: (models.Cliente.data_criacao, False),
+    schema.OrdemClientes.DATA_CRIACAO_DESC: (models.Cliente.data_criacao, True),
+}
+
+def encode_cliente_cursor(ordem: schema.OrdemClientes, cliente: models.Cliente) -> str:
+    '''Gera o cursor (opaco) que aponta para depois deste cliente'''
+    coluna, _ = _ORDENS[ordem]
+    valor = getattr(cliente, coluna.key)
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    raw = json.dumps([valor, cliente.id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cliente_cursor(ordem: schema.OrdemClientes, cursor: str) -> tuple:
+    '''Lê o cursor gerado por 'encode_cliente_cursor'. ValueError se inválido.'''
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valor, cliente_id = json.loads(raw)
+        if ordem in (schema.OrdemClientes.DATA_CRIACAO, schema.OrdemClientes.DATA_CRIACAO_DESC):
+            valor = datetime.fromisoformat(valor)
+        elif not isinstance(valor, str):
+            raise TypeError("valor do cursor não é texto")
+        return valor, int(cliente_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido para esta ordenação.") from e
+
+async def estimate_clientes_total(db: AsyncSession) -> Optional[int]:
+    '''
+    Total aproximado de clientes, lido das estatísticas do planner
+    (atualizadas pelo autovacuum/ANALYZE), sem o custo de um COUNT(*).
+    None se a tabela ainda não foi analisada.
+    '''
+    query = text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'clientes'::regclass")
+    estimativa = (await db.execute(query)).scalar()
+    if estimativa is None or estimativa < 0:
+        return None
+    return int(estimativa)
+
+async def get_clientes_pagina(
+    db: AsyncSession,
+    ordem: schema.OrdemClientes = schema.OrdemClientes.NOME,
+    limit: int = config.CLIENTES_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    com_total: bool = False
+) -> schema.ClientesPagina:
+    '''
+    Lista uma página de clientes (keyset). Para a próxima página, envie o
+    'next_cursor' retornado como 'cursor', com a mesma 'ordem'.
+    '''
+    coluna, desc = _ORDENS[ordem]
+    chave = tuple_(coluna, models.Cliente.id)
+    query = select(models.Cliente)
 
-async def search_clientes(db: AsyncSession, q: str) -> List[models.Cliente]:
-    '''Busca clientes pelo nome (para a barra "Buscar clientes...")'''
+    if cursor is not None:
+        valor, cliente_id = decode_cliente_cursor(ordem, cursor)
+        ultimo = tuple_(valor, cliente_id)
+        query = query.where(chave < ultimo if desc else chave > ultimo)
+
+    if desc:
+        query = query.order_by(coluna.desc(), models.Cliente.id.desc())
+    else:
+        query = query.order_by(coluna, models.Cliente.id)
+
+    # Busca 1 cliente a mais para saber se existe próxima página
+    result = await db.execute(query.limit(limit + 1))
+    clientes = result.scalars().all()
+
+    next_cursor = None
+    if len(clientes) > limit:
+        clientes = clientes[:limit]
+        next_cursor = encode_cliente_cursor(ordem, clientes[-1])
+
+    return schema.ClientesPagina(
+        itens=[schema.ShowCliente.model_validate(c) for c in clientes],
+        next_cursor=next_cursor,
+        total_estimado=await estimate_clientes_total(db) if com_total else None
+    )
+
+# --- Busca (pg_trgm) ---
+# 'ILIKE %q%' não usa B-tree; com os índices GIN gin_trgm_ops (nome,
+# documento e email) tanto o ILIKE quanto o operador de semelhança '%'
+# viram buscas no índice. O ranking é a maior semelhança entre os campos.
+
+def _like_pattern(q: str, prefixo: bool = False) -> str:
+    '''Escapa os curingas do LIKE digitados pelo usuário'''
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if prefixo else f"%{escaped}%"
+
+async def search_clientes(
+    db: AsyncSession,
+    q: str,
+    limit: int = config.CLIENTES_SEARCH_LIMIT
+) -> List[models.Cliente]:
+    '''
+    Busca clientes por nome, documento ou email (para a barra "Buscar clientes...").
+    Aceita trechos e pequenos erros de digitação no nome; retorna os 'limit'
+    resultados mais semelhantes primeiro.
+    '''
+    q = q.strip()
+    pattern = _like_pattern(q)
+    digitos = schema.normalizar_documento(q)
+    nome = models.Cliente.nome_razao_social
+    documento = models.Cliente.documento
+    email = models.Cliente.email
+    rank = func.greatest(
+        func.similarity(nome, q),
+        func.similarity(documento, q),
+        func.coalesce(func.similarity(email, q), 0)
+    )
+    condicoes = [
+        nome.ilike(pattern),
+        documento.ilike(pattern),
+        email.ilike(pattern),
+        nome.op("%")(q), # Semelhança (tolera erros de digitação)
+    ]
+    if len(digitos) >= 11:
+        # CPF/CNPJ completo em qualquer formato (índice único)
+        condicoes.append(models.Cliente.documento_normalizado == digitos)
     query = (
         select(models.Cliente)
-        .where(models.Cliente.nome_razao_social.ilike(f"%{q}%")) # 'ilike' é case-insensitive
-        .order_by(models.Cliente.nome_razao_social)
+        .where(or_(*condicoes))
+        .order_by(rank.desc(), nome, models.Cliente.id)
+        .limit(limit)
     )
     result = await db.execute(query)
     return result.scalars().all()
 
-async def delete_cliente(db: AsyncSession, cliente: models.Cliente) -> None:
-    '''Deleta um cliente'''
-    await db.delete(cliente)
-    await db.commit()
+async def autocomplete_clientes(
+    db: AsyncSession,
+    q: str,
+    limit: int = config.CLIENTES_AUTOCOMPLETE_LIMIT
+) -> List[schema.ClienteAutocomplete]:
+    '''
+    Sugestões para cada tecla digitada: apenas id e nome (sem carregar a
+    linha inteira) dos clientes cujo nome começa com 'q', em ordem alfabética.
+    Uma faixa no índice ix_clientes_nome_prefixo, lida já na ordem e
+    interrompida no 'limit' (sem buscar e ordenar todos os que casam).
+    Para trechos no meio do nome, use a busca (search_clientes).
+    '''
+    prefixo = q.strip().lower()
+    if not prefixo:
+        return []
+    # Menor texto maior que todos os que começam com o prefixo (ordem "C")
+    fim = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    chave = func.lower(models.Cliente.nome_razao_social).collate("C")
+    query = (
+        select(models.Cliente.id, models.Cliente.nome_razao_social)
+        .where(chave >= prefixo, chave < fim)
+        .order_by(chave)
+        .limit(limit)
+    )
+    result = await db.execute(query)
+    return [schema.ClienteAutocomplete.model_validate(row) for row in result.all()]
+
+# --- Resumo do cliente (uma consulta agregada) ---
+# Um único UNION ALL de GROUP BYs (propostas, projetos e transações
+# pendentes dos projetos), servido pelos índices cobrindo cliente_id/status,
+# mais uma linha que diz se o cliente existe. Uma ida ao banco.
+
+_STATUS_ENUMS = {
+    "propostas": PropostaStatus,
+    "projetos": ProjetoStatus,
+    "transacoes": StatusTransacao,
+}
+
+def _agrupado(origem: str, status_col, valor_col):
+    return select(
+        literal_column(f"'{origem}'").label("origem"),
+        cast(status_col, String).label("status"),
+        func.count().label("quantidade"),
+        func.coalesce(func.sum(valor_col), 0).label("valor_total"),
+    ).group_by(status_col)
+
+async def get_cliente_resumo(
+    db: AsyncSession, 
+    cliente_id: int, 
+    vendedor_id: Optional[int] = None
+) -> Optional[schema.ClienteResumo]:
+    '''
+    Contagens e totais por status das propostas, projetos e transações
+    pendentes do cliente. Com 'vendedor_id', conta apenas as propostas dele
+    e omite as transações. None se o cliente não existir.
+    '''
+    propostas = _agrupado("propostas", Proposta.status, Proposta.valor_total).where(
+        Proposta.cliente_id == cliente_id
+    )
+    if vendedor_id is not None:
+        propostas = propostas.where(Proposta.vendedor_id == vendedor_id)
+    partes = [
+        select(
+            literal_column("'cliente'").label("origem"),
+            cast(null(), String).label("status"),
+            func.count().label("quantidade"),
+            literal_column("0").label("valor_total"),
+        ).where(models.Cliente.id == cliente_id),
+        propostas,
+        _agrupado("projetos", Projeto.status, Projeto.valor_total).where(
+            Projeto.cliente_id == cliente_id
+        ),
+    ]
+    if vendedor_id is None:
+        partes.append(
+            _agrupado("transacoes", Transacao.status, Transacao.valor)
+            .join(Projeto, Projeto.id == Transacao.projeto_id)
+            .where(
+                Projeto.cliente_id == cliente_id,
+                Transacao.status.in_([StatusTransacao.PENDENTE, StatusTransacao.ATRASADA])
+            )
+        )
+
+    rows = (await db.execute(union_all(*partes))).all()
+    grupos: Dict[str, List[schema.ResumoStatus]] = {"propostas": [], "projetos": [], "transacoes": []}
+    for row in rows:
+        if row.origem == "cliente":
+            if row.quantidade == 0:
+                return None
+            continue
+        # O banco guarda o NOME do membro do enum; a API expõe o valor
+        status = _STATUS_ENUMS[row.origem][row.status].value
+        grupos[row.origem].append(
+            schema.ResumoStatus(status=status, quantidade=row.quantidade, valor_total=row.valor_total)
+        )
+
+    resumo = schema.ClienteResumo(
+        cliente_id=cliente_id,
+        propostas=grupos["propostas"],
+        propostas_quantidade=sum(g.quantidade for g in grupos["propostas"]),
+        propostas_valor_total=sum((g.valor_total for g in grupos["propostas"]), Decimal("0")),
+        projetos=grupos["projetos"],
+        projetos_quantidade=sum(g.quantidade for g in grupos["projetos"]),
+        projetos_valor_total=sum((g.valor_total for g in grupos["projetos"]), Decimal("0")),
+    )
+    if vendedor_id is None:
+        resumo.transacoes_pendentes = grupos["transacoes"]
+        resumo.transacoes_pendentes_valor_total = sum(
+            (g.valor_total for g in grupos["transacoes"]), Decimal("0")
+        )
+    return resumo
+
+# --- Exportação (streaming) ---
+
+EXPORT_COLUNAS = [
+    "id", "nome_razao_social", "tipo", "documento", "email",
+    "telefone", "endereco", "data_criacao",
+]
+
+def stream_clientes_export(db: AsyncSession) -> AsyncIterator[Dict[str, Any]]:
+    '''Gera todos os clientes (apenas as colunas exportadas), por id'''
+    colunas = [getattr(models.Cliente, c) for c in EXPORT_COLUNAS]
+    return stream_rows(db, select(*colunas).order_by(models.Cliente.id))
 
 # --- NOVAS FUNÇÕES ADICIONADAS ---
 
@@ -66,6 +355,8 @@ async def update_cliente(
     # Atualiza os campos do objeto 'cliente'
     for key, value in data.items():
         setattr(cliente, key, value)
+    if "documento" in data:
+        cliente.documento_normalizado = schema.normalizar_documento(cliente.documento)
         
     db.add(cliente)
     await db.commit()
@@ -73,15 +364,76 @@ async def update_cliente(
     return cliente
 
 
-async def delete_clientes_bulk(db: AsyncSession, cliente_ids: List[int]) -> int:
-    '''Deleta múltiplos clientes pelo ID'''
-    
-    query = (
-        delete(models.Cliente)
-        .where(models.Cliente.id.in_(cliente_ids))
+# --- Exclusão (set-based) ---
+# Clientes com propostas ou projetos não podem ser excluídos (a FK falharia
+# ou os dados ficariam órfãos). Uma consulta classifica todos os ids pedidos
+# (EXISTS por dependência) e os elegíveis são apagados em lotes com
+# DELETE ... WHERE NOT EXISTS (...) RETURNING id: o anti-join é refeito no
+# próprio DELETE, então uma proposta criada no meio do caminho também bloqueia.
+
+MOTIVO_NAO_ENCONTRADO = "não encontrado"
+
+def _sem_dependencias():
+    return and_(
+        ~exists().where(Proposta.cliente_id == models.Cliente.id),
+        ~exists().where(Projeto.cliente_id == models.Cliente.id),
     )
-    result = await db.execute(query)
-    await db.commit()
-    
-    # Retorna o número de linhas afetadas (quantos foram deletados)
-    return result.rowcount
\ No newline at end of file
+
+async def excluir_clientes(
+    db: AsyncSession, 
+    cliente_ids: List[int],
+    batch_size: int = config.CLIENTES_DELETE_BATCH_SIZE
+) -> schema.ExclusaoRelatorio:
+    '''
+    Exclui os clientes sem dependências e relata os ignorados (com o motivo),
+    sem carregar objetos ORM.
+    '''
+    ids = list(dict.fromkeys(cliente_ids)) # Sem repetidos, na ordem pedida
+    relatorio = schema.ExclusaoRelatorio()
+
+    query = select(
+        models.Cliente.id,
+        exists().where(Proposta.cliente_id == models.Cliente.id).label("tem_propostas"),
+        exists().where(Projeto.cliente_id == models.Cliente.id).label("tem_projetos"),
+    ).where(models.Cliente.id.in_(ids))
+    encontrados = {row.id: row for row in (await db.execute(query)).all()}
+
+    elegiveis = []
+    for cliente_id in ids:
+        row = encontrados.get(cliente_id)
+        if row is None:
+            motivo = MOTIVO_NAO_ENCONTRADO
+        elif row.tem_propostas and row.tem_projetos:
+            motivo = "possui propostas e projetos"
+        elif row.tem_propostas:
+            motivo = "possui propostas"
+        elif row.tem_projetos:
+            motivo = "possui projetos"
+        else:
+            elegiveis.append(cliente_id)
+            continue
+        relatorio.ignorados.append(schema.ClienteIgnorado(id=cliente_id, motivo=motivo))
+
+    for i in range(0, len(elegiveis), batch_size):
+        lote = elegiveis[i:i + batch_size]
+        stmt = (
+            delete(models.Cliente)
+            .where(models.Cliente.id.in_(lote), _sem_dependencias())
+            .returning(models.Cliente.id)
+            .execution_options(synchronize_session=False)
+        )
+        excluidos = set((await db.execute(stmt)).scalars().all())
+        await db.commit()
+        relatorio.excluidos.extend(c for c in lote if c in excluidos)
+        relatorio.ignorados.extend(
+            schema.ClienteIgnorado(id=c, motivo="dependência criada durante a exclusão")
+            for c in lote if c not in excluidos
+        )
+
+    if relatorio.excluidos:
+        await invalidar_caches_clientes(db, "clientes")
+
+    relatorio.detail = f"{len(relatorio.excluidos)} cliente(s) deletado(s) com sucesso."
+    if relatorio.ignorados:
+        relatorio.detail += f" {len(relatorio.ignorados)} ignorado(s) (ver 'ignorados')."
+    return relatorio
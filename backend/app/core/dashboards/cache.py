@@ -0,0 +1,101 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app import config
+from app.cache import TTLCache, is_stale, pack_stamped, unpack_stamped, delete_by_prefix
+from app.cache_events import on_change
+from app.core.users.models import UserRole
+from app.core.users.schema import UserPrincipal
+
+logger = logging.getLogger(__name__)
+
+# --- Definições do Cache ---
+# Stale-while-revalidate (como o catálogo): fresco até o TTL soft; entre o
+# soft e o teto (hard) é servido na hora e renovado em segundo plano.
+# Não há invalidação explícita: os números toleram alguns segundos de atraso.
+DASHBOARD_CACHE_PREFIX = "dashboard"
+DASHBOARD_CACHE_TTL_SECONDS = config.DASHBOARD_CACHE_TTL_SECONDS
+DASHBOARD_CACHE_HARD_TTL_SECONDS = config.DASHBOARD_CACHE_HARD_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class CachedDashboard:
+    """Dashboard já serializado (bytes JSON) e o momento da reconstrução."""
+    body: bytes
+    built_at: float
+
+    @property
+    def is_stale(self) -> bool:
+        return is_stale(self.built_at, DASHBOARD_CACHE_TTL_SECONDS)
+
+
+# L1: em memória, por worker
+_dashboard_l1 = TTLCache(maxsize=config.DASHBOARD_L1_MAXSIZE, ttl=DASHBOARD_CACHE_HARD_TTL_SECONDS)
+
+
+def dashboard_key(user: UserPrincipal) -> str:
+    """O dashboard do gestor é global; o do vendedor é por usuário."""
+    if user.role == UserRole.GESTOR:
+        return "gestor"
+    return f"vendedor:{user.id}"
+
+
+async def get_cached_dashboard(redis_client: aioredis.Redis, key: str) -> Optional[CachedDashboard]:
+    """
+    Busca o dashboard no L1 e, se ausente ou vencido, no L2 (Redis).
+    Pode retornar uma entrada vencida (soft): confira 'entry.is_stale'.
+    """
+    entry = _dashboard_l1.get(key)
+    if entry is not None and not entry.is_stale:
+        return entry
+
+    try:
+        cached_data = await redis_client.get(f"{DASHBOARD_CACHE_PREFIX}:{key}")
+    except Exception as e:
+        logger.warning("Erro ao ler cache do dashboard no Redis (seguindo para o DB): %s", e)
+        return entry
+
+    if cached_data is None:
+        return entry
+
+    built_at, body = unpack_stamped(cached_data)
+    if entry is not None and built_at <= entry.built_at:
+        return entry
+    entry = CachedDashboard(body=body.encode(), built_at=built_at)
+    _dashboard_l1.set(key, entry)
+    return entry
+
+
+@on_change("dashboards")
+def evict_local_dashboards(row_id: Optional[int] = None) -> None:
+    """Descarta o L1 dos dashboards, apenas neste worker."""
+    _dashboard_l1.clear()
+
+
+async def invalidate_dashboards(redis_client: aioredis.Redis) -> int:
+    """Apaga todos os dashboards do L1 local e do L2 (prefixo 'dashboard:')."""
+    evict_local_dashboards()
+    try:
+        return await delete_by_prefix(f"{DASHBOARD_CACHE_PREFIX}:", redis_client)
+    except Exception as e:
+        logger.error("Erro ao invalidar dashboards no Redis: %s", e)
+        return 0
+
+
+async def set_cached_dashboard(redis_client: aioredis.Redis, key: str, body: bytes) -> CachedDashboard:
+    """Salva o dashboard no L1 e no L2 (Redis, com o teto como TTL)."""
+    entry = CachedDashboard(body=body, built_at=time.time())
+    _dashboard_l1.set(key, entry)
+    try:
+        await redis_client.setex(
+            f"{DASHBOARD_CACHE_PREFIX}:{key}",
+            DASHBOARD_CACHE_HARD_TTL_SECONDS,
+            pack_stamped(body.decode(), entry.built_at)
+        )
+    except Exception as e:
+        logger.warning("Erro ao salvar cache do dashboard no Redis: %s", e)
+    return entry
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as aioredis
 
 from app.db import get_db
-from app.core.users.models import User, UserRole
+from app.cache import get_redis_client
+from app.core.users.models import UserRole
+from app.core.users.schema import UserPrincipal
 # Importa a dependência de login base
 from app.core.auth.dependencies import get_current_user 
 from . import services, schema
@@ -16,21 +19,23 @@ router = APIRouter(tags=['Dashboards'], prefix='/dashboard')
 )
 async def get_dashboard(
     db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client),
     # Pega o usuário logado, seja ele Gestor ou Vendedor
-    current_user: User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     '''
     Retorna o dashboard apropriado para o "role" do usuário logado.
     - Gestor: Vê o dashboard global.
     - Vendedor: Vê o dashboard pessoal.
+    Pode estar até DASHBOARD_CACHE_TTL_SECONDS desatualizado.
     '''
     
     # AQUI ESTÁ A LÓGICA DE PERMISSÃO (RBAC)
-    if current_user.role == UserRole.GESTOR:
-        return await services.build_gestor_dashboard(db)
-    
-    elif current_user.role == UserRole.VENDEDOR:
-        return await services.build_vendedor_dashboard(db, current_user)
+    if current_user.role in (UserRole.GESTOR, UserRole.VENDEDOR):
+        # JSON já serializado (cache stale-while-revalidate): devolvido como
+        # Response, sem revalidar contra o response_model
+        body = await services.get_dashboard_json(db, redis_client, current_user)
+        return Response(content=body, media_type="application/json")
     
     else:
         # Ex: "Suporte" ou outros roles não têm dashboard
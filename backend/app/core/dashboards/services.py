@@ -1,17 +1,81 @@
+import logging
+import redis.asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 from sqlalchemy import func, extract
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
+from app.db import async_session
+from app.singleflight import singleflight, refresh_in_background
 from app.core.users.models import User, UserRole
+from app.core.users.schema import UserPrincipal
 from app.core.sales.propostas.models import Proposta, PropostaStatus
 from app.core.sales.projetos.models import Projeto, ProjetoStatus
 from app.core.clientes.models import Cliente
 from app.core.financeiro.models import Transacao, StatusTransacao
 from app.core.sales.projetos import services as projeto_services 
 from . import schema
+from . import cache as dashboard_cache
+
+logger = logging.getLogger(__name__)
+
+# --- Dashboard com cache (stale-while-revalidate) ---
+
+async def _build_dashboard_json(db: AsyncSession, user: UserPrincipal) -> bytes:
+    """Calcula o dashboard do perfil do usuário e o serializa para bytes JSON."""
+    if user.role == UserRole.GESTOR:
+        dashboard = await build_gestor_dashboard(db)
+    else:
+        dashboard = await build_vendedor_dashboard(db, user)
+    return dashboard.model_dump_json().encode()
+
+async def _refresh_dashboard(
+    redis_client: aioredis.Redis, 
+    key: str, 
+    user: UserPrincipal
+) -> dashboard_cache.CachedDashboard:
+    """Renovação em segundo plano: usa a própria sessão (a da requisição já terá fechado)."""
+    async with async_session() as db:
+        body = await _build_dashboard_json(db, user)
+    return await dashboard_cache.set_cached_dashboard(redis_client, key, body)
+
+async def get_dashboard_json(
+    db: AsyncSession, 
+    redis_client: aioredis.Redis, 
+    user: UserPrincipal
+) -> bytes:
+    '''
+    Retorna o dashboard do usuário já serializado (bytes JSON).
+    - Fresco: direto do cache (L1/L2).
+    - Vencido (TTL soft): servido na hora e renovado em segundo plano.
+    - Ausente (ou além do teto): calculado uma única vez por chave (singleflight).
+    '''
+    key = dashboard_cache.dashboard_key(user)
+    flight_key = f"dashboard:{key}"
+
+    entry = await dashboard_cache.get_cached_dashboard(redis_client, key)
+    if entry is not None:
+        if entry.is_stale:
+            refresh_in_background(
+                flight_key,
+                lambda: _refresh_dashboard(redis_client, key, user),
+                redis_client=redis_client
+            )
+        return entry.body
+
+    async def rebuild() -> dashboard_cache.CachedDashboard:
+        logger.info("Cache MISS do dashboard (%s): calculando no PostgreSQL.", key)
+        body = await _build_dashboard_json(db, user)
+        return await dashboard_cache.set_cached_dashboard(redis_client, key, body)
+
+    async def recheck():
+        return await dashboard_cache.get_cached_dashboard(redis_client, key)
+
+    entry = await singleflight(flight_key, rebuild, redis_client=redis_client, recheck=recheck)
+    return entry.body
 
 # --- Funções de Cálculo GESTOR ---
 
@@ -154,7 +218,7 @@ async def _get_alertas_gestor(db: AsyncSession) -> List[schema.Alerta]:
 
 # --- Funções de Cálculo VENDEDOR ---
 
-async def build_vendedor_dashboard(db: AsyncSession, user: User) -> schema.DashboardVendedor:
+async def build_vendedor_dashboard(db: AsyncSession, user: UserPrincipal) -> schema.DashboardVendedor:
     '''Calcula todos os dados para o Dashboard do Vendedor'''
     
     # 1. KPIs (filtrados pelo user.id)
@@ -225,6 +289,7 @@ async def _get_pendencias_vendedor(db: AsyncSession, vendedor_id: int) -> List[s
     # 1. Lógica de "Proposta Vencendo"
     query_vencendo = (
         select(Proposta)
+        .options(selectinload(Proposta.cliente)) # Usado na descrição (sem lazy load no async)
         .where(Proposta.vendedor_id == vendedor_id)
         .where(Proposta.status.in_([PropostaStatus.NOVA, PropostaStatus.ENVIADA]))
         .where(Proposta.data_vencimento < (datetime.utcnow().date() + timedelta(days=3))) # Vence nos prox 3 dias
@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+try:
+    import brotli  # Opcional: sem ele, servimos apenas gzip/identity
+except ImportError:
+    brotli = None
+
+from app import config
+from app.cache import TTLCache, is_stale, pack_stamped, unpack_stamped, version_check_window
+from app.cache_events import on_change
+
+logger = logging.getLogger(__name__)
+
+# --- Definições do Cache ---
+# A versão do catálogo fica no Redis; invalidar = INCR (todas as entradas
+# da versão anterior deixam de ser lidas e expiram sozinhas pelo TTL).
+# Dentro da MESMA versão, a idade da entrada segue o stale-while-revalidate:
+# fresca até o TTL soft, servida + renovada em segundo plano até o hard.
+CATALOGO_VERSION_KEY = "catalogo_itens:version"
+CATALOGO_CACHE_PREFIX = "catalogo_itens"
+CATALOGO_CACHE_TTL_SECONDS = config.CATALOGO_CACHE_TTL_SECONDS
+CATALOGO_CACHE_HARD_TTL_SECONDS = config.CATALOGO_CACHE_HARD_TTL_SECONDS
+
+# Respostas menores que isso não compensam ser comprimidas
+COMPRESS_MIN_BYTES = 1024
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """
+    Resposta do catálogo já serializada (bytes JSON), presa a uma versão,
+    com ETag e variantes pré-comprimidas (calculadas uma vez, ao entrar no L1).
+    """
+    version: int
+    body: bytes
+    etag: str
+    built_at: float = 0.0 # time.time() da reconstrução (para o TTL soft)
+    gzip_body: Optional[bytes] = None
+    br_body: Optional[bytes] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return is_stale(self.built_at, CATALOGO_CACHE_TTL_SECONDS)
+
+
+def make_cached_body(version: int, body: bytes, built_at: Optional[float] = None) -> CachedBody:
+    """Calcula o ETag (hash do conteúdo) e as variantes gzip/brotli do corpo."""
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    if built_at is None:
+        built_at = time.time()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return CachedBody(version=version, body=body, etag=etag, built_at=built_at)
+    return CachedBody(
+        version=version,
+        body=body,
+        etag=etag,
+        built_at=built_at,
+        gzip_body=gzip.compress(body, compresslevel=9),
+        br_body=brotli.compress(body, quality=8) if brotli is not None else None,
+    )
+
+
+# L1: em memória, por worker
+_catalogo_l1 = TTLCache(maxsize=config.CATALOGO_L1_MAXSIZE, ttl=CATALOGO_CACHE_HARD_TTL_SECONDS)
+
+# Última versão lida do Redis e quando (monotonic)
+_version_snapshot: dict = {"version": None, "checked_at": 0.0}
+
+
+def _body_key(version: int, query_key: str) -> str:
+    return f"{CATALOGO_CACHE_PREFIX}:v{version}:{query_key}"
+
+
+async def get_catalogo_version(redis_client: aioredis.Redis) -> Optional[int]:
+    """
+    Retorna a versão atual do catálogo.
+    Dentro da janela CATALOGO_VERSION_CHECK_SECONDS não consulta o Redis.
+    Se o Redis falhar, segue com a última versão conhecida (ou None).
+    """
+    now = time.monotonic()
+    if (
+        _version_snapshot["version"] is not None
+        and now - _version_snapshot["checked_at"] < version_check_window(config.CATALOGO_VERSION_CHECK_SECONDS)
+    ):
+        return _version_snapshot["version"]
+
+    try:
+        version = int(await redis_client.get(CATALOGO_VERSION_KEY) or 0)
+    except Exception as e:
+        logger.warning("Erro ao ler versão do catálogo no Redis: %s", e)
+        return _version_snapshot["version"]
+
+    _version_snapshot.update(version=version, checked_at=now)
+    return version
+
+
+async def get_cached_body(
+    redis_client: aioredis.Redis, 
+    version: int, 
+    query_key: str
+) -> Optional[CachedBody]:
+    """
+    Busca a resposta serializada no L1 e, em seguida, no L2 (Redis).
+    Pode retornar uma entrada vencida (soft): confira 'entry.is_stale'.
+    """
+    entry = _catalogo_l1.get(query_key)
+    if entry is not None and entry.version != version:
+        entry = None
+    if entry is not None and not entry.is_stale:
+        return entry
+
+    # L1 vencido: outro worker pode já ter renovado o L2
+    try:
+        cached_data = await redis_client.get(_body_key(version, query_key))
+    except Exception as e:
+        logger.warning("Erro ao ler cache do catálogo no Redis (seguindo para o DB): %s", e)
+        return entry
+
+    if cached_data is None:
+        return entry
+
+    built_at, body = unpack_stamped(cached_data)
+    if entry is not None and built_at <= entry.built_at:
+        return entry
+    entry = make_cached_body(version, body.encode(), built_at=built_at)
+    _catalogo_l1.set(query_key, entry)
+    return entry
+
+
+async def set_cached_body(
+    redis_client: aioredis.Redis, 
+    version: int, 
+    query_key: str, 
+    body: bytes
+) -> CachedBody:
+    """Salva a resposta serializada no L1 e no L2 (Redis, com o teto como TTL)."""
+    entry = make_cached_body(version, body)
+    _catalogo_l1.set(query_key, entry)
+    try:
+        await redis_client.setex(
+            _body_key(version, query_key),
+            CATALOGO_CACHE_HARD_TTL_SECONDS,
+            pack_stamped(body.decode(), entry.built_at)
+        )
+    except Exception as e:
+        logger.warning("Erro ao salvar cache do catálogo no Redis: %s", e)
+    return entry
+
+
+@on_change("catalogo_itens", "equipamentos", "categorias_equipamentos", "distribuidores")
+def evict_local_catalogo(row_id: Optional[int] = None) -> None:
+    """Descarta o L1 e a versão conhecida do catálogo, apenas neste worker."""
+    _catalogo_l1.clear()
+    _version_snapshot.update(version=None, checked_at=0.0)
+
+
+async def invalidate_catalogo(redis_client: aioredis.Redis) -> None:
+    """
+    Invalida TODO o cache do catálogo (L1 local + nova versão no Redis).
+    Chame isso ao Criar, Atualizar ou Deletar um CatalogoItem.
+    """
+    evict_local_catalogo()
+    try:
+        await redis_client.incr(CATALOGO_VERSION_KEY)
+    except Exception as e:
+        # Logar o erro, mas não travar a operação principal
+        logger.error("Erro ao invalidar cache do catálogo no Redis: %s", e)
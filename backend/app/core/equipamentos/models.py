@@ -1,7 +1,7 @@
 import enum
 from sqlalchemy import (
     Column, Integer, String, Enum as SAEnum, Float, JSON, ForeignKey, 
-    Numeric, DateTime, Boolean, Table
+    Numeric, DateTime, Boolean, Table, Index
 )
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql import func
@@ -48,11 +48,17 @@ class CategoriaEquipamento(Base):
 # Ex: "Módulo HELIUS HYPERION HMB13..."
 class Equipamento(Base):
     __tablename__ = "equipamentos"
+    __table_args__ = (
+        # Filtros de potência do catálogo (com ou sem categoria): o PostgreSQL
+        # acha os equipamentos pela faixa e junta os itens pelo equipamento_id
+        Index("ix_equipamentos_potencia_w", "potencia_w"),
+        Index("ix_equipamentos_categoria_id_potencia_w", "categoria_id", "potencia_w"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Relação com Categoria (Substitui o Enum 'TipoEquipamento')
-    categoria_id = Column(Integer, ForeignKey("categorias_equipamentos.id"), nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categorias_equipamentos.id"), nullable=False, index=True)
     
     nome_modelo = Column(String(255), nullable=False, unique=True, index=True)
     fabricante = Column(String(100), nullable=True)
@@ -71,14 +77,20 @@ class Equipamento(Base):
 # e adiciona o PREÇO.
 class CatalogoItem(Base):
     __tablename__ = "catalogo_itens"
+    __table_args__ = (
+        # Keyset do catálogo (id desc) por distribuidor: linhas já na ordem da página
+        Index("ix_catalogo_itens_distribuidor_id_id", "distribuidor_id", "id"),
+        # Faixa de preço: varre só a faixa pedida, com o id para a ordem/cursor
+        Index("ix_catalogo_itens_preco_custo_id", "preco_custo", "id"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     
     # O que é? (Ex: Módulo Helius)
-    equipamento_id = Column(Integer, ForeignKey("equipamentos.id"), nullable=False)
+    equipamento_id = Column(Integer, ForeignKey("equipamentos.id"), nullable=False, index=True)
     
     # Quem vende? (Ex: Belenus)
-    distribuidor_id = Column(Integer, ForeignKey("distribuidores.id"), nullable=False)
+    distribuidor_id = Column(Integer, ForeignKey("distribuidores.id"), nullable=False, index=True)
     
     # Código do produto NO distribuidor (Ex: "08092023")
     codigo_distribuidor = Column(String(100), nullable=True, index=True)
@@ -1,18 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from decimal import Decimal
 import redis.asyncio as aioredis # Importar aioredis
 
 from app.db import get_db
-from app.core.auth.dependencies import get_current_user
-from app.core.users.models import User
+from app.core.auth.dependencies import get_token_principal
+from app.core.auth.schema import TokenPrincipal
 from . import schema, services
+from .cache import CachedBody
 
 # Importar a nova dependência de cache
 from app.cache import get_redis_client
 
 router = APIRouter(prefix="/equipamentos", tags=["Equipamentos"])
 
+
+# --- Helpers de resposta (bytes já serializados) ---
+
+def _accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Verifica se o 'Accept-Encoding' aceita a codificação (ignora q=0)."""
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def _cached_json_response(entry: CachedBody, request: Request) -> Response:
+    """
+    Envia o JSON guardado em cache sem nenhuma (des)serialização:
+    - 304 se o 'If-None-Match' bater com o ETag;
+    - variante brotli/gzip pré-comprimida, conforme o 'Accept-Encoding';
+    - senão, os bytes originais.
+    """
+    headers = {"ETag": entry.etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or entry.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if entry.br_body is not None and _accepts_encoding(accept_encoding, "br"):
+        headers["Content-Encoding"] = "br"
+        return Response(content=entry.br_body, media_type="application/json", headers=headers)
+    if entry.gzip_body is not None and _accepts_encoding(accept_encoding, "gzip"):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=entry.gzip_body, media_type="application/json", headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
 # --- Endpoint ATUALIZADO ---
 @router.get(
     "/", 
@@ -22,7 +62,7 @@ router = APIRouter(prefix="/equipamentos", tags=["Equipamentos"])
 async def get_equipamentos(
     categoria_id: Optional[int] = Query(None, description="Filtrar por ID da categoria"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user) 
+    current_user: TokenPrincipal = Depends(get_token_principal) 
 ):
     """
     Lista todos os equipamentos técnicos (Módulos, Inversores) 
@@ -40,7 +80,7 @@ async def get_equipamentos(
 )
 async def get_categorias(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     return await services.get_all_categorias(db=db)
 
@@ -53,30 +93,56 @@ async def get_categorias(
 )
 async def get_distribuidores(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     return await services.get_all_distribuidores(db=db)
 
 
-# --- Endpoint /catalogo/ (MODIFICADO COM CACHE) ---
+# --- Endpoint /catalogo/ (PAGINADO, FILTRADO E COM CACHE) ---
 @router.get(
     "/catalogo/", 
-    response_model=List[schema.ShowCatalogoItem],
-    summary="Lista todos os Itens de Catálogo (SKUs com preço)"
+    response_model=schema.CatalogoPagina,
+    summary="Lista os Itens de Catálogo (SKUs com preço), paginados e filtrados"
 )
 async def get_catalogo_itens(
+    request: Request,
+    distribuidor_id: Optional[int] = Query(None, description="Filtrar por distribuidor"),
+    categoria_id: Optional[int] = Query(None, description="Filtrar pela categoria do equipamento"),
+    potencia_min: Optional[float] = Query(None, ge=0, description="Potência mínima (W)"),
+    potencia_max: Optional[float] = Query(None, ge=0, description="Potência máxima (W)"),
+    disponivel: Optional[bool] = Query(None, description="Apenas itens disponíveis (ou indisponíveis)"),
+    preco_min: Optional[Decimal] = Query(None, ge=0, description="Preço de custo mínimo"),
+    preco_max: Optional[Decimal] = Query(None, ge=0, description="Preço de custo máximo"),
+    cursor: Optional[int] = Query(None, description="'next_cursor' recebido na página anterior"),
+    limit: int = Query(100, ge=1, le=500, description="Itens por página"),
     db: AsyncSession = Depends(get_db),
     # Adicionar a dependência do Redis
     redis_client: aioredis.Redis = Depends(get_redis_client),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     """
-    Obtém a lista completa de itens do catálogo.
-    Esta consulta é otimizada com cache-aside usando Redis.
+    Obtém uma página do catálogo (ordem: mais recentes primeiro).
+    Para a próxima página, envie o `next_cursor` da resposta como `cursor`.
+    
+    Cada combinação de filtros tem a sua entrada no cache L1 (memória) /
+    L2 (Redis); todas são invalidadas juntas pela versão do catálogo.
     """
-    # O serviço agora retorna List[dict], que o FastAPI validará
-    # contra o response_model.
-    return await services.get_all_catalogo_itens(db=db, redis_client=redis_client)
+    filtros = schema.CatalogoFiltros(
+        distribuidor_id=distribuidor_id,
+        categoria_id=categoria_id,
+        potencia_min=potencia_min,
+        potencia_max=potencia_max,
+        disponivel=disponivel,
+        preco_min=preco_min,
+        preco_max=preco_max,
+        cursor=cursor,
+        limit=limit,
+    )
+    # O serviço retorna o JSON já serializado (bytes, ETag e variantes
+    # comprimidas). Devolvendo um Response, o FastAPI não revalida nem
+    # reserializa contra o response_model (que fica apenas para a documentação).
+    entry = await services.get_catalogo_itens(db=db, redis_client=redis_client, filtros=filtros)
+    return _cached_json_response(entry, request)
 
 
 @router.get(
@@ -86,6 +152,6 @@ async def get_catalogo_itens(
 )
 async def get_kits(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     return await services.get_all_kits(db=db)
\ No newline at end of file
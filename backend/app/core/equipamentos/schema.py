@@ -70,6 +70,25 @@ class ShowCatalogoItem(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# --- Catálogo paginado (keyset) e filtrado ---
+
+class CatalogoFiltros(BaseModel):
+    """Filtros normalizados do catálogo (também usados como chave de cache)."""
+    distribuidor_id: Optional[int] = None
+    categoria_id: Optional[int] = None
+    potencia_min: Optional[float] = None # Em Watts
+    potencia_max: Optional[float] = None # Em Watts
+    disponivel: Optional[bool] = None
+    preco_min: Optional[Decimal] = None
+    preco_max: Optional[Decimal] = None
+    cursor: Optional[int] = None # ID do último item da página anterior
+    limit: int = 100
+
+class CatalogoPagina(BaseModel):
+    itens: List[ShowCatalogoItem]
+    next_cursor: Optional[int] = None # None = última página
+
+
 # --- Kits (Pacotes de itens - MANTIDO) ---
 
 class KitBase(BaseModel):
@@ -1,17 +1,40 @@
-import json
+import hashlib
+import logging
 import redis.asyncio as aioredis
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, contains_eager
 from typing import List, Optional
+from app.db import async_session
+from app.cache import get_redis
+from app.cache_events import notify_change
+from app.service_cache import cached, invalidate_tags
+from app.singleflight import singleflight, refresh_in_background
 from . import models, schema
+from . import cache as catalogo_cache
+
+logger = logging.getLogger(__name__)
 
 # --- Definições do Cache ---
-CATALOGO_CACHE_KEY = "catalogo_itens:all"
-CATALOGO_CACHE_TTL_SECONDS = 3600  # Cache por 1 hora
+# (versão, TTL e chaves ficam em equipamentos/cache.py)
 
-# --- Equipamentos (Itens ANEEL) ---
+# Serializa a lista inteira de uma vez, direto para bytes JSON
+_catalogo_adapter = TypeAdapter(List[schema.ShowCatalogoItem])
 
+# --- Equipamentos (Itens ANEEL) ---
+# As listagens abaixo são cacheadas (L1/L2) e dependem das tabelas em 'tags'.
+# A API não escreve nessas tabelas: elas são carregadas por scripts
+# (seed_catalogos.py) ou direto no banco. Quem escrever deve chamar
+# 'invalidar_equipamentos(db, <tabelas>)' após o commit (o seed já chama);
+# escritas fora disso só aparecem após o TTL ou um
+# POST /cache/invalidate?scope=tag:<tabela> (ou scope=catalogo).
+
+@cached(
+    "equipamentos:equipamentos",
+    schema=List[schema.ShowEquipamento],
+    tags=("equipamentos", "categorias_equipamentos")
+)
 async def get_equipamentos(db: AsyncSession, categoria_id: Optional[int] = None) -> List[models.Equipamento]:
     """
     Busca equipamentos técnicos (Módulos, Inversores).
@@ -31,6 +54,11 @@ async def get_equipamentos(db: AsyncSession, categoria_id: Optional[int] = None)
 
 # --- Categorias ---
 
+@cached(
+    "equipamentos:categorias",
+    schema=List[schema.ShowCategoria],
+    tags=("categorias_equipamentos",)
+)
 async def get_all_categorias(db: AsyncSession) -> List[models.CategoriaEquipamento]:
     query = select(models.CategoriaEquipamento).order_by(models.CategoriaEquipamento.nome)
     result = await db.execute(query)
@@ -38,95 +66,188 @@ async def get_all_categorias(db: AsyncSession) -> List[models.CategoriaEquipamen
 
 # --- Distribuidores (MANTIDO) ---
 
+@cached(
+    "equipamentos:distribuidores",
+    schema=List[schema.ShowDistribuidor],
+    tags=("distribuidores",)
+)
 async def get_all_distribuidores(db: AsyncSession) -> List[models.Distribuidor]:
     query = select(models.Distribuidor).order_by(models.Distribuidor.nome)
     result = await db.execute(query)
     return result.scalars().all()
 
 
-# --- Cache Helper (Novo) ---
+# --- Cache Helper ---
 
-async def _clear_catalogo_cache(redis_client: aioredis.Redis):
+# Tabelas exibidas na listagem do catálogo (cache versionado próprio)
+CATALOGO_TABELAS = ("catalogo_itens", "equipamentos", "categorias_equipamentos", "distribuidores")
+
+async def invalidar_equipamentos(
+    db: AsyncSession,
+    *tabelas: str,
+    redis_client: Optional[aioredis.Redis] = None
+) -> None:
     """
-    Helper para invalidar o cache da lista do catálogo.
-    Chame isso ao Criar, Atualizar ou Deletar um CatalogoItem.
+    Invalida os caches que dependem das tabelas escritas: as tags do
+    @cached (equipamentos, categorias, distribuidores, kits) e, se alguma
+    delas aparece no catálogo, a versão do catálogo.
+    Chame isso APÓS o commit de qualquer escrita nessas tabelas.
+    Os outros workers são avisados via NOTIFY e descartam o L1 na hora.
     """
-    try:
-        print(f"Cache CLEAR: Deletando a chave {CATALOGO_CACHE_KEY}")
-        await redis_client.delete(CATALOGO_CACHE_KEY)
-    except Exception as e:
-        # Logar o erro, mas não travar a operação principal
-        print(f"Erro ao limpar cache do Redis: {e}")
+    redis_client = redis_client or get_redis()
+    await invalidate_tags(*tabelas, redis_client=redis_client)
+    if any(tabela in CATALOGO_TABELAS for tabela in tabelas):
+        await catalogo_cache.invalidate_catalogo(redis_client)
+    for tabela in tabelas:
+        await notify_change(db, tabela)
 
 
-# --- Itens de Catálogo (SKUs com preço - MODIFICADO COM CACHE) ---
+# --- Itens de Catálogo (SKUs com preço - PAGINADO + CACHE L1/L2 VERSIONADO) ---
 
-async def get_all_catalogo_itens(
-    db: AsyncSession, 
-    redis_client: aioredis.Redis
-) -> List[dict]:
+def catalogo_query_key(filtros: schema.CatalogoFiltros) -> str:
     """
-    Busca todos os itens do catálogo, implementando o padrão Cache-Aside.
-    Retorna uma lista de dicts (pronta para JSON) ao invés de modelos ORM.
+    Chave de cache normalizada para uma combinação de filtros/página.
+    Filtros vazios são descartados e a ordem dos campos é fixa, então
+    consultas equivalentes caem na mesma entrada.
     """
-    
-    # 1. Tentar ler do Cache (Redis)
-    try:
-        cached_data = await redis_client.get(CATALOGO_CACHE_KEY)
-        if cached_data:
-            print("Cache HIT: Retornando dados do Redis.")
-            # Dados estão armazenados como string JSON, então desserializamos
-            return json.loads(cached_data)
-    except Exception as e:
-        # Se o Redis falhar, logamos o erro e seguimos para o DB
-        print(f"Erro ao ler cache do Redis (seguindo para o DB): {e}")
-
-    # 2. Cache MISS: Buscar do Banco de Dados (PostgreSQL)
-    print("Cache MISS: Buscando dados do PostgreSQL.")
+    canonical = filtros.model_dump_json(exclude_none=True)
+    return "q:" + hashlib.sha1(canonical.encode()).hexdigest()
+
+
+async def _build_catalogo_json(db: AsyncSession, filtros: schema.CatalogoFiltros) -> bytes:
+    """Busca uma página do catálogo no PostgreSQL e a serializa direto para bytes JSON."""
     query = (
         select(models.CatalogoItem)
+        .join(models.CatalogoItem.equipamento)
         .options(
-            joinedload(models.CatalogoItem.equipamento).joinedload(models.Equipamento.categoria),
+            contains_eager(models.CatalogoItem.equipamento).joinedload(models.Equipamento.categoria),
             joinedload(models.CatalogoItem.distribuidor)
         )
-        .order_by(models.CatalogoItem.id.desc())
     )
+
+    if filtros.distribuidor_id is not None:
+        query = query.where(models.CatalogoItem.distribuidor_id == filtros.distribuidor_id)
+    if filtros.categoria_id is not None:
+        query = query.where(models.Equipamento.categoria_id == filtros.categoria_id)
+    if filtros.potencia_min is not None:
+        query = query.where(models.Equipamento.potencia_w >= filtros.potencia_min)
+    if filtros.potencia_max is not None:
+        query = query.where(models.Equipamento.potencia_w <= filtros.potencia_max)
+    if filtros.disponivel is not None:
+        query = query.where(models.CatalogoItem.disponivel == filtros.disponivel)
+    if filtros.preco_min is not None:
+        query = query.where(models.CatalogoItem.preco_custo >= filtros.preco_min)
+    if filtros.preco_max is not None:
+        query = query.where(models.CatalogoItem.preco_custo <= filtros.preco_max)
+
+    # Keyset: continua a partir do último ID da página anterior (ordem: id desc)
+    if filtros.cursor is not None:
+        query = query.where(models.CatalogoItem.id < filtros.cursor)
+
+    # Busca 1 item a mais para saber se existe próxima página
+    query = query.order_by(models.CatalogoItem.id.desc()).limit(filtros.limit + 1)
+
     result = await db.execute(query)
     itens_orm = result.scalars().all()
 
-    # 3. Serializar os dados para armazenar no cache (Pydantic v2)
-    # Convertemos os modelos ORM para dicts usando o schema
-    serializable_data = [
-        schema.ShowCatalogoItem.model_validate(item).model_dump()
-        for item in itens_orm
-    ]
-    
-    # 4. Salvar no Cache (Redis) com TTL
-    try:
-        # Serializamos a *lista inteira* de dicts para uma string JSON
-        json_data = json.dumps(serializable_data, default=str) # default=str para Decimals
-        await redis_client.setex(
-            CATALOGO_CACHE_KEY,
-            CATALOGO_CACHE_TTL_SECONDS,
-            json_data
-        )
-        print("Cache SET: Dados do catálogo salvos no Redis.")
-    except Exception as e:
-        # Se salvar no cache falhar, apenas logamos
-        print(f"Erro ao salvar cache no Redis: {e}")
+    next_cursor = None
+    if len(itens_orm) > filtros.limit:
+        itens_orm = itens_orm[:filtros.limit]
+        next_cursor = itens_orm[-1].id
+
+    # Valida uma única vez (no MISS) e serializa no formato final da resposta
+    pagina = schema.CatalogoPagina(
+        itens=_catalogo_adapter.validate_python(itens_orm, from_attributes=True),
+        next_cursor=next_cursor
+    )
+    return pagina.model_dump_json().encode()
+
+
+async def _refresh_catalogo(
+    redis_client: aioredis.Redis,
+    version: int,
+    query_key: str,
+    filtros: schema.CatalogoFiltros
+) -> catalogo_cache.CachedBody:
+    """Renovação em segundo plano: usa a própria sessão (a da requisição já terá fechado)."""
+    async with async_session() as db:
+        body = await _build_catalogo_json(db, filtros)
+    return await catalogo_cache.set_cached_body(redis_client, version, query_key, body)
+
 
-    # 5. Retornar os dados serializados (lista de dicts)
-    return serializable_data
+async def get_catalogo_itens(
+    db: AsyncSession, 
+    redis_client: aioredis.Redis,
+    filtros: schema.CatalogoFiltros
+) -> catalogo_cache.CachedBody:
+    """
+    Busca uma página (filtrada) do catálogo já serializada (bytes JSON + ETag
+    + variantes gzip/brotli). Cada combinação de filtros tem a sua entrada,
+    todas sob a mesma versão do catálogo (invalidadas juntas).
+    
+    - L1 (memória): HIT custa no máximo um GET da versão no Redis
+      (ou nada, dentro de CATALOGO_VERSION_CHECK_SECONDS).
+    - L2 (Redis): guardado sob a versão atual do catálogo.
+    - MISS: busca no DB, serializa uma vez e preenche L1 e L2
+      (coalescido: uma reconstrução por chave, ver app/singleflight.py).
+    - Entrada vencida (TTL soft): servida na hora e renovada em segundo plano.
+    Nenhum caminho de HIT faz json.loads ou revalidação Pydantic.
+    """
+    query_key = catalogo_query_key(filtros)
+
+    version = await catalogo_cache.get_catalogo_version(redis_client)
+    if version is None:
+        # Sem Redis e sem versão conhecida: não dá para validar o cache
+        return catalogo_cache.make_cached_body(0, await _build_catalogo_json(db, filtros))
+
+    flight_key = f"catalogo:v{version}:{query_key}"
+
+    entry = await catalogo_cache.get_cached_body(redis_client, version, query_key)
+    if entry is not None:
+        if entry.is_stale:
+            # Serve o valor vencido (soft) agora e renova em segundo plano
+            refresh_in_background(
+                flight_key,
+                lambda: _refresh_catalogo(redis_client, version, query_key, filtros),
+                redis_client=redis_client
+            )
+        return entry
+
+    async def rebuild() -> catalogo_cache.CachedBody:
+        logger.info("Cache MISS do catálogo (versão %s, %s): buscando no PostgreSQL.", version, query_key)
+        body = await _build_catalogo_json(db, filtros)
+        return await catalogo_cache.set_cached_body(redis_client, version, query_key, body)
+
+    async def recheck() -> Optional[catalogo_cache.CachedBody]:
+        return await catalogo_cache.get_cached_body(redis_client, version, query_key)
+
+    # MISS simultâneos da mesma chave (neste e em outros workers) esperam
+    # uma única reconstrução em vez de repetirem a query
+    return await singleflight(
+        flight_key,
+        rebuild,
+        redis_client=redis_client,
+        recheck=recheck
+    )
 
 
 # --- Kits (MANTIDO) ---
 
+@cached(
+    "equipamentos:kits",
+    schema=List[schema.ShowKit],
+    tags=("kits", "kit_items_association", "catalogo_itens", "equipamentos", "categorias_equipamentos", "distribuidores")
+)
 async def get_all_kits(db: AsyncSession) -> List[models.Kit]:
+    # Carrega tudo o que o ShowKit exibe (sem lazy load no async)
     query = (
         select(models.Kit)
         .options(
             joinedload(models.Kit.distribuidor),
-            selectinload(models.Kit.itens).joinedload(models.CatalogoItem.equipamento),
+            selectinload(models.Kit.itens)
+                .joinedload(models.CatalogoItem.equipamento)
+                .joinedload(models.Equipamento.categoria),
+            selectinload(models.Kit.itens).joinedload(models.CatalogoItem.distribuidor),
         )
         .order_by(models.Kit.nome_kit)
     )
@@ -35,6 +35,11 @@ class StatusTransacao(str, enum.Enum):
 # 3. Tabela de Transações (para o alerta de pagamento)
 class Transacao(Base):
     __tablename__ = "transacoes"
+    __table_args__ = (
+        # Transações pendentes dos projetos de um cliente (resumo do cliente)
+        Index("ix_transacoes_projeto_status", "projeto_id", "status",
+              postgresql_include=["valor"]),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     descricao = Column(String(255), nullable=False)
@@ -1,11 +1,13 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 # Importações necessárias para o novo código
 from datetime import date
 
 from app.db import get_db
-from app.core.users.models import User
+from app.exports import FormatoExportacao, streaming_export
+from app.core.auth.schema import TokenPrincipal
 # Importa a dependência de permissão MÁXIMA
 from app.core.auth.dependencies import get_current_gestor
 from . import services, schema, models
@@ -32,7 +34,7 @@ async def get_configuracoes(
     # pois a Config é global (ID 1). Vou manter assim.
 ):
     '''Busca as configurações financeiras globais (margem, comissão).'''
-    return await services.get_configuracoes(db)
+    return await services.get_configuracoes_cached(db)
 
 
 @router.put(
@@ -58,6 +60,18 @@ async def get_all_transacoes(db: AsyncSession = Depends(get_db)):
     return await services.get_all_transacoes(db)
 
 
+@router.get(
+    '/transacoes/exportar', 
+    response_class=StreamingResponse,
+    summary="Exporta as transações financeiras (CSV ou NDJSON)"
+)
+async def exportar_transacoes(formato: FormatoExportacao = Query(FormatoExportacao.CSV)):
+    '''Exporta todas as transações em streaming (sem carregar a lista na memória).'''
+    return streaming_export(
+        "transacoes", formato, services.TRANSACOES_EXPORT_COLUNAS, services.stream_transacoes_export
+    )
+
+
 @router.post(
     '/transacoes/{transacao_id}/marcar-pago', 
     response_model=schema.ShowTransacao,
@@ -90,7 +104,7 @@ async def marcar_como_pago(
 async def calcular_preco_sistema(
     calculo_request: schema.CalculoPrecosRequest,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """
     Calcula o preço final de um sistema solar com base nos inputs:
@@ -116,7 +130,7 @@ async def listar_premissas(
     ativa: Optional[bool] = Query(None, alias="ativa_apenas", description="Filtrar apenas premissas ativas"),
     data: Optional[date] = Query(None, description="Filtrar premissas vigentes na data (ex: 2025-11-01)"),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Lista todas as premissas de preço da empresa, com filtros opcionais."""
     return await services.listar_premissas(db, user, ativa_apenas=ativa, data=data)
@@ -131,7 +145,7 @@ async def listar_premissas(
 async def criar_premissa(
     premissa_create: schema.PremissaCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """
     Cria uma nova premissa de preço.
@@ -149,7 +163,7 @@ async def criar_premissa(
 async def get_premissa(
     premissa_id: int,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Retorna uma premissa específica com todas as suas faixas e regiões."""
     return await services.get_premissa_by_id(db, premissa_id, user)
@@ -164,7 +178,7 @@ async def update_premissa(
     premissa_id: int,
     premissa_update: schema.PremissaUpdate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """
     Atualiza os dados principais de uma premissa (nome, vigência, ativa).
@@ -183,7 +197,7 @@ async def update_premissa(
 async def delete_premissa(
     premissa_id: int,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """
     Deleta uma premissa.
@@ -206,7 +220,7 @@ async def adicionar_faixa_premissa(
     premissa_id: int,
     faixa_create: schema.PremissaFaixaCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Adiciona uma nova faixa (ex: 8-12kW) a uma premissa existente."""
     return await services.adicionar_faixa(db, premissa_id, user, faixa_create)
@@ -222,7 +236,7 @@ async def update_faixa_premissa(
     faixa_id: int,
     faixa_update: schema.PremissaFaixaCreate, # Reutiliza o schema de criação
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Atualiza os dados de uma faixa de preço específica."""
     return await services.atualizar_faixa(db, premissa_id, faixa_id, user, faixa_update)
@@ -237,7 +251,7 @@ async def delete_faixa_premissa(
     premissa_id: int,
     faixa_id: int,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Remove uma faixa de preço de uma premissa."""
     await services.deletar_faixa(db, premissa_id, faixa_id, user)
@@ -256,7 +270,7 @@ async def adicionar_regiao_premissa(
     premissa_id: int,
     regiao_create: schema.PremissaPorRegiaoCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Adiciona uma alíquota de imposto para uma região (ex: "MG", 0.18)"""
     return await services.adicionar_regiao(db, premissa_id, user, regiao_create)
@@ -272,7 +286,7 @@ async def update_regiao_premissa(
     regiao_id: int,
     regiao_update: schema.PremissaPorRegiaoCreate,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Atualiza a alíquota ou observações de uma região."""
     return await services.atualizar_regiao(db, premissa_id, regiao_id, user, regiao_update)
@@ -287,7 +301,7 @@ async def delete_regiao_premissa(
     premissa_id: int,
     regiao_id: int,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_gestor)
+    user: TokenPrincipal = Depends(get_current_gestor)
 ):
     """Remove uma configuração de imposto por região de uma premissa."""
     await services.deletar_regiao(db, premissa_id, regiao_id, user)
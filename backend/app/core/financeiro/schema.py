@@ -177,4 +177,62 @@ class CalculoPrecosResponse(BaseModel):
     # Detalhes
     detalhes: Dict[str, Any] = Field(description="Valores intermediários e overrides utilizados")
 
+# --- Índice compilado de premissas (cache do cálculo de preço) ---
+# Todas as premissas de uma empresa, já prontas para consulta em memória:
+# faixas ordenadas por potência e regiões indexadas pela sigla (maiúscula).
+
+class FaixaCompilada(BaseModel):
+    nome_faixa: Optional[str] = None
+    potencia_min: float
+    potencia_max: float
+    preco_unitario: Decimal
+    model_config = ConfigDict(from_attributes=True)
+
+class RegiaoCompilada(BaseModel):
+    regiao: str
+    aliquota_imposto: float
+    model_config = ConfigDict(from_attributes=True)
+
+class PremissaCompilada(BaseModel):
+    id: int
+    nome: str
+    data_vigencia_inicio: date
+    data_vigencia_fim: date
+    ativa: bool
+    faixas: List[FaixaCompilada] = [] # Ordenadas por potencia_min
+    regioes: Dict[str, RegiaoCompilada] = {} # Chave: regiao.upper()
+    model_config = ConfigDict(from_attributes=True)
+
+    def encontrar_faixa(self, potencia: float) -> Optional[FaixaCompilada]:
+        """Faixa de preço aplicável para a potência (em kW)."""
+        for faixa in self.faixas:
+            if faixa.potencia_min > potencia:
+                break
+            if potencia <= faixa.potencia_max:
+                return faixa
+        return None
+
+    def encontrar_regiao(self, regiao: str) -> Optional[RegiaoCompilada]:
+        return self.regioes.get(regiao.upper())
+
+class IndicePremissas(BaseModel):
+    empresa_id: int
+    premissas: List[PremissaCompilada] = [] # Ordenadas por data_vigencia_fim (mais recentes primeiro)
+
+    def por_id(self, premissa_id: int) -> Optional[PremissaCompilada]:
+        for premissa in self.premissas:
+            if premissa.id == premissa_id:
+                return premissa
+        return None
+
+    def ativa_em(self, data_calculo: date) -> Optional[PremissaCompilada]:
+        """Premissa ativa mais recente vigente na data."""
+        for premissa in self.premissas:
+            if (
+                premissa.ativa
+                and premissa.data_vigencia_inicio <= data_calculo <= premissa.data_vigencia_fim
+            ):
+                return premissa
+        return None
+
 # --- FIM DO NOVO CÓDIGO DA FEATURE DE PREMISSAS ---
\ No newline at end of file
@@ -3,15 +3,21 @@ from sqlalchemy.future import select
 from sqlalchemy import and_, or_, delete, update
 from sqlalchemy.orm import selectinload
 from datetime import date, datetime, timedelta
-from typing import List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from decimal import Decimal
 
 from fastapi import HTTPException, status
 
 from . import models, schema
+from app.cache_events import notify_change
+from app.exports import stream_rows
+from app.service_cache import cached, invalidate_tags
 from app.core.sales.propostas.models import Proposta # Para calcular comissão
-# Importação necessária para o novo código
-from app.core.users.models import User 
+# Principal do token (id/role), suficiente para o multi-tenancy por empresa_id
+from app.core.auth.schema import TokenPrincipal
+
+# --- Cache da configuração (singleton) ---
+CONFIGURACAO_CACHE_TAGS = ("configuracoes_financeiras",)
 
 async def get_configuracoes(db: AsyncSession) -> models.ConfiguracaoFinanceira:
     '''Busca as configurações financeiras (ou cria se não existirem)'''
@@ -24,9 +30,20 @@ async def get_configuracoes(db: AsyncSession) -> models.ConfiguracaoFinanceira:
         config = models.ConfiguracaoFinanceira()
         db.add(config)
         await db.commit()
+        await invalidate_tags(*CONFIGURACAO_CACHE_TAGS)
+        await notify_change(db, "configuracoes_financeiras", 1)
         await db.refresh(config)
     return config
 
+@cached(
+    "financeiro:configuracoes",
+    schema=schema.ShowConfiguracaoFinanceira,
+    tags=CONFIGURACAO_CACHE_TAGS
+)
+async def get_configuracoes_cached(db: AsyncSession) -> models.ConfiguracaoFinanceira:
+    '''Configurações financeiras para leitura (cacheadas em L1/L2)'''
+    return await get_configuracoes(db)
+
 async def update_configuracoes(
     db: AsyncSession, 
     config_update: schema.UpdateConfiguracaoFinanceira
@@ -38,6 +55,8 @@ async def update_configuracoes(
     config.percentual_comissao_padrao = config_update.percentual_comissao_padrao
     
     await db.commit()
+    await invalidate_tags(*CONFIGURACAO_CACHE_TAGS)
+    await notify_change(db, "configuracoes_financeiras", config.id)
     await db.refresh(config)
     return config
 
@@ -67,6 +86,16 @@ async def get_all_transacoes(db: AsyncSession) -> List[models.Transacao]:
     result = await db.execute(query)
     return result.scalars().all()
 
+TRANSACOES_EXPORT_COLUNAS = [
+    "id", "descricao", "valor", "tipo", "status", "data_criacao",
+    "data_vencimento", "data_pagamento", "projeto_id", "vendedor_id",
+]
+
+def stream_transacoes_export(db: AsyncSession) -> AsyncIterator[Dict[str, Any]]:
+    '''Gera todas as transações (apenas as colunas exportadas), por id'''
+    colunas = [getattr(models.Transacao, c) for c in TRANSACOES_EXPORT_COLUNAS]
+    return stream_rows(db, select(*colunas).order_by(models.Transacao.id))
+
 async def get_transacao_by_id(db: AsyncSession, transacao_id: int) -> Optional[models.Transacao]:
     query = select(models.Transacao).where(models.Transacao.id == transacao_id)
     result = await db.execute(query)
@@ -138,7 +167,7 @@ def _validar_sobreposicao_faixas(faixas: List[schema.PremissaFaixaCreate]) -> bo
 
 # --- Helpers de Busca (CRUD) ---
 
-async def get_premissa_by_id(db: AsyncSession, premissa_id: int, user: User) -> models.Premissa:
+async def get_premissa_by_id(db: AsyncSession, premissa_id: int, user: TokenPrincipal) -> models.Premissa:
     """Busca uma premissa pelo ID, garantindo que pertença ao usuário (empresa)."""
     query = (
         select(models.Premissa)
@@ -155,7 +184,7 @@ async def get_premissa_by_id(db: AsyncSession, premissa_id: int, user: User) ->
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Premissa não encontrada.")
     return premissa
 
-async def get_faixa_by_id(db: AsyncSession, premissa_id: int, faixa_id: int, user: User) -> models.PremissaFaixa:
+async def get_faixa_by_id(db: AsyncSession, premissa_id: int, faixa_id: int, user: TokenPrincipal) -> models.PremissaFaixa:
     """Busca uma faixa de premissa pelo ID, garantindo que pertença à premissa e ao usuário."""
     # Garante que a premissa pai pertence ao usuário
     premissa = await get_premissa_by_id(db, premissa_id, user)
@@ -171,7 +200,7 @@ async def get_faixa_by_id(db: AsyncSession, premissa_id: int, faixa_id: int, use
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Faixa da premissa não encontrada.")
     return faixa
 
-async def get_regiao_by_id(db: AsyncSession, premissa_id: int, regiao_id: int, user: User) -> models.PremissaPorRegiao:
+async def get_regiao_by_id(db: AsyncSession, premissa_id: int, regiao_id: int, user: TokenPrincipal) -> models.PremissaPorRegiao:
     """Busca uma região de premissa pelo ID, garantindo que pertença à premissa e ao usuário."""
     premissa = await get_premissa_by_id(db, premissa_id, user)
     
@@ -196,11 +225,29 @@ async def get_regiao_by_nome_e_premissa(db: AsyncSession, premissa_id: int, regi
     return result.scalars().first()
 
 
+# --- Cache das premissas ---
+# 'listar_premissas' é cacheada por empresa e filtros; qualquer escrita em
+# premissas, faixas ou regiões invalida todas as listagens (ver app/service_cache.py).
+PREMISSA_CACHE_TAGS = ("premissas", "premissas_faixas", "premissas_por_regiao")
+
+async def _invalidar_cache_premissas(db: AsyncSession, premissa_id: Optional[int]):
+    """Chame após o commit de qualquer escrita em premissas, faixas ou regiões."""
+    await invalidate_tags(*PREMISSA_CACHE_TAGS)
+    await notify_change(db, "premissas", premissa_id)
+
+
 # --- Serviços de Premissa (CRUD) ---
 
+@cached(
+    "financeiro:premissas",
+    schema=List[schema.ShowPremissa],
+    tags=PREMISSA_CACHE_TAGS,
+    # Só o id da empresa importa (o principal também carrega role/versão do token)
+    key=lambda db, user, ativa_apenas=False, data=None: f"{user.id}:{ativa_apenas}:{data}"
+)
 async def listar_premissas(
     db: AsyncSession, 
-    user: User, 
+    user: TokenPrincipal, 
     ativa_apenas: bool = False, 
     data: Optional[date] = None
 ) -> List[models.Premissa]:
@@ -225,12 +272,13 @@ async def listar_premissas(
     query = query.order_by(models.Premissa.data_vigencia_fim.desc())
     
     result = await db.execute(query)
-    return result.scalars().all()
+    # unique(): faixas/regiões vêm por joined eager load (lazy="joined")
+    return result.unique().scalars().all()
 
 
 async def criar_premissa(
     db: AsyncSession, 
-    user: User, 
+    user: TokenPrincipal, 
     premissa_create: schema.PremissaCreate
 ) -> models.Premissa:
     """Cria uma nova premissa com suas faixas e regiões aninhadas."""
@@ -257,6 +305,7 @@ async def criar_premissa(
 
     try:
         await db.commit()
+        await _invalidar_cache_premissas(db, db_premissa.id)
         await db.refresh(db_premissa)
         return db_premissa
     except Exception as e:
@@ -270,7 +319,7 @@ async def criar_premissa(
 async def atualizar_premissa(
     db: AsyncSession, 
     premissa_id: int, 
-    user: User, 
+    user: TokenPrincipal, 
     premissa_update: schema.PremissaUpdate
 ) -> models.Premissa:
     """Atualiza os dados principais de uma premissa (não atualiza faixas/regiões)."""
@@ -290,6 +339,7 @@ async def atualizar_premissa(
     
     try:
         await db.commit()
+        await _invalidar_cache_premissas(db, premissa_id)
         await db.refresh(db_premissa)
         return db_premissa
     except Exception as e:
@@ -299,12 +349,13 @@ async def atualizar_premissa(
             detail=f"Erro ao atualizar premissa: {e}"
         )
 
-async def deletar_premissa(db: AsyncSession, premissa_id: int, user: User) -> bool:
+async def deletar_premissa(db: AsyncSession, premissa_id: int, user: TokenPrincipal) -> bool:
     """Deleta uma premissa (e suas faixas/regiões via cascade)."""
     db_premissa = await get_premissa_by_id(db, premissa_id, user)
     
     await db.delete(db_premissa)
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     return True
 
 
@@ -313,7 +364,7 @@ async def deletar_premissa(db: AsyncSession, premissa_id: int, user: User) -> bo
 async def adicionar_faixa(
     db: AsyncSession, 
     premissa_id: int, 
-    user: User, 
+    user: TokenPrincipal, 
     faixa_create: schema.PremissaFaixaCreate
 ) -> models.PremissaFaixa:
     """Adiciona uma nova faixa a uma premissa existente."""
@@ -332,6 +383,7 @@ async def adicionar_faixa(
     
     db.add(db_faixa)
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     await db.refresh(db_faixa)
     return db_faixa
 
@@ -339,7 +391,7 @@ async def atualizar_faixa(
     db: AsyncSession, 
     premissa_id: int, 
     faixa_id: int, 
-    user: User, 
+    user: TokenPrincipal, 
     faixa_update: schema.PremissaFaixaCreate # Reusa o Create schema
 ) -> models.PremissaFaixa:
     """Atualiza uma faixa existente."""
@@ -357,14 +409,16 @@ async def atualizar_faixa(
         setattr(db_faixa, key, value)
 
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     await db.refresh(db_faixa)
     return db_faixa
     
-async def deletar_faixa(db: AsyncSession, premissa_id: int, faixa_id: int, user: User) -> bool:
+async def deletar_faixa(db: AsyncSession, premissa_id: int, faixa_id: int, user: TokenPrincipal) -> bool:
     """Deleta uma faixa de uma premissa."""
     db_faixa = await get_faixa_by_id(db, premissa_id, faixa_id, user)
     await db.delete(db_faixa)
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     return True
 
 # --- Serviços de Regiões (Sub-CRUD) ---
@@ -372,7 +426,7 @@ async def deletar_faixa(db: AsyncSession, premissa_id: int, faixa_id: int, user:
 async def adicionar_regiao(
     db: AsyncSession, 
     premissa_id: int, 
-    user: User, 
+    user: TokenPrincipal, 
     regiao_create: schema.PremissaPorRegiaoCreate
 ) -> models.PremissaPorRegiao:
     """Adiciona uma nova região (alíquota) a uma premissa."""
@@ -393,6 +447,7 @@ async def adicionar_regiao(
     
     db.add(db_regiao)
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     await db.refresh(db_regiao)
     return db_regiao
 
@@ -400,7 +455,7 @@ async def atualizar_regiao(
     db: AsyncSession, 
     premissa_id: int, 
     regiao_id: int, 
-    user: User, 
+    user: TokenPrincipal, 
     regiao_update: schema.PremissaPorRegiaoCreate # Reusa o Create
 ) -> models.PremissaPorRegiao:
     """Atualiza uma configuração de região."""
@@ -420,14 +475,16 @@ async def atualizar_regiao(
         setattr(db_regiao, key, value)
 
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     await db.refresh(db_regiao)
     return db_regiao
 
-async def deletar_regiao(db: AsyncSession, premissa_id: int, regiao_id: int, user: User) -> bool:
+async def deletar_regiao(db: AsyncSession, premissa_id: int, regiao_id: int, user: TokenPrincipal) -> bool:
     """Deleta uma configuração de região."""
     db_regiao = await get_regiao_by_id(db, premissa_id, regiao_id, user)
     await db.delete(db_regiao)
     await db.commit()
+    await _invalidar_cache_premissas(db, premissa_id)
     return True
 
 
@@ -447,9 +504,48 @@ async def encontrar_faixa(
     result = await db.execute(query)
     return result.scalars().first()
 
+def _compilar_premissa(premissa: models.Premissa) -> dict:
+    """Converte uma premissa (ORM, com faixas e regiões) para o formato do índice."""
+    return {
+        "id": premissa.id,
+        "nome": premissa.nome,
+        "data_vigencia_inicio": premissa.data_vigencia_inicio,
+        "data_vigencia_fim": premissa.data_vigencia_fim,
+        "ativa": premissa.ativa,
+        "faixas": sorted(
+            premissa.faixas,
+            key=lambda f: (f.potencia_min, f.ordem or 0, f.id)
+        ),
+        "regioes": {r.regiao.upper(): r for r in premissa.regioes},
+    }
+
+@cached(
+    "financeiro:indice_premissas",
+    schema=schema.IndicePremissas,
+    tags=PREMISSA_CACHE_TAGS,
+    key=lambda db, empresa_id: str(empresa_id)
+)
+async def get_indice_premissas(db: AsyncSession, empresa_id: int) -> dict:
+    """
+    Índice compilado de TODAS as premissas da empresa (uma query, cacheado
+    em L1/L2 e invalidado por qualquer escrita em premissas/faixas/regiões).
+    O cálculo de preço consulta premissa, faixa e região em memória.
+    """
+    query = (
+        select(models.Premissa)
+        .where(models.Premissa.empresa_id == empresa_id)
+        .order_by(models.Premissa.data_vigencia_fim.desc(), models.Premissa.id.desc())
+    )
+    result = await db.execute(query)
+    premissas = result.unique().scalars().all()
+    return {
+        "empresa_id": empresa_id,
+        "premissas": [_compilar_premissa(p) for p in premissas],
+    }
+
 async def get_premissa_ativa_recente(
     db: AsyncSession, 
-    user: User, 
+    user: TokenPrincipal, 
     data_calculo: date
 ) -> Optional[models.Premissa]:
     """Busca a premissa ativa mais recente baseada na data de cálculo."""
@@ -470,7 +566,7 @@ async def get_premissa_ativa_recente(
 
 async def calcular_preco(
     db: AsyncSession, 
-    user: User, 
+    user: TokenPrincipal, 
     calculo_request: schema.CalculoPrecosRequest
 ) -> schema.CalculoPrecosResponse:
     """
@@ -478,17 +574,24 @@ async def calcular_preco(
     baseado nas premissas e overrides.
     """
     
-    # 1. Obter Configurações Globais (Margem/Comissão Padrão)
-    config_global = await get_configuracoes(db)
+    # 1. Obter Configurações Globais (Margem/Comissão Padrão) - cacheadas
+    config_global = await get_configuracoes_cached(db)
     
-    # 2. Obter Premissa
+    # 2. Obter Premissa (do índice compilado da empresa, em memória)
+    indice = await get_indice_premissas(db, user.id)
     premissa = None
     if calculo_request.premissa_id:
         # Busca por ID (ignora data e status 'ativa')
-        premissa = await get_premissa_by_id(db, calculo_request.premissa_id, user)
+        premissa = indice.por_id(calculo_request.premissa_id)
+        if not premissa:
+            # Fora do índice: confere no DB (404 se não existir ou não for da empresa)
+            premissa = schema.PremissaCompilada.model_validate(
+                _compilar_premissa(await get_premissa_by_id(db, calculo_request.premissa_id, user)),
+                from_attributes=True
+            )
     else:
         # Busca automática (ativa e vigente na data)
-        premissa = await get_premissa_ativa_recente(db, user, calculo_request.data)
+        premissa = indice.ativa_em(calculo_request.data)
         if not premissa:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -499,7 +602,7 @@ async def calcular_preco(
     # Convertemos kW (ex: 5.5) para Wp (ex: 5500) para o cálculo base
     potencia_wp = Decimal(str(calculo_request.potencia_kw * 1000))
     
-    faixa = await encontrar_faixa(db, premissa.id, calculo_request.potencia_kw)
+    faixa = premissa.encontrar_faixa(calculo_request.potencia_kw)
     if not faixa:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -507,7 +610,7 @@ async def calcular_preco(
         )
         
     # 4. Obter Configuração de Região (Imposto)
-    regiao_config = await get_regiao_by_nome_e_premissa(db, premissa.id, calculo_request.regiao)
+    regiao_config = premissa.encontrar_regiao(calculo_request.regiao)
     if not regiao_config and not calculo_request.imposto_override:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, Enum as SAEnum, ForeignKey, Numeric, Float
+from sqlalchemy import Column, Integer, String, Enum as SAEnum, ForeignKey, Numeric, Float, Index
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -14,6 +14,11 @@ class ProjetoStatus(str, enum.Enum):
 # 2. Define a tabela "projetos"
 class Projeto(Base):
     __tablename__ = "projetos"
+    __table_args__ = (
+        # Resumo do cliente (clientes.services.get_cliente_resumo): index-only scan
+        Index("ix_projetos_cliente_status", "cliente_id", "status",
+              postgresql_include=["valor_total"]),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     nome = Column(String(255), nullable=False) # Ex: "João Silva Residencial"
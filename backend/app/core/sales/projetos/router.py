@@ -3,9 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.core.users.models import User, UserRole
+from app.core.users.models import UserRole
+from app.core.auth.schema import TokenPrincipal
 # Importa as dependências de permissão
-from app.core.auth.dependencies import get_current_user, get_current_gestor
+from app.core.auth.dependencies import get_token_principal, get_current_gestor
 from . import services, schema, models
 
 router = APIRouter(tags=['Projetos'], prefix='/projetos')
@@ -19,7 +20,7 @@ async def create_projeto(
     projeto: schema.ProjetoCreate,
     db: AsyncSession = Depends(get_db),
     # Permissão: Apenas Gestores podem criar projetos
-    gestor: User = Depends(get_current_gestor)
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
     '''Cria um novo projeto no sistema'''
     return await services.create_projeto(db, projeto)
@@ -28,7 +29,7 @@ async def create_projeto(
 @router.get('/', response_model=List[schema.ShowProjeto])
 async def get_projetos_lista(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''
     Lista os projetos.
@@ -48,7 +49,7 @@ async def get_projetos_lista(
 async def get_projeto_detalhe(
     projeto_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''Busca um projeto específico pelo ID'''
     projeto = await services.get_projeto_by_id(db, projeto_id)
@@ -1,6 +1,6 @@
 import enum
 # Imports atualizados
-from sqlalchemy import Column, Integer, String, Enum as SAEnum, ForeignKey, Numeric, DateTime, JSON, Float
+from sqlalchemy import Column, Integer, String, Enum as SAEnum, ForeignKey, Numeric, DateTime, JSON, Float, Index
 from sqlalchemy.sql import func 
 from sqlalchemy.orm import relationship
 from app.db import Base
@@ -40,6 +40,16 @@ class PropostaItem(Base):
 
 class Proposta(Base):
     __tablename__ = "propostas"
+    __table_args__ = (
+        # Resumo do cliente (clientes.services.get_cliente_resumo): index-only scan
+        Index("ix_propostas_cliente_status", "cliente_id", "status",
+              postgresql_include=["valor_total", "vendedor_id"]),
+        # Listagem paginada por id decrescente (services._filtrar_propostas):
+        # a visão do vendedor e o filtro por status percorrem o índice já na ordem
+        Index("ix_propostas_vendedor_id_id", "vendedor_id", "id"),
+        Index("ix_propostas_status_id", "status", "id"),
+        Index("ix_propostas_cliente_id_id", "cliente_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -1,11 +1,17 @@
 # Em app/core/sales/propostas/router.py
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import config
 from app.db import get_db
-from app.core.users.models import User, UserRole
-from app.core.auth.dependencies import get_current_user # A dependência de login
+from app.exports import FormatoExportacao, streaming_export
+from app.core.users.models import UserRole
+from app.core.auth.schema import TokenPrincipal
+from app.core.auth.dependencies import get_token_principal # A dependência de login (sem DB)
 from . import services, schema, models
 
 router = APIRouter(tags=['Propostas'], prefix='/propostas')
@@ -20,35 +26,99 @@ async def create_proposta(
     proposta: schema.PropostaCreate,
     db: AsyncSession = Depends(get_db),
     # Qualquer usuário logado (Gestor ou Vendedor) pode criar
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''Cria uma nova proposta comercial'''
     # A proposta é criada em nome do usuário logado
     return await services.create_proposta(db, proposta, current_user.id)
 
 
-@router.get('/', response_model=List[schema.ShowProposta])
+def get_filtros_propostas(
+    status_proposta: Optional[List[models.PropostaStatus]] = Query(None, alias="status", description="Um ou mais status"),
+    vendedor_id: Optional[int] = Query(None, description="Apenas para Gestores"),
+    cliente_id: Optional[int] = Query(None),
+    atualizada_de: Optional[datetime] = Query(None, description="data_atualizacao a partir de"),
+    atualizada_ate: Optional[datetime] = Query(None, description="data_atualizacao até"),
+    valor_min: Optional[Decimal] = Query(None, ge=0),
+    valor_max: Optional[Decimal] = Query(None, ge=0),
+    current_user: TokenPrincipal = Depends(get_token_principal)
+) -> schema.FiltroPropostas:
+    '''Filtros comuns às listagens; o vendedor sempre vê apenas as suas propostas'''
+    if atualizada_de and atualizada_ate and atualizada_de > atualizada_ate:
+        raise HTTPException(status_code=400, detail="'atualizada_de' deve ser anterior a 'atualizada_ate'.")
+    if valor_min is not None and valor_max is not None and valor_min > valor_max:
+        raise HTTPException(status_code=400, detail="'valor_min' deve ser menor ou igual a 'valor_max'.")
+    if current_user.role != UserRole.GESTOR:
+        vendedor_id = current_user.id
+    return schema.FiltroPropostas(
+        status=status_proposta,
+        vendedor_id=vendedor_id,
+        cliente_id=cliente_id,
+        atualizada_de=atualizada_de,
+        atualizada_ate=atualizada_ate,
+        valor_min=valor_min,
+        valor_max=valor_max,
+    )
+
+
+@router.get('/', response_model=schema.PropostasCompletasPagina)
 async def get_propostas_lista(
+    limit: int = Query(config.PROPOSTAS_PAGE_SIZE, ge=1, le=config.PROPOSTAS_MAX_PAGE_SIZE, description="Propostas por página"),
+    cursor: Optional[int] = Query(None, description="'next_cursor' recebido na página anterior"),
+    filtros: schema.FiltroPropostas = Depends(get_filtros_propostas),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''
-    Lista as propostas.
+    Lista as propostas (mais recentes primeiro), paginadas e com filtros opcionais.
     - Gestor: Vê todas as propostas.
-    - Vendedor: Vê apenas as suas propostas.
+    - Vendedor: Vê apenas as suas propostas (filtro aplicado em get_filtros_propostas).
+    Para a próxima página, envie o "next_cursor" da resposta como "cursor";
+    "next_cursor" nulo indica a última página.
     '''
-    
-    if current_user.role == UserRole.GESTOR:
-        return await services.get_all_propostas(db)
+    return await services.get_propostas_pagina(db, filtros=filtros, limit=limit, cursor=cursor)
+
+
+@router.get('/resumo', response_model=schema.PropostasPagina)
+async def get_propostas_resumo(
+    limit: int = Query(config.PROPOSTAS_PAGE_SIZE, ge=1, le=config.PROPOSTAS_MAX_PAGE_SIZE, description="Propostas por página"),
+    cursor: Optional[int] = Query(None, description="'next_cursor' recebido na página anterior"),
+    filtros: schema.FiltroPropostas = Depends(get_filtros_propostas),
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_token_principal)
+):
+    '''
+    Listagem resumida e paginada (mais recentes primeiro): apenas id, nome,
+    status, valor total, cliente e vendedor. Os itens ficam no detalhe.
+    - Gestor: todas as propostas. Vendedor: apenas as suas.
+    - Filtros: status, vendedor_id, cliente_id, período de atualização e faixa de valor.
+    '''
+    return await services.get_propostas_resumo(db, filtros=filtros, limit=limit, cursor=cursor)
+
+
+@router.get('/exportar', response_class=StreamingResponse)
+async def exportar_propostas(
+    formato: FormatoExportacao = Query(FormatoExportacao.CSV),
+    current_user: TokenPrincipal = Depends(get_token_principal)
+):
+    '''
+    Exporta as propostas com os seus itens, em streaming.
+    - CSV: uma linha por item. NDJSON: uma linha por proposta (itens aninhados).
+    - Gestor: todas as propostas. Vendedor: apenas as suas.
+    '''
+    vendedor_id = None if current_user.role == UserRole.GESTOR else current_user.id
+    if formato == FormatoExportacao.CSV:
+        linhas = lambda db: services.stream_propostas_export(db, vendedor_id)
     else:
-        return await services.get_propostas_por_vendedor(db, current_user.id)
+        linhas = lambda db: services.stream_propostas_export_aninhado(db, vendedor_id)
+    return streaming_export("propostas", formato, services.EXPORT_COLUNAS, linhas)
 
 
 @router.get('/{proposta_id}', response_model=schema.ShowProposta)
 async def get_proposta_detalhe(
     proposta_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''Busca uma proposta específica pelo ID (com todos os seus itens)'''
     proposta = await services.get_proposta_by_id(db, proposta_id)
@@ -76,7 +146,7 @@ async def salvar_dimensionamento(
     proposta_id: int,
     data: schema.PropostaUpdateDimensionamento,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''
     Salva os dados da Etapa 1 (kit, premissas) e gera a lista 
@@ -105,7 +175,7 @@ async def salvar_custos(
     proposta_id: int,
     data: schema.PropostaUpdateItens,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenPrincipal = Depends(get_token_principal)
 ):
     '''
     Recebe a lista de itens de custo editada (Etapa 2) 
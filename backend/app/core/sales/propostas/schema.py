@@ -1,5 +1,6 @@
 
 from pydantic import BaseModel, ConfigDict
+from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional, Any
 from .models import PropostaStatus, PropostaItem
@@ -50,6 +51,36 @@ class ShowProposta(PropostaBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Linha da listagem resumida (GET /propostas/resumo): sem itens nem objetos aninhados
+class PropostaResumo(BaseModel):
+    id: int
+    nome: Optional[str] = None
+    status: PropostaStatus
+    valor_total: Decimal
+    cliente_nome: str
+    vendedor_nome: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Filtros da listagem (GET /propostas/ e /propostas/resumo); None = sem filtro
+class FiltroPropostas(BaseModel):
+    status: Optional[List[PropostaStatus]] = None
+    vendedor_id: Optional[int] = None
+    cliente_id: Optional[int] = None
+    atualizada_de: Optional[datetime] = None  # data_atualizacao >=
+    atualizada_ate: Optional[datetime] = None # data_atualizacao <=
+    valor_min: Optional[Decimal] = None
+    valor_max: Optional[Decimal] = None
+
+class PropostasPagina(BaseModel):
+    itens: List[PropostaResumo]
+    next_cursor: Optional[int] = None # Nulo na última página
+
+# Página de GET /propostas/ (propostas completas, com itens)
+class PropostasCompletasPagina(BaseModel):
+    itens: List[ShowProposta]
+    next_cursor: Optional[int] = None # Nulo na última página
+
 # Schema para atualizar o status (continua o mesmo)
 class PropostaUpdateStatus(BaseModel):
     status: PropostaStatus
@@ -2,11 +2,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload, selectinload # Adicionar selectinload
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 from decimal import Decimal # Adicionar Decimal
 
+from app import config
 from . import models, schema
 from app.core.users.models import User
+from app.core.clientes.models import Cliente
+from app.exports import stream_rows
 # Importar o modelo do Kit para buscar o custo
 # (Kit não é mais necessário aqui, a menos que outros serviços o usem)
 # from app.core.equipamentos.models import Kit 
@@ -53,8 +56,43 @@ async def get_proposta_by_id(db: AsyncSession, proposta_id: int) -> Optional[mod
     result = await db.execute(query)
     return result.scalars().first()
 
-async def get_all_propostas(db: AsyncSession) -> List[models.Proposta]:
-    '''Lista todas as propostas (para Gestores)'''
+# --- Filtros e paginação da listagem ---
+# Todas as listagens ordenam por id decrescente; o cursor é o id da última
+# proposta recebida ('id < cursor'). Os índices (vendedor_id, id),
+# (status, id) e (cliente_id, id) entregam as linhas já nessa ordem quando
+# a listagem é filtrada por vendedor, status ou cliente.
+
+def _filtrar_propostas(query, filtros: Optional[schema.FiltroPropostas], cursor: Optional[int]):
+    if cursor is not None:
+        query = query.where(models.Proposta.id < cursor)
+    if filtros is None:
+        return query
+    if filtros.status:
+        query = query.where(models.Proposta.status.in_(filtros.status))
+    if filtros.vendedor_id is not None:
+        query = query.where(models.Proposta.vendedor_id == filtros.vendedor_id)
+    if filtros.cliente_id is not None:
+        query = query.where(models.Proposta.cliente_id == filtros.cliente_id)
+    if filtros.atualizada_de is not None:
+        query = query.where(models.Proposta.data_atualizacao >= filtros.atualizada_de)
+    if filtros.atualizada_ate is not None:
+        query = query.where(models.Proposta.data_atualizacao <= filtros.atualizada_ate)
+    if filtros.valor_min is not None:
+        query = query.where(models.Proposta.valor_total >= filtros.valor_min)
+    if filtros.valor_max is not None:
+        query = query.where(models.Proposta.valor_total <= filtros.valor_max)
+    return query
+
+async def get_propostas_pagina(
+    db: AsyncSession,
+    filtros: Optional[schema.FiltroPropostas] = None,
+    limit: int = config.PROPOSTAS_PAGE_SIZE,
+    cursor: Optional[int] = None
+) -> schema.PropostasCompletasPagina:
+    '''
+    Lista uma página de propostas completas (com cliente, vendedor e itens).
+    A visão do vendedor é o filtro 'vendedor_id'.
+    '''
     query = (
         select(models.Proposta)
         .options(
@@ -64,23 +102,137 @@ async def get_all_propostas(db: AsyncSession) -> List[models.Proposta]:
         )
         .order_by(models.Proposta.id.desc())
     )
-    result = await db.execute(query)
-    return result.scalars().all()
+    query = _filtrar_propostas(query, filtros, cursor)
+
+    # Busca 1 proposta a mais para saber se existe próxima página
+    result = await db.execute(query.limit(limit + 1))
+    propostas = result.scalars().all()
+
+    next_cursor = None
+    if len(propostas) > limit:
+        propostas = propostas[:limit]
+        next_cursor = propostas[-1].id
+
+    return schema.PropostasCompletasPagina(
+        itens=[schema.ShowProposta.model_validate(p) for p in propostas],
+        next_cursor=next_cursor
+    )
 
-async def get_propostas_por_vendedor(db: AsyncSession, vendedor_id: int) -> List[models.Proposta]:
-    '''Lista propostas de um vendedor específico'''
+# --- Listagem resumida (keyset) ---
+# Uma única consulta com apenas as colunas exibidas na listagem (proposta +
+# nome do cliente + nome do vendedor): sem carregar itens, User e Cliente
+# completos para cada proposta. Os itens só são lidos no detalhe
+# (get_proposta_by_id). Paginação por id decrescente: o cursor é o id da
+# última proposta recebida (usa o índice da chave primária).
+
+async def get_propostas_resumo(
+    db: AsyncSession,
+    filtros: Optional[schema.FiltroPropostas] = None,
+    limit: int = config.PROPOSTAS_PAGE_SIZE,
+    cursor: Optional[int] = None
+) -> schema.PropostasPagina:
+    '''
+    Lista uma página de propostas (mais recentes primeiro). Para a próxima
+    página, envie o 'next_cursor' retornado como 'cursor'.
+    '''
     query = (
-        select(models.Proposta)
-        .where(models.Proposta.vendedor_id == vendedor_id) # O filtro de permissão
-        .options(
-            joinedload(models.Proposta.vendedor_responsavel),
-            joinedload(models.Proposta.cliente),
-            selectinload(models.Proposta.itens) # Também carregar itens na lista
+        select(
+            models.Proposta.id,
+            models.Proposta.nome,
+            models.Proposta.status,
+            models.Proposta.valor_total,
+            Cliente.nome_razao_social.label("cliente_nome"),
+            User.name.label("vendedor_nome"),
         )
+        .join(Cliente, Cliente.id == models.Proposta.cliente_id)
+        .join(User, User.id == models.Proposta.vendedor_id)
         .order_by(models.Proposta.id.desc())
     )
-    result = await db.execute(query)
-    return result.scalars().all()
+    query = _filtrar_propostas(query, filtros, cursor)
+
+    # Busca 1 proposta a mais para saber se existe próxima página
+    result = await db.execute(query.limit(limit + 1))
+    linhas = result.all()
+
+    next_cursor = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        next_cursor = linhas[-1].id
+
+    return schema.PropostasPagina(
+        itens=[schema.PropostaResumo.model_validate(linha) for linha in linhas],
+        next_cursor=next_cursor
+    )
+
+# --- Exportação (streaming) ---
+# Uma única consulta (propostas + cliente + vendedor + itens, LEFT JOIN),
+# ordenada por proposta: as linhas de uma mesma proposta chegam juntas.
+# CSV: uma linha por item (dados da proposta repetidos).
+# NDJSON: uma linha por proposta, com a lista "itens" aninhada.
+
+EXPORT_COLUNAS = [
+    "proposta_id", "nome", "status", "valor_total", "potencia_kwp", "data_atualizacao",
+    "cliente_id", "cliente_nome", "vendedor_id", "vendedor_nome",
+    "item_id", "item_categoria", "item_descricao", "item_quantidade",
+    "item_custo_unitario", "item_impostos", "item_margem", "item_valor_venda",
+]
+
+_ITEM_COLUNAS = [
+    "categoria", "descricao", "quantidade", "custo_unitario",
+    "impostos", "margem", "valor_venda",
+]
+
+def _export_query(vendedor_id: Optional[int]):
+    Item = models.PropostaItem
+    query = (
+        select(
+            models.Proposta.id.label("proposta_id"),
+            models.Proposta.nome,
+            models.Proposta.status,
+            models.Proposta.valor_total,
+            models.Proposta.potencia_kwp,
+            models.Proposta.data_atualizacao,
+            models.Proposta.cliente_id,
+            Cliente.nome_razao_social.label("cliente_nome"),
+            models.Proposta.vendedor_id,
+            User.name.label("vendedor_nome"),
+            Item.id.label("item_id"),
+            *[getattr(Item, c).label(f"item_{c}") for c in _ITEM_COLUNAS],
+        )
+        .join(Cliente, Cliente.id == models.Proposta.cliente_id)
+        .join(User, User.id == models.Proposta.vendedor_id)
+        .outerjoin(Item, Item.proposta_id == models.Proposta.id)
+        .order_by(models.Proposta.id.desc(), Item.id)
+    )
+    if vendedor_id is not None:
+        query = query.where(models.Proposta.vendedor_id == vendedor_id)
+    return query
+
+def stream_propostas_export(
+    db: AsyncSession, 
+    vendedor_id: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    '''Gera uma linha por item (propostas sem itens: uma linha com item_* vazios)'''
+    return stream_rows(db, _export_query(vendedor_id))
+
+async def stream_propostas_export_aninhado(
+    db: AsyncSession, 
+    vendedor_id: Optional[int] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    '''Gera uma proposta por vez, com os seus itens em "itens"'''
+    atual = None
+    async for row in stream_rows(db, _export_query(vendedor_id)):
+        if atual is None or atual["proposta_id"] != row["proposta_id"]:
+            if atual is not None:
+                yield atual
+            atual = {k: v for k, v in row.items() if not k.startswith("item_")}
+            atual["itens"] = []
+        if row["item_id"] is not None:
+            item = {"id": row["item_id"]}
+            item.update({c: row[f"item_{c}"] for c in _ITEM_COLUNAS})
+            atual["itens"].append(item)
+    if atual is not None:
+        yield atual
 
 # --- NOVO SERVIÇO 1 ---
 async def save_dimensionamento_e_gerar_custos(
@@ -0,0 +1,98 @@
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app import config
+from app.cache import TTLCache, delete_by_prefix
+from app.cache_events import on_change
+from . import schema
+
+logger = logging.getLogger(__name__)
+
+# --- Definições do Cache ---
+# Chaveado pelo "sub" do token (o email do usuário)
+USER_CACHE_KEY_PREFIX = "auth:user:"
+
+# L1: em memória, por worker (TTL curto)
+_user_l1 = TTLCache(
+    maxsize=config.USER_CACHE_L1_MAXSIZE,
+    ttl=config.USER_CACHE_L1_TTL_SECONDS
+)
+
+def _cache_key(sub: str) -> str:
+    return f"{USER_CACHE_KEY_PREFIX}{sub}"
+
+
+async def get_cached_user(
+    sub: str, 
+    redis_client: aioredis.Redis
+) -> Optional[schema.UserPrincipal]:
+    """
+    Busca o principal do usuário no L1 (memória) e depois no L2 (Redis).
+    Retorna None em caso de MISS ou se o Redis falhar (o chamador vai ao DB).
+    """
+    principal = _user_l1.get(sub)
+    if principal is not None:
+        return principal
+
+    try:
+        cached_data = await redis_client.get(_cache_key(sub))
+    except Exception as e:
+        logger.warning("Erro ao ler cache de usuário do Redis (seguindo para o DB): %s", e)
+        return None
+
+    if not cached_data:
+        return None
+
+    principal = schema.UserPrincipal.model_validate_json(cached_data)
+    _user_l1.set(sub, principal)
+    return principal
+
+
+async def set_cached_user(
+    principal: schema.UserPrincipal, 
+    redis_client: aioredis.Redis
+) -> None:
+    """Salva o principal no L1 e no L2 (Redis, com TTL)."""
+    _user_l1.set(principal.email, principal)
+    try:
+        await redis_client.setex(
+            _cache_key(principal.email),
+            config.USER_CACHE_TTL_SECONDS,
+            principal.model_dump_json()
+        )
+    except Exception as e:
+        logger.warning("Erro ao salvar cache de usuário no Redis: %s", e)
+
+
+@on_change("users")
+def evict_local_users(user_id: Optional[int] = None) -> None:
+    """
+    Aviso de escrita em 'users' vindo de outro worker: o L1 é chaveado pelo
+    email e o aviso traz só o id, então descarta o L1 inteiro (é pequeno e
+    de TTL curto).
+    """
+    _user_l1.clear()
+
+
+async def invalidate_all_users(redis_client: aioredis.Redis) -> int:
+    """Apaga todos os principais do L1 local e do L2 (prefixo 'auth:user:')."""
+    _user_l1.clear()
+    try:
+        return await delete_by_prefix(USER_CACHE_KEY_PREFIX, redis_client)
+    except Exception as e:
+        logger.error("Erro ao invalidar cache de usuários no Redis: %s", e)
+        return 0
+
+
+async def invalidate_user(sub: str, redis_client: aioredis.Redis) -> None:
+    """
+    Remove o usuário do cache (L1 e L2).
+    Chame isso ao Atualizar ou Deletar um User.
+    """
+    _user_l1.pop(sub)
+    try:
+        await redis_client.delete(_cache_key(sub))
+    except Exception as e:
+        logger.warning("Erro ao invalidar cache de usuário no Redis: %s", e)
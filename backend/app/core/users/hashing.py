@@ -1,9 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from app import config
+
+# Parâmetros do argon2 vindos do ambiente (só os definidos).
+# Com deprecated="auto", hashes com parâmetros diferentes são marcados
+# como "precisam de update" e refeitos no login (ver verify_and_update_async).
+_argon2_settings = {
+    "argon2__rounds": config.ARGON2_TIME_COST,
+    "argon2__memory_cost": config.ARGON2_MEMORY_COST,
+    "argon2__parallelism": config.ARGON2_PARALLELISM,
+}
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    **{key: value for key, value in _argon2_settings.items() if value}
+)
+
+# Pool limitado para o argon2 (CPU-bound, libera o GIL) não travar o event loop.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="argon2"
+)
+# Limita quantos hashes ficam em andamento/na fila do pool ao mesmo tempo,
+# para que um pico de logins não monopolize o processo.
+_hash_semaphore = asyncio.Semaphore(config.PASSWORD_HASH_WORKERS)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+# --- Versões assíncronas (rodam no pool, fora do event loop) ---
+
+async def _run_in_pool(func, *args):
+    async with _hash_semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_pool(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_pool(pwd_context.hash, password)
+
+async def verify_and_update_async(
+    plain_password: str, 
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    '''
+    Verifica a senha e, se os parâmetros do argon2 mudaram,
+    já devolve o novo hash (ou None se não precisar refazer).
+    '''
+    return await _run_in_pool(pwd_context.verify_and_update, plain_password, hashed_password)
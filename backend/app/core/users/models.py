@@ -22,6 +22,10 @@ class User(Base):
     # 3. A coluna de "função" (role) que discutimos
     role = Column(SAEnum(UserRole), nullable=False, default=UserRole.VENDEDOR)
 
+    # Versão dos tokens do usuário (claim "ver" do JWT).
+    # Incrementar invalida todas as sessões emitidas anteriormente.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # 4. Relações do SunOps (substitui 'cart' e 'orders')
     # Um vendedor pode ter várias propostas
     propostas = relationship("Proposta", back_populates="vendedor_responsavel")
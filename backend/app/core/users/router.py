@@ -1,9 +1,12 @@
 from typing import List
 from fastapi import APIRouter, Depends, status, Response, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
+import redis.asyncio as aioredis
 # acima realizamos os imports das bibliotecas 
 from app.db import get_db
+from app.cache import get_redis_client
 from app.core.auth.dependencies import get_current_user, get_current_gestor # Suas regras de permissão
+from app.core.auth.schema import TokenPrincipal
 from . import services, schema, models
 # acima realizamos os imports dos modulos 
 
@@ -22,7 +25,7 @@ async def create_user(
     request: schema.UserCreate, 
     database: AsyncSession = Depends(get_db),
     # Permissão: Apenas um Gestor logado pode criar novos usuários
-    gestor: models.User = Depends(get_current_gestor) 
+    gestor: TokenPrincipal = Depends(get_current_gestor) 
 ):
     '''Cria um novo usuário (Vendedor, Gestor, etc.) no sistema.'''
     
@@ -44,7 +47,7 @@ async def create_user(
 )
 async def get_all_users(
     database: AsyncSession = Depends(get_db),
-    gestor: models.User = Depends(get_current_gestor)
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
     '''Obtém uma lista de todos os usuários cadastrados no sistema.'''
     users = await services.get_all_users(database)
@@ -58,7 +61,7 @@ async def get_all_users(
 )
 async def get_me(
     # Permissão: Qualquer usuário logado pode ver seus próprios dados
-    current_user: models.User = Depends(get_current_user)
+    current_user: schema.UserPrincipal = Depends(get_current_user)
 ):
     '''Retorna os dados do usuário que está atualmente autenticado.'''
     return current_user
@@ -72,7 +75,7 @@ async def get_me(
 async def get_user_by_id(
     user_id: int, 
     database: AsyncSession = Depends(get_db),
-    gestor: models.User = Depends(get_current_gestor)
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
     '''Obtém os detalhes de um usuário específico pelo seu ID.'''
     user = await services.get_user_by_id(user_id, database)
@@ -84,6 +87,38 @@ async def get_user_by_id(
     return user
 
 
+@router.put(
+    '/{user_id}', 
+    response_model=schema.ShowUser,
+    summary="Atualiza um usuário (Apenas Gestores)"
+)
+async def update_user_by_id(
+    user_id: int, 
+    request: schema.UserUpdate,
+    database: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client),
+    gestor: TokenPrincipal = Depends(get_current_gestor)
+):
+    '''Atualiza os dados (nome, email, senha, role) de um usuário.'''
+    user = await services.get_user_by_id(user_id, database)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Usuário com id {user_id} não encontrado."
+        )
+
+    # Verifica se o novo email (se fornecido) já existe em OUTRO usuário
+    if request.email and request.email != user.email:
+        user_exists = await services.get_user_by_email(request.email, database)
+        if user_exists:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O usuário com este email já existe no sistema."
+            )
+
+    return await services.update_user(user, request, database, redis_client)
+
+
 @router.delete(
     '/{user_id}', 
     status_code=status.HTTP_204_NO_CONTENT,
@@ -92,7 +127,8 @@ async def get_user_by_id(
 async def delete_user_by_id(
     user_id: int, 
     database: AsyncSession = Depends(get_db),
-    gestor: models.User = Depends(get_current_gestor)
+    redis_client: aioredis.Redis = Depends(get_redis_client),
+    gestor: TokenPrincipal = Depends(get_current_gestor)
 ):
     '''Deleta um usuário do sistema pelo seu ID.'''
     user = await services.get_user_by_id(user_id, database)
@@ -102,5 +138,5 @@ async def delete_user_by_id(
             detail=f"Usuário com id {user_id} não encontrado."
         )
     
-    await services.delete_user(user, database)
+    await services.delete_user(user, database, redis_client)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import Annotated
+from typing import Annotated, Optional
 from .models import UserRole
 
 class UserBase(BaseModel):
@@ -10,8 +10,27 @@ class UserCreate(UserBase):
     password: str
     role: UserRole = UserRole.GESTOR
 
+# Schema para atualizar um usuário (usado no PUT)
+# Todos os campos são opcionais
+class UserUpdate(BaseModel):
+    name: Optional[Annotated[str, Field(min_length=2, max_length=50)]] = None
+    email: Optional[EmailStr] = None
+    password: Optional[str] = None
+    role: Optional[UserRole] = None
+
 class ShowUser(UserBase):
     id: int
     role: UserRole
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# Principal mínimo do usuário autenticado.
+# É o que fica em cache (L1/L2) e o que 'get_current_user' injeta nas rotas,
+# evitando carregar o objeto ORM 'User' a cada requisição.
+class UserPrincipal(BaseModel):
+    id: int
+    name: str
+    email: str
+    role: UserRole
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
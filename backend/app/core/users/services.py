@@ -1,8 +1,12 @@
+import redis.asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List, Optional
 
 from . import models, schema, hashing
+from . import cache as user_cache
+from app.core.auth import services as auth_services
+from app.cache_events import notify_change
 
 async def create_new_user(
     request: schema.UserCreate, 
@@ -10,7 +14,8 @@ async def create_new_user(
 ) -> models.User:
     '''Cria um novo usuário no banco com senha hasheada e role'''
     
-    hashed_password = hashing.get_password_hash(request.password)
+    # O hash roda no pool do argon2, fora do event loop
+    hashed_password = await hashing.get_password_hash_async(request.password)
     
     new_user = models.User(
         name=request.name,
@@ -24,6 +29,22 @@ async def create_new_user(
     await database.refresh(new_user)
     return new_user
 
+async def check_password_and_rehash(
+    user: models.User, 
+    password: str, 
+    database: AsyncSession
+) -> bool:
+    '''
+    Verifica a senha do usuário fora do event loop.
+    Se os parâmetros do argon2 mudaram, salva o novo hash (rehash-on-login).
+    '''
+    valid, new_hash = await hashing.verify_and_update_async(password, user.password_hash)
+    if valid and new_hash:
+        user.password_hash = new_hash
+        database.add(user)
+        await database.commit()
+    return valid
+
 async def get_user_by_email(email: str, database: AsyncSession) -> Optional[models.User]:
     '''Busca um usuário pelo email'''
     query = select(models.User).where(models.User.email == email)
@@ -42,7 +63,52 @@ async def get_all_users(database: AsyncSession) -> List[models.User]:
     result = await database.execute(query)
     return result.scalars().all()
 
-async def delete_user(user: models.User, database: AsyncSession) -> None:
-    '''Deleta um usuário (recebe o objeto User)'''
+async def update_user(
+    user: models.User, 
+    request: schema.UserUpdate, 
+    database: AsyncSession,
+    redis_client: aioredis.Redis
+) -> models.User:
+    '''Atualiza um usuário e invalida o seu cache de autenticação'''
+    old_email = user.email
+    data = request.model_dump(exclude_unset=True)
+
+    password = data.pop("password", None)
+    if password:
+        user.password_hash = await hashing.get_password_hash_async(password)
+
+    for key, value in data.items():
+        setattr(user, key, value)
+
+    # Mudou algo que está no token (email, role) ou a senha: revoga as sessões
+    revoke_sessions = bool(password) or user.email != old_email or "role" in data
+    if revoke_sessions:
+        user.token_version = (user.token_version or 0) + 1
+
+    database.add(user)
+    await database.commit()
+    await database.refresh(user)
+
+    if revoke_sessions:
+        await auth_services.publish_token_version(user.id, user.token_version, redis_client)
+
+    # Invalida a chave antiga e a nova (caso o email tenha mudado)
+    await user_cache.invalidate_user(old_email, redis_client)
+    if user.email != old_email:
+        await user_cache.invalidate_user(user.email, redis_client)
+    # Avisa os outros workers (L1 de cada um)
+    await notify_change(database, "users", user.id)
+    return user
+
+async def delete_user(
+    user: models.User, 
+    database: AsyncSession,
+    redis_client: aioredis.Redis
+) -> None:
+    '''Deleta um usuário (recebe o objeto User) e invalida o seu cache'''
+    email, user_id = user.email, user.id
     await database.delete(user)
-    await database.commit()
\ No newline at end of file
+    await database.commit()
+    await user_cache.invalidate_user(email, redis_client)
+    await auth_services.forget_token_version(user_id, redis_client)
+    await notify_change(database, "users", user_id)
\ No newline at end of file
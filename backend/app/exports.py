@@ -0,0 +1,128 @@
+import csv
+import enum
+import io
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app import config
+from app.db import async_session
+
+logger = logging.getLogger(__name__)
+
+# --- Exportações em streaming (CSV / NDJSON) ---
+#
+# As linhas saem do PostgreSQL por um cursor do lado do servidor
+# (db.stream + yield_per), são convertidas em bytes e enviadas em blocos de
+# ~EXPORT_FLUSH_BYTES: a memória fica constante, seja qual for o número de
+# linhas (nada de lista de objetos ORM -> modelos Pydantic -> JSON).
+#
+# A geração roda DEPOIS de o endpoint retornar, quando a sessão da
+# requisição (get_db) já foi fechada: cada exportação abre a própria sessão.
+#
+# Uso (no router):
+#     return streaming_export("clientes", formato, COLUNAS, services.stream_clientes_export)
+
+
+class FormatoExportacao(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+_MEDIA_TYPES = {
+    FormatoExportacao.CSV: "text/csv; charset=utf-8",
+    FormatoExportacao.NDJSON: "application/x-ndjson",
+}
+
+
+def _valor(value: Any) -> Any:
+    """Converte os tipos do banco em valores serializáveis (sem perder precisão)."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _valor(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_valor(v) for v in value]
+    return value
+
+
+async def stream_rows(db: AsyncSession, query: Select) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Executa 'query' com um cursor do servidor, EXPORT_BATCH_SIZE linhas por
+    vez, e gera cada linha como dict (selecione colunas, não entidades ORM).
+    """
+    result = await db.stream(query.execution_options(yield_per=config.EXPORT_BATCH_SIZE))
+    async for row in result.mappings():
+        yield dict(row)
+
+
+async def _encode_csv(rows: AsyncIterator[Dict[str, Any]], colunas: Sequence[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    # BOM: o Excel reconhece o UTF-8 (e a importação de clientes o ignora)
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer)
+    writer.writerow(colunas)
+    async for row in rows:
+        writer.writerow(["" if row.get(c) is None else _valor(row.get(c)) for c in colunas])
+        if buffer.tell() >= config.EXPORT_FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+async def _encode_ndjson(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    chunk: List[str] = []
+    size = 0
+    async for row in rows:
+        line = json.dumps(_valor(row), ensure_ascii=False, separators=(",", ":"))
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= config.EXPORT_FLUSH_BYTES:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk, size = [], 0
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+def streaming_export(
+    nome: str,
+    formato: FormatoExportacao,
+    colunas: Sequence[str],
+    linhas: Callable[[AsyncSession], AsyncIterator[Dict[str, Any]]],
+) -> StreamingResponse:
+    """
+    Monta a resposta de download '<nome>.csv' / '<nome>.ndjson'.
+    'linhas(db)' gera os dicts a exportar; 'colunas' define a ordem do CSV
+    (no NDJSON cada linha é o dict completo, podendo conter listas aninhadas).
+    """
+    async def body() -> AsyncIterator[bytes]:
+        async with async_session() as db:
+            rows = linhas(db)
+            if formato == FormatoExportacao.CSV:
+                encoded = _encode_csv(rows, colunas)
+            else:
+                encoded = _encode_ndjson(rows)
+            try:
+                async for chunk in encoded:
+                    yield chunk
+            except Exception as e:
+                # O status 200 já foi enviado: resta registrar e interromper o download
+                logger.error("Erro durante a exportação '%s': %s", nome, e)
+                raise
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato.value}"'},
+    )
@@ -1,12 +1,23 @@
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+import redis.asyncio as aioredis
 
 # --- Imports para o script de startup ---
-from app.db import async_session
+from app.db import async_session, get_db
+from app.cache import init_redis, close_redis, get_redis_client
+from app.cache_events import start_listener, stop_listener, notify_change
+from app.warmup import start_warmup, stop_warmup
+from app.service_cache import cache_stats, invalidate_tags
+from app.core.equipamentos import cache as catalogo_cache
+from app.core.dashboards import cache as dashboards_cache
+from app.core.users import cache as users_cache
+from app.core.auth.dependencies import get_current_gestor
 from app.core.users.models import User, UserRole
-from app.core.users.hashing import get_password_hash
+from app.core.users.hashing import get_password_hash_async
 from app.core.equipamentos import router as equipamentos_router
 # ----------------------------------------
 
@@ -19,16 +30,8 @@ from app.core.sales.projetos import router as projetos_router
 from app.core.financeiro import router as financeiro_router
 from app.core.dashboards import router as dashboards_router
 
-# Inicializa a aplicação FastAPI principal
-app = FastAPI(
-    title="SunOps", 
-    version="0.0.1",
-    description="API central para o sistema de gerenciamento SunOps SaaS."
-)
-
 # --- FUNÇÃO DE STARTUP ---
-@app.on_event("startup")
-async def on_startup():
+async def garantir_gestor_padrao():
     """
     Executa na inicialização da API para garantir que o usuário Gestor
     padrão exista no banco de dados.
@@ -58,7 +61,7 @@ async def on_startup():
             else:
                 # 4. Se não existe, criar
                 print(f"Criando usuário Gestor '{ADMIN_EMAIL}'...")
-                hashed_password = get_password_hash(ADMIN_PASSWORD)
+                hashed_password = await get_password_hash_async(ADMIN_PASSWORD)
                 
                 admin_user = User(
                     name=ADMIN_NAME,
@@ -79,6 +82,32 @@ async def on_startup():
 # --- FIM DA FUNÇÃO DE STARTUP ---
 
 
+# --- LIFESPAN (startup / shutdown) ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: pool do Redis (compartilhado pelas requisições), listener de
+    # invalidação de cache (LISTEN/NOTIFY), gestor padrão e warm-up dos
+    # caches/conexões (limitado a WARMUP_DEADLINE_SECONDS)
+    await init_redis()
+    start_listener()
+    await garantir_gestor_padrao()
+    await start_warmup()
+    yield
+    # Shutdown: encerra o warm-up (se ainda rodando), o listener e o pool
+    await stop_warmup()
+    await stop_listener()
+    await close_redis()
+
+
+# Inicializa a aplicação FastAPI principal
+app = FastAPI(
+    title="SunOps", 
+    version="0.0.1",
+    description="API central para o sistema de gerenciamento SunOps SaaS.",
+    lifespan=lifespan
+)
+
+
 # Isso é essencial para permitir que seu frontend (ex: React, Vue)
 # acesse a API a partir de um domínio diferente.
 app.add_middleware(
@@ -98,6 +127,46 @@ async def read_root():
     """
     return {"status": "SunOps API is running!"}
 
+@app.get("/cache/stats", tags=["Health Check"], dependencies=[Depends(get_current_gestor)])
+async def read_cache_stats():
+    """
+    Métricas de hit/miss (L1, L2) das funções de serviço cacheadas.
+    Os contadores são por worker e zeram a cada reinício.
+    """
+    return cache_stats()
+
+@app.post("/cache/invalidate", tags=["Health Check"], dependencies=[Depends(get_current_gestor)])
+async def invalidate_cache(
+    scope: str = Query(..., description="catalogo, dashboards, usuarios ou tag:<tabela>"),
+    db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+):
+    """
+    Invalida um escopo do cache do backend (L1 de todos os workers + L2).
+    Apaga apenas as chaves do escopo, nunca o DB inteiro do Redis
+    (o cache da API de catálogo tem DB e prefixo próprios).
+    """
+    deleted = None
+    if scope == "catalogo":
+        await catalogo_cache.invalidate_catalogo(redis_client)
+        await notify_change(db, "catalogo_itens")
+    elif scope == "dashboards":
+        deleted = await dashboards_cache.invalidate_dashboards(redis_client)
+        await notify_change(db, "dashboards")
+    elif scope == "usuarios":
+        deleted = await users_cache.invalidate_all_users(redis_client)
+        await notify_change(db, "users")
+    elif scope.startswith("tag:") and len(scope) > 4:
+        tabela = scope[4:]
+        await invalidate_tags(tabela, redis_client=redis_client)
+        await notify_change(db, tabela)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Escopo inválido. Use 'catalogo', 'dashboards', 'usuarios' ou 'tag:<tabela>'."
+        )
+    return {"scope": scope, "deleted": deleted}
+
 # --- Inclusão dos Routers ---
 app.include_router(auth_router.router)
 app.include_router(users_router.router)
@@ -0,0 +1,250 @@
+import functools
+import hashlib
+import inspect
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from pydantic import BaseModel, TypeAdapter
+
+from app import config
+from app.cache import TTLCache, get_redis, version_check_window
+from app.singleflight import singleflight
+
+logger = logging.getLogger(__name__)
+
+# --- Cache de funções de serviço (decorator @cached) ---
+#
+# Guarda o retorno (já validado contra um schema Pydantic) em L1 (memória do
+# worker) e L2 (Redis, JSON). Cada função declara as TABELAS de que depende
+# (tags); uma escrita chama 'invalidate_tags(...)', que incrementa a versão
+# da tag no Redis. A versão de cada tag faz parte da chave, então todas as
+# entradas dependentes deixam de ser lidas de uma vez (e expiram pelo TTL).
+#
+# Uso:
+#     @cached("equipamentos:categorias", schema=List[schema.ShowCategoria],
+#             tags=("categorias_equipamentos",))
+#     async def get_all_categorias(db: AsyncSession): ...
+
+CACHE_KEY_PREFIX = "svc"
+TAG_VERSION_KEY_PREFIX = "svc:tag:"
+
+# Argumentos que nunca entram na chave (sessão do DB, clientes Redis)
+DEFAULT_IGNORED_ARGS = ("db", "database", "redis_client")
+
+# Versões das tags lidas do Redis, por worker: {tag: (versão, checked_at)}
+_tag_versions: Dict[str, tuple] = {}
+
+# Caches L1 por tag, para liberar memória na invalidação local
+_l1_by_tag: Dict[str, List[TTLCache]] = defaultdict(list)
+_all_l1: List[TTLCache] = []
+
+
+@dataclass
+class CacheStats:
+    """Contadores de uso de uma função cacheada (por worker)."""
+    hits_l1: int = 0
+    hits_l2: int = 0
+    misses: int = 0
+    errors: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits_l1 + self.hits_l2 + self.misses
+        return (self.hits_l1 + self.hits_l2) / total if total else 0.0
+
+
+_stats: Dict[str, CacheStats] = {}
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Métricas de hit/miss de todas as funções cacheadas deste worker."""
+    return {
+        name: {
+            "hits_l1": s.hits_l1,
+            "hits_l2": s.hits_l2,
+            "misses": s.misses,
+            "errors": s.errors,
+            "hit_ratio": round(s.hit_ratio, 4),
+        }
+        for name, s in _stats.items()
+    }
+
+
+# --- Chaves ---
+
+def _key_part(value: Any) -> str:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    return repr(value)
+
+
+def derive_key(func: Callable, ignored: Sequence[str], args: tuple, kwargs: dict) -> str:
+    """
+    Deriva a chave a partir dos argumentos da chamada (com os padrões
+    aplicados, então f(db) e f(db, x=None) caem na mesma entrada).
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    parts = [
+        f"{name}={_key_part(value)}"
+        for name, value in bound.arguments.items()
+        if name not in ignored
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+# --- Versões das tags ---
+
+async def _get_tag_versions(redis_client, tags: Sequence[str]) -> Optional[tuple]:
+    """
+    Versões atuais das tags (um MGET, pulado dentro da janela
+    SERVICE_CACHE_TAG_CHECK_SECONDS). None se o Redis falhar.
+    """
+    now = time.monotonic()
+    window = version_check_window(config.SERVICE_CACHE_TAG_CHECK_SECONDS)
+    known = [_tag_versions.get(tag) for tag in tags]
+    if all(entry is not None and now - entry[1] < window for entry in known):
+        return tuple(entry[0] for entry in known)
+
+    try:
+        values = await redis_client.mget([f"{TAG_VERSION_KEY_PREFIX}{tag}" for tag in tags])
+    except Exception as e:
+        logger.warning("Erro ao ler versões de tags no Redis: %s", e)
+        return None
+
+    versions = tuple(int(v or 0) for v in values)
+    for tag, version in zip(tags, versions):
+        _tag_versions[tag] = (version, now)
+    return versions
+
+
+def evict_local(tags: Iterable[str]) -> None:
+    """Descarta o L1 e as versões conhecidas das tags, apenas neste worker."""
+    for tag in tags:
+        _tag_versions.pop(tag, None)
+        for l1 in _l1_by_tag.get(tag, ()):
+            l1.clear()
+
+
+def evict_all_local() -> None:
+    """Descarta todo o L1 e todas as versões conhecidas, apenas neste worker."""
+    _tag_versions.clear()
+    for l1 in _all_l1:
+        l1.clear()
+
+
+async def invalidate_tags(*tags: str, redis_client=None) -> None:
+    """
+    Invalida todas as funções cacheadas que dependem destas tags (tabelas).
+    Chame após o commit de qualquer escrita nas tabelas correspondentes.
+    """
+    evict_local(tags)
+    redis_client = redis_client or get_redis()
+    for tag in tags:
+        try:
+            await redis_client.incr(f"{TAG_VERSION_KEY_PREFIX}{tag}")
+        except Exception as e:
+            # Logar o erro, mas não travar a operação principal
+            logger.error("Erro ao invalidar a tag '%s' no Redis: %s", tag, e)
+
+
+# --- Decorator ---
+
+def cached(
+    name: str,
+    schema: Any,
+    tags: Sequence[str],
+    ttl: Optional[float] = None,
+    jitter: Optional[float] = None,
+    key: Optional[Callable[..., str]] = None,
+    ignore: Sequence[str] = DEFAULT_IGNORED_ARGS,
+    l1_maxsize: Optional[int] = None,
+):
+    """
+    Cacheia uma função de serviço assíncrona em L1 + L2.
+
+    - name: prefixo único da função no cache (ex: "equipamentos:kits").
+    - schema: tipo Pydantic do retorno (ex: List[ShowKit]). O retorno é
+      validado com from_attributes e a função passa a devolver os modelos
+      Pydantic (não mais objetos ORM), tanto no HIT quanto no MISS.
+    - tags: tabelas das quais o resultado depende (ver 'invalidate_tags').
+    - ttl / jitter: TTL em segundos e variação relativa (0.1 = ±10%), para
+      que entradas criadas juntas não expirem juntas.
+    - key: função opcional que recebe os mesmos argumentos e retorna a
+      parte variável da chave; por padrão, derivada dos argumentos
+      (exceto os listados em 'ignore').
+    """
+    ttl = config.SERVICE_CACHE_TTL_SECONDS if ttl is None else ttl
+    jitter = config.SERVICE_CACHE_JITTER if jitter is None else jitter
+    tags = tuple(tags)
+    adapter = TypeAdapter(schema)
+    l1 = TTLCache(
+        maxsize=l1_maxsize or config.SERVICE_CACHE_L1_MAXSIZE,
+        ttl=min(ttl, config.SERVICE_CACHE_L1_TTL_SECONDS)
+    )
+    _all_l1.append(l1)
+    for tag in tags:
+        _l1_by_tag[tag].append(l1)
+    stats = _stats.setdefault(name, CacheStats())
+
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if key is not None:
+                arg_key = key(*args, **kwargs)
+            else:
+                arg_key = derive_key(func, ignore, args, kwargs)
+
+            redis_client = get_redis()
+            versions = await _get_tag_versions(redis_client, tags)
+            if versions is None:
+                # Sem Redis não há como saber se a entrada foi invalidada
+                stats.errors += 1
+                return adapter.validate_python(await func(*args, **kwargs), from_attributes=True)
+
+            version_part = ".".join(str(v) for v in versions)
+            cache_key = f"{CACHE_KEY_PREFIX}:{name}:{version_part}:{arg_key}"
+
+            value = l1.get(cache_key)
+            if value is not None:
+                stats.hits_l1 += 1
+                return value
+
+            try:
+                cached_data = await redis_client.get(cache_key)
+            except Exception as e:
+                logger.warning("Erro ao ler cache '%s' no Redis (seguindo para o DB): %s", name, e)
+                stats.errors += 1
+                cached_data = None
+
+            if cached_data is not None:
+                stats.hits_l2 += 1
+                value = adapter.validate_json(cached_data)
+                l1.set(cache_key, value)
+                return value
+
+            async def rebuild():
+                stats.misses += 1
+                logger.info("Cache MISS de '%s': buscando no PostgreSQL.", name)
+                result = adapter.validate_python(await func(*args, **kwargs), from_attributes=True)
+                l1.set(cache_key, result)
+                expire = max(1, int(ttl * (1 + random.uniform(-jitter, jitter))))
+                try:
+                    await redis_client.setex(cache_key, expire, adapter.dump_json(result).decode())
+                except Exception as e:
+                    logger.warning("Erro ao salvar cache '%s' no Redis: %s", name, e)
+                    stats.errors += 1
+                return result
+
+            # Chamadas simultâneas com a mesma chave (neste worker) compartilham o MISS
+            return await singleflight(cache_key, rebuild)
+
+        wrapper.cache_name = name
+        wrapper.cache_tags = tags
+        return wrapper
+
+    return decorator
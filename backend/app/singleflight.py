@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import redis.asyncio as aioredis
+from app import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# --- Singleflight (coalescência de cache MISS) ---
+# Quando uma chave de cache expira, todas as requisições simultâneas erram
+# ao mesmo tempo. Esta camada garante UMA reconstrução por chave:
+#
+# 1. No processo: a primeira corrotina vira "líder" e as demais aguardam o
+#    mesmo Future (nenhuma delas toca no DB).
+# 2. Entre workers: o líder tenta um lock no Redis (SET NX PX, com lease).
+#    Quem não pega o lock fica relendo o cache ('recheck') até o dono do
+#    lock publicar o resultado, o lock sumir ou o tempo de espera acabar.
+#    Em qualquer falha do Redis, reconstrói por conta própria.
+
+LOCK_KEY_PREFIX = "singleflight:"
+
+# Libera o lock apenas se ele ainda for nosso (o lease pode ter expirado
+# e outro worker pode ter assumido a chave)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _LeaderCancelled(Exception):
+    """O líder foi cancelado (ex: cliente desconectou) antes de terminar."""
+
+
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+# Atualizações em segundo plano (stale-while-revalidate), uma por chave.
+# Guardar a Task evita que ela seja coletada antes de terminar.
+_background: Dict[str, "asyncio.Task"] = {}
+
+
+async def singleflight(
+    key: str,
+    build: Callable[[], Awaitable[T]],
+    redis_client: Optional[aioredis.Redis] = None,
+    recheck: Optional[Callable[[], Awaitable[Optional[T]]]] = None,
+) -> T:
+    """
+    Executa 'build' uma única vez por 'key' e entrega o mesmo resultado a
+    todos que pedirem a chave enquanto a reconstrução estiver em andamento.
+
+    - 'build': reconstrói o valor (e normalmente o grava no cache).
+    - 'redis_client' + 'recheck': ativam a coordenação entre workers.
+      'recheck' relê o cache e retorna None enquanto o valor não existir.
+    """
+    while True:
+        future = _inflight.get(key)
+        if future is None:
+            break
+        try:
+            return await asyncio.shield(future)
+        except _LeaderCancelled:
+            # O líder desistiu; tenta de novo (possivelmente virando o líder)
+            continue
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await _build_with_lock(key, build, redis_client, recheck)
+    except asyncio.CancelledError:
+        future.set_exception(_LeaderCancelled())
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+        # Evita o aviso "exception was never retrieved" quando ninguém aguardava
+        if future.done() and not future.cancelled():
+            future.exception()
+
+
+async def _build_with_lock(
+    key: str,
+    build: Callable[[], Awaitable[T]],
+    redis_client: Optional[aioredis.Redis],
+    recheck: Optional[Callable[[], Awaitable[Optional[T]]]],
+) -> T:
+    """Reconstrói sob o lock distribuído (se houver Redis) ou direto."""
+    if redis_client is None or recheck is None:
+        return await build()
+
+    lock_key = f"{LOCK_KEY_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    lease_ms = int(config.SINGLEFLIGHT_LOCK_LEASE_SECONDS * 1000)
+    try:
+        acquired = await redis_client.set(lock_key, token, nx=True, px=lease_ms)
+    except Exception as e:
+        logger.warning("Erro ao obter lock de singleflight no Redis (%s): %s", key, e)
+        return await build()
+
+    if not acquired:
+        result = await _wait_for_owner(key, lock_key, redis_client, recheck)
+        if result is not None:
+            return result
+        logger.info("Singleflight: espera por '%s' esgotada, reconstruindo localmente.", key)
+        return await build()
+
+    try:
+        return await build()
+    finally:
+        try:
+            await redis_client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            # O lease expira sozinho; apenas registra
+            logger.warning("Erro ao liberar lock de singleflight (%s): %s", key, e)
+
+
+async def _wait_for_owner(
+    key: str,
+    lock_key: str,
+    redis_client: aioredis.Redis,
+    recheck: Callable[[], Awaitable[Optional[T]]],
+) -> Optional[T]:
+    """
+    Aguarda o worker dono do lock publicar o valor no cache.
+    Retorna None se o lock sumir sem valor (dono falhou) ou se o tempo acabar.
+    """
+    deadline = time.monotonic() + config.SINGLEFLIGHT_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(config.SINGLEFLIGHT_POLL_SECONDS)
+        result = await recheck()
+        if result is not None:
+            return result
+        try:
+            if not await redis_client.exists(lock_key):
+                # Última leitura: o dono pode ter gravado e liberado entre as chamadas
+                return await recheck()
+        except Exception as e:
+            logger.warning("Erro ao consultar lock de singleflight (%s): %s", key, e)
+            return None
+    return None
+
+
+def refresh_in_background(
+    key: str,
+    build: Callable[[], Awaitable[T]],
+    redis_client: Optional[aioredis.Redis] = None,
+) -> None:
+    """
+    Agenda 'build' em segundo plano para renovar um valor vencido (soft)
+    que já está sendo servido. Não faz nada se a chave já estiver sendo
+    reconstruída neste worker ou se outro worker tiver o lock dela.
+    'build' deve abrir a própria sessão do DB (a da requisição será fechada).
+    """
+    if key in _background or key in _inflight:
+        return
+    task = asyncio.get_running_loop().create_task(_refresh(key, build, redis_client))
+    _background[key] = task
+    task.add_done_callback(lambda _: _background.pop(key, None))
+
+
+async def _refresh(
+    key: str,
+    build: Callable[[], Awaitable[T]],
+    redis_client: Optional[aioredis.Redis],
+) -> None:
+    lock_key = f"{LOCK_KEY_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    try:
+        if redis_client is not None:
+            lease_ms = int(config.SINGLEFLIGHT_LOCK_LEASE_SECONDS * 1000)
+            if not await redis_client.set(lock_key, token, nx=True, px=lease_ms):
+                return  # Outro worker já está renovando
+    except Exception as e:
+        logger.warning("Erro ao obter lock de atualização no Redis (%s): %s", key, e)
+        redis_client = None
+
+    try:
+        # Requisições que errarem a chave neste worker aguardam esta mesma reconstrução
+        await singleflight(key, build)
+        logger.info("Singleflight: '%s' renovado em segundo plano.", key)
+    except Exception as e:
+        # O valor antigo continua sendo servido até o teto (hard TTL)
+        logger.error("Erro ao renovar '%s' em segundo plano: %s", key, e)
+    finally:
+        if redis_client is not None:
+            try:
+                await redis_client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.warning("Erro ao liberar lock de atualização (%s): %s", key, e)
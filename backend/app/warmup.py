@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import distinct, text
+from sqlalchemy.future import select
+
+from app import config
+from app.cache import get_redis, init_redis, close_redis
+from app.db import async_session, engine
+from app.core.equipamentos import schema as equipamentos_schema
+from app.core.equipamentos import services as equipamentos_services
+from app.core.financeiro import models as financeiro_models
+from app.core.financeiro import services as financeiro_services
+
+logger = logging.getLogger(__name__)
+
+# --- Aquecimento de caches e conexões (warm-up) ---
+#
+# Após um deploy, os primeiros usuários pagariam pelas conexões frias do
+# pool e pelos caches vazios. O warm-up:
+#   1. abre N conexões do pool do PostgreSQL e do Redis;
+#   2. reconstrói a primeira página do catálogo (L1 + L2);
+#   3. carrega a configuração financeira (singleton);
+#   4. compila o índice de premissas de cada empresa.
+#
+# Roda no lifespan da API sem segurar a subida além de
+# WARMUP_DEADLINE_SECONDS (o que faltar continua em segundo plano) e
+# também como CLI:  python -m app.warmup [--deadline 30] [--skip-pools]
+
+_warmup_task: Optional[asyncio.Task] = None
+
+
+async def _warm_db_pool(connections: int) -> None:
+    """Abre 'connections' conexões ao mesmo tempo (elas voltam para o pool)."""
+    async def open_one():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    opened = await asyncio.gather(*(open_one() for _ in range(connections)), return_exceptions=True)
+    for conn in opened:
+        if not isinstance(conn, BaseException):
+            await conn.close()
+    errors = [e for e in opened if isinstance(e, BaseException)]
+    if errors:
+        raise errors[0]
+
+
+async def _warm_redis_pool(connections: int) -> None:
+    """PINGs simultâneos: o pool do Redis abre até 'connections' conexões."""
+    redis_client = get_redis()
+    await asyncio.gather(*(redis_client.ping() for _ in range(connections)))
+
+
+async def _warm_catalogo() -> None:
+    async with async_session() as db:
+        await equipamentos_services.get_catalogo_itens(
+            db=db,
+            redis_client=get_redis(),
+            filtros=equipamentos_schema.CatalogoFiltros()
+        )
+
+
+async def _warm_configuracoes() -> None:
+    async with async_session() as db:
+        await financeiro_services.get_configuracoes_cached(db)
+
+
+async def _warm_premissas() -> int:
+    """Compila o índice de premissas de cada empresa. Retorna quantas."""
+    async with async_session() as db:
+        query = select(distinct(financeiro_models.Premissa.empresa_id))
+        empresa_ids = (await db.execute(query)).scalars().all()
+        for empresa_id in empresa_ids:
+            await financeiro_services.get_indice_premissas(db, empresa_id)
+    return len(empresa_ids)
+
+
+def _steps(warm_pools: bool) -> List[tuple]:
+    steps = []
+    if warm_pools:
+        steps.append(("pool_postgres", lambda: _warm_db_pool(config.WARMUP_DB_CONNECTIONS)))
+        steps.append(("pool_redis", lambda: _warm_redis_pool(config.WARMUP_REDIS_CONNECTIONS)))
+    steps.append(("catalogo", _warm_catalogo))
+    steps.append(("configuracoes", _warm_configuracoes))
+    steps.append(("premissas", _warm_premissas))
+    return steps
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable], report: Dict[str, dict]) -> None:
+    started = time.perf_counter()
+    try:
+        result = await step()
+    except Exception as e:
+        report[name] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "erro": str(e)}
+        logger.warning("Warm-up '%s' falhou (%.1f ms): %s", name, report[name]["ms"], e)
+        return
+    report[name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    if result is not None:
+        report[name]["itens"] = result
+    logger.info("Warm-up '%s' concluído em %.1f ms.", name, report[name]["ms"])
+
+
+async def warm_up(warm_pools: bool = True) -> Dict[str, dict]:
+    """
+    Executa todas as etapas (os pools primeiro, depois os caches em paralelo)
+    e retorna o relatório {etapa: {"ok", "ms", ...}}. Falhas são registradas
+    e não interrompem as demais etapas.
+    """
+    report: Dict[str, dict] = {}
+    started = time.perf_counter()
+    steps = _steps(warm_pools)
+    pools = [s for s in steps if s[0].startswith("pool_")]
+    caches = [s for s in steps if not s[0].startswith("pool_")]
+
+    await asyncio.gather(*(_run_step(name, step, report) for name, step in pools))
+    await asyncio.gather(*(_run_step(name, step, report) for name, step in caches))
+
+    logger.info("Warm-up completo em %.1f ms.", (time.perf_counter() - started) * 1000)
+    return report
+
+
+async def start_warmup() -> None:
+    """
+    Chamado no lifespan: espera o warm-up até WARMUP_DEADLINE_SECONDS.
+    Se o prazo acabar, a API sobe assim mesmo e o restante segue em segundo plano.
+    """
+    global _warmup_task
+    if not config.WARMUP_ENABLED:
+        return
+    _warmup_task = asyncio.get_running_loop().create_task(warm_up())
+    done, _ = await asyncio.wait({_warmup_task}, timeout=config.WARMUP_DEADLINE_SECONDS)
+    if not done:
+        logger.warning(
+            "Warm-up não terminou em %ss: a API sobe e o restante continua em segundo plano.",
+            config.WARMUP_DEADLINE_SECONDS
+        )
+
+
+async def stop_warmup() -> None:
+    """Cancela um warm-up ainda em andamento (chamado no shutdown)."""
+    global _warmup_task
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+        try:
+            await _warmup_task
+        except asyncio.CancelledError:
+            pass
+    _warmup_task = None
+
+
+# --- CLI ---
+
+async def _main(deadline: float, warm_pools: bool) -> int:
+    await init_redis()
+    try:
+        report = await asyncio.wait_for(warm_up(warm_pools=warm_pools), timeout=deadline)
+    except asyncio.TimeoutError:
+        print(f"Warm-up interrompido: prazo de {deadline}s esgotado.")
+        return 1
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+    print("\n--- Warm-up ---")
+    for name, result in report.items():
+        status = "ok" if result["ok"] else f"ERRO: {result['erro']}"
+        extra = f" ({result['itens']} itens)" if "itens" in result else ""
+        print(f"{name:<15} {result['ms']:>9.1f} ms  {status}{extra}")
+    print("---\n")
+    return 0 if all(r["ok"] for r in report.values()) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aquece os caches (L2/Redis) e as conexões do SunOps.")
+    parser.add_argument(
+        "--deadline", type=float, default=config.WARMUP_DEADLINE_SECONDS,
+        help="Tempo máximo, em segundos (padrão: WARMUP_DEADLINE_SECONDS)."
+    )
+    parser.add_argument(
+        "--skip-pools", action="store_true",
+        help="Não abre conexões (elas só servem ao próprio processo da CLI)."
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(asyncio.run(_main(args.deadline, warm_pools=not args.skip_pools)))
@@ -9,9 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncSession  # <--- CORREÇÃO AQUI
 
 # Importa a configuração da sessão assíncrona e a Base do seu app
 from app.db import async_session, Base, engine
+from app.cache import close_redis
 
 # Importa os modelos que vamos popular
 from app.core.equipamentos.models import Equipamento, CategoriaEquipamento
+from app.core.equipamentos.services import invalidar_equipamentos
 
 # Configura um logging básico
 logging.basicConfig(level=logging.INFO)
@@ -121,6 +123,8 @@ async def seed_data():
             if total_adicionados > 0:
                 await session.commit()
                 logger.info(f"Sucesso! {total_adicionados} novos equipamentos foram salvos no banco de dados.")
+                # Listagens cacheadas da API (equipamentos, catálogo, kits) deixam de valer
+                await invalidar_equipamentos(session, "equipamentos", "categorias_equipamentos")
             else:
                 logger.info("Nenhum equipamento novo para adicionar. O banco de dados já está atualizado.")
 
@@ -134,6 +138,7 @@ async def seed_data():
 async def main():
     await init_db()
     await seed_data()
+    await close_redis()
 
 if __name__ == "__main__":
     logger.info("Iniciando script de seeding dentro do container...")
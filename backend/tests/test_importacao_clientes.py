@@ -0,0 +1,59 @@
+import asyncio
+import tempfile
+
+from app.core.clientes import importacao
+from app.core.clientes.models import TipoCliente
+
+# Exportação típica de CRM: UTF-8 com BOM, ';' como separador e CRLF
+CSV = (
+    "\ufeffnome;cpf_cnpj;email\r\n"
+    "Maria Silva;123.456.789-09;maria@example.com\r\n"  # linha 2: importada
+    "João Souza;987.654.321-00;\r\n"                    # linha 3: já cadastrado
+    "Maria Silva (repetida);12345678909;\r\n"           # linha 4: repetida no arquivo
+    "Empresa Solar Ltda;11.222.333/0001-81;\r\n"        # linha 5: importada (PJ)
+    "Documento inválido;123;\r\n"                       # linha 6: documento inválido
+)
+
+
+def _upload(conteudo: str) -> tempfile.SpooledTemporaryFile:
+    """O mesmo tipo de arquivo que o UploadFile do Starlette entrega em '.file'."""
+    arquivo = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    arquivo.write(conteudo.encode("utf-8"))
+    arquivo.seek(0)
+    return arquivo
+
+
+def test_importar_clientes_csv_com_bom_e_ponto_e_virgula(monkeypatch):
+    cadastrados = {"98765432100"}
+    carregados = []
+
+    async def documentos_existentes(db, documentos):
+        return cadastrados & set(documentos)
+
+    async def carregar(db, registros):
+        carregados.extend(registros)
+        return {registro[4] for registro in registros}
+
+    monkeypatch.setattr(importacao, "_documentos_existentes", documentos_existentes)
+    monkeypatch.setattr(importacao, "_carregar", carregar)
+
+    relatorio = asyncio.run(importacao.importar_clientes(None, "clientes.csv", _upload(CSV)))
+
+    assert relatorio.total_linhas == 5
+    assert relatorio.importados == 2
+    assert relatorio.com_erro == 3
+
+    erros = {erro.linha: erro for erro in relatorio.erros}
+    assert set(erros) == {3, 4, 6}
+    assert erros[3].erro == "documento já cadastrado"
+    assert erros[3].documento == "987.654.321-00"
+    assert erros[4].erro == "documento repetido no arquivo"
+    assert erros[4].documento == "12345678909"
+    assert "11 ou 14 dígitos" in erros[6].erro
+
+    # Cabeçalho lido sem o BOM; tipo deduzido pelo tamanho do documento
+    assert [(r[0], r[1], r[2], r[4]) for r in carregados] == [
+        (2, "Maria Silva", TipoCliente.PESSOA_FISICA.name, "12345678909"),
+        (5, "Empresa Solar Ltda", TipoCliente.PESSOA_JURIDICA.name, "11222333000181"),
+    ]
+    assert carregados[0][5] == "maria@example.com"
@@ -3,20 +3,49 @@ from flask_cors import CORS
 from flask_caching import Cache  # 1. Importar
 import json
 import os
+import re
+import redis
 
 app = Flask(__name__)
 CORS(app)  # Permite requisições do frontend
 
 # 2. Configuração do Cache
 #    (Usando variáveis de ambiente. 'redis' é o host padrão do Docker Compose)
+#    O Redis é compartilhado com o backend (FastAPI, DB 0): este serviço usa
+#    um DB próprio E um prefixo próprio, e nunca limpa o DB inteiro.
 app.config["CACHE_TYPE"] = "RedisCache"
 app.config["CACHE_REDIS_HOST"] = os.environ.get('REDIS_HOST', 'localhost')
-app.config["CACHE_REDIS_PORT"] = os.environ.get('REDIS_PORT', 6379)
-app.config["CACHE_REDIS_DB"] = 0
+app.config["CACHE_REDIS_PORT"] = int(os.environ.get('REDIS_PORT', 6379))
+app.config["CACHE_REDIS_DB"] = int(os.environ.get('CACHE_REDIS_DB', 1))
+app.config["CACHE_KEY_PREFIX"] = os.environ.get('CACHE_KEY_PREFIX', 'catalogo-api:')
 app.config["CACHE_DEFAULT_TIMEOUT"] = 3600  # Cache de 1 hora (em segundos)
 
 cache = Cache(app)  # 3. Inicializar o cache
 
+# Cliente direto, usado apenas para a invalidação por prefixo (SCAN + UNLINK)
+redis_client = redis.Redis(
+    host=app.config["CACHE_REDIS_HOST"],
+    port=app.config["CACHE_REDIS_PORT"],
+    db=app.config["CACHE_REDIS_DB"],
+)
+
+# Escopos invalidáveis: cada rota cacheada tem as chaves "<prefixo>/<rota>..."
+CACHE_SCOPES = ('modulos', 'inversores', 'fabricantes', 'search', 'health')
+
+def delete_by_prefix(prefix, batch_size=500):
+    """Apaga (em lotes, sem KEYS/FLUSHDB) todas as chaves que começam com 'prefix'."""
+    pattern = re.sub(r'([*?\[\]\\])', r'\\\1', prefix) + '*'
+    deleted = 0
+    batch = []
+    for key in redis_client.scan_iter(match=pattern, count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            deleted += redis_client.unlink(*batch)
+            batch = []
+    if batch:
+        deleted += redis_client.unlink(*batch)
+    return deleted
+
 # Carrega os JSONs na inicialização (1x só)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
@@ -39,7 +68,7 @@ except Exception as e:
 # ============= ROTAS =============
 
 @app.route('/health', methods=['GET'])
-@cache.cached(timeout=60)  # 4. Adicionar decorator de cache
+@cache.cached(timeout=60, key_prefix='/health')  # 4. Adicionar decorator de cache (chave: <prefixo>/health)
 def health():
     """Health check"""
     return jsonify({
@@ -152,12 +181,29 @@ def search():
         'inversores': {'total': len(inversores_result), 'data': inversores_result}
     })
 
-# Rota bônus para limpar o cache se você atualizar os JSONs
+# Invalidação do cache (ex: após atualizar os JSONs)
+# Apaga apenas as chaves deste serviço (prefixo CACHE_KEY_PREFIX).
+#   POST /cache/invalidate               -> todo o cache do catálogo
+#   POST /cache/invalidate?scope=modulos -> apenas as respostas de /modulos
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache_route():
+    scope = request.args.get('scope', 'all')
+    if scope != 'all' and scope not in CACHE_SCOPES:
+        return jsonify({'error': f"Escopo inválido. Use 'all' ou um de: {', '.join(CACHE_SCOPES)}"}), 400
+
+    prefix = app.config["CACHE_KEY_PREFIX"]
+    if scope != 'all':
+        prefix += f'/{scope}'
+    deleted = delete_by_prefix(prefix)
+    print(f"✓ Cache invalidado (escopo '{scope}'): {deleted} chaves.")
+    return jsonify({'scope': scope, 'deleted': deleted}), 200
+
+# Mantida por compatibilidade: agora limpa só as chaves deste serviço
 @app.route('/clear-cache', methods=['POST'])
 def clear_cache_route():
-    cache.clear()
-    print("✓ Cache limpo manualmente.")
-    return jsonify({"message": "Cache limpo com sucesso!"}), 200
+    deleted = delete_by_prefix(app.config["CACHE_KEY_PREFIX"])
+    print(f"✓ Cache limpo manualmente ({deleted} chaves).")
+    return jsonify({"message": "Cache limpo com sucesso!", "deleted": deleted}), 200
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -28,6 +28,12 @@ interface Cliente {
   // data_criacao: string; // Você pode adicionar este campo se o backend o enviar
 }
 
+// Uma página de GET /clientes/ (paginação por cursor)
+interface ClientesPagina {
+  itens: Cliente[];
+  next_cursor: string | null; // null = última página
+}
+
 // Interface para o payload de criação (para tipagem)
 interface ClienteCreate {
   nome_razao_social: string;
@@ -73,7 +79,9 @@ const formatDocumento = (value: string, tipo: TipoCliente) => {
 
 export default function Clientes() {
   const [clientes, setClientes] = useState<Cliente[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
   const [showModal, setShowModal] = useState(false);
 
@@ -108,8 +116,9 @@ export default function Clientes() {
     setLoading(true);
     try {
       const params = query ? { q: query } : {};
-      const response = await api.get('/clientes/', { params });
-      setClientes(response.data);
+      const response = await api.get<ClientesPagina>('/clientes/', { params });
+      setClientes(response.data.itens);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       toast.error('Erro ao carregar clientes');
     } finally {
@@ -117,6 +126,21 @@ export default function Clientes() {
     }
   };
 
+  // Próxima página (a busca "q" vem sempre em uma única página)
+  const fetchMaisClientes = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get<ClientesPagina>('/clientes/', { params: { cursor: nextCursor } });
+      setClientes((atuais) => [...atuais, ...response.data.itens]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error('Erro ao carregar clientes');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchClientes();
   }, []);
@@ -389,6 +413,19 @@ export default function Clientes() {
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="flex justify-center">
+          <button
+            onClick={fetchMaisClientes}
+            disabled={loadingMore}
+            className="inline-flex items-center gap-2 px-6 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition-colors disabled:opacity-50"
+          >
+            {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+            Carregar mais
+          </button>
+        </div>
+      )}
+
       {clientes.length === 0 && !loading && (
         <div className="text-center py-12">
           <User className="w-12 h-12 text-gray-400 mx-auto mb-4" />
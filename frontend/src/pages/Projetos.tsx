@@ -51,6 +51,7 @@ export default function Projetos() {
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
   const [clientes, setClientes] = useState<Cliente[]>([]);
+  const [buscaCliente, setBuscaCliente] = useState('');
   const [usuarios, setUsuarios] = useState<Usuario[]>([]);
   const { user } = useAuthStore();
 
@@ -76,15 +77,26 @@ export default function Projetos() {
     }
   };
 
-  const fetchClientes = async () => {
+  // GET /clientes/ é paginado: sem busca, traz a primeira página (por nome);
+  // com 3+ letras, busca no servidor (nome, documento ou email)
+  const fetchClientes = async (query = '') => {
     try {
-      const response = await api.get('/clientes/');
-      setClientes(response.data);
+      const params = query ? { q: query } : { limit: 200 };
+      const response = await api.get('/clientes/', { params });
+      setClientes(response.data.itens);
     } catch (error) {
       toast.error('Erro ao carregar clientes');
     }
   };
 
+  const handleBuscaClienteChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const query = e.target.value;
+    setBuscaCliente(query);
+    if (query.trim().length === 0 || query.trim().length >= 3) {
+      fetchClientes(query.trim());
+    }
+  };
+
   const fetchUsuarios = async () => {
     if (user?.role === 'gestor') {
       try {
@@ -262,6 +274,13 @@ export default function Projetos() {
 
               <div>
                 <label className="block text-sm font-medium text-gray-700 mb-1">Cliente</label>
+                <input
+                  type="text"
+                  value={buscaCliente}
+                  onChange={handleBuscaClienteChange}
+                  placeholder="Buscar cliente por nome, documento ou email..."
+                  className="w-full mb-2 px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-orange-500 focus:border-transparent"
+                />
                 <select
                   value={newProjeto.cliente_id}
                   onChange={(e) => setNewProjeto({...newProjeto, cliente_id: e.target.value})}
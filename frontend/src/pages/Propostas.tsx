@@ -37,6 +37,12 @@ interface Proposta {
   // 'created_at' removido pois não existe no schema ShowProposta
 }
 
+// Uma página de GET /propostas/ (paginação por cursor)
+interface PropostasPagina {
+  itens: Proposta[];
+  next_cursor: number | null; // null = última página
+}
+
 // Interface para a lista de clientes no modal
 interface Cliente {
   id: number;
@@ -48,16 +54,20 @@ interface Cliente {
 // --- COMPONENTE ---
 export default function Propostas() {
   const [propostas, setPropostas] = useState<Proposta[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [clientes, setClientes] = useState<Cliente[]>([]);
+  const [buscaCliente, setBuscaCliente] = useState('');
   const [isCreating, setIsCreating] = useState(false);
   const navigate = useNavigate();
 
   const fetchPropostas = async () => {
     try {
-      const response = await api.get('/propostas/');
-      setPropostas(response.data);
+      const response = await api.get<PropostasPagina>('/propostas/');
+      setPropostas(response.data.itens);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       toast.error('Erro ao carregar propostas');
     } finally {
@@ -65,15 +75,40 @@ export default function Propostas() {
     }
   };
 
-  const fetchClientes = async () => {
+  const fetchMaisPropostas = async () => {
+    if (nextCursor === null) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get<PropostasPagina>('/propostas/', { params: { cursor: nextCursor } });
+      setPropostas((atuais) => [...atuais, ...response.data.itens]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error('Erro ao carregar propostas');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // GET /clientes/ é paginado: sem busca, traz a primeira página (por nome);
+  // com 3+ letras, busca no servidor (nome, documento ou email)
+  const fetchClientes = async (query = '') => {
     try {
-      const response = await api.get('/clientes/');
-      setClientes(response.data);
+      const params = query ? { q: query } : { limit: 200 };
+      const response = await api.get('/clientes/', { params });
+      setClientes(response.data.itens);
     } catch (error) {
       toast.error('Erro ao carregar clientes');
     }
   };
 
+  const handleBuscaClienteChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const query = e.target.value;
+    setBuscaCliente(query);
+    if (query.trim().length === 0 || query.trim().length >= 3) {
+      fetchClientes(query.trim());
+    }
+  };
+
   useEffect(() => {
     fetchPropostas();
     fetchClientes();
@@ -193,6 +228,19 @@ export default function Propostas() {
         ))}
       </div>
 
+      {nextCursor !== null && (
+        <div className="flex justify-center">
+          <button
+            onClick={fetchMaisPropostas}
+            disabled={loadingMore}
+            className="inline-flex items-center gap-2 px-6 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition-colors disabled:opacity-50"
+          >
+            {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+            Carregar mais
+          </button>
+        </div>
+      )}
+
       {propostas.length === 0 && !loading && (
         <div className="text-center py-12">
           <FileText className="w-12 h-12 text-gray-400 mx-auto mb-4" />
@@ -216,6 +264,13 @@ export default function Propostas() {
             
             <div className="space-y-4">
               <p className="text-gray-600">Selecione um cliente para iniciar a proposta:</p>
+              <input
+                type="text"
+                value={buscaCliente}
+                onChange={handleBuscaClienteChange}
+                placeholder="Buscar cliente por nome, documento ou email..."
+                className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-orange-500 focus:border-transparent"
+              />
               
               <div className="max-h-64 overflow-y-auto space-y-2">
                 {clientes.map((cliente) => (